@@ -36,3 +36,17 @@ USE_AUDIO_INPUT = os.getenv(
 USE_AUDIO_OUTPUT = os.getenv(
     "USE_AUDIO_OUTPUT", "true"
 )  # Use audio output for responses
+
+AUTO_SELECT_NEAREST_MATCH = os.getenv(
+    "AUTO_SELECT_NEAREST_MATCH", "false"
+)  # Pick the nearest reachable match instead of asking the user to clarify
+
+MEMORY_QUERY_MAX_RESULTS = int(
+    os.getenv("MEMORY_QUERY_MAX_RESULTS", "5")
+)  # Matches nearest to the robot considered for FIND_OBJECT
+DESCRIBE_AREA_RADIUS = float(
+    os.getenv("DESCRIBE_AREA_RADIUS", "400")
+)  # Distance (px) from the robot that DESCRIBE_AREA reports objects within
+DESCRIBE_AREA_MAX_OBJECTS = int(
+    os.getenv("DESCRIBE_AREA_MAX_OBJECTS", "20")
+)  # Nearest objects passed to the LLM for DESCRIBE_AREA
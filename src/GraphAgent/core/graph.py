@@ -5,8 +5,20 @@ from .nodes import Nodes
 from ..config.prompts import SYSTEM_PROMPT
 
 
+def route_after_memory_query(state: State) -> str:
+    # An area description only reports what is around; a single (or
+    # auto-selected) object to find is navigated to
+    if state.get("current_intent", "") == "DESCRIBE_AREA":
+        return "llm_response_node"
+    if state.get("memory_query_results") and not state.get("requires_clarification"):
+        return "prep_nav_target_memory"
+    return "llm_response_node"
+
+
 class WorkFlow:
-    def __init__(self):
+    def __init__(self, robot_id: int = 0):
+        # Simulated robot addressed by this agent session
+        self.robot_id = robot_id
         self._nodes = None
         self._app = None
         self.chat_history = []
@@ -60,15 +72,10 @@ class WorkFlow:
                 "llm_response_node": "llm_response_node",
             },
         )
-        # After memory_query_node, decide based on query results.
+        # After memory_query_node, decide based on intent and query results.
         workflow.add_conditional_edges(
             "memory_query_node",
-            lambda state: (
-                "prep_nav_target_memory"
-                if state.get("memory_query_results")
-                and not state.get("requires_clarification")
-                else "llm_response_node"
-            ),
+            route_after_memory_query,
             {
                 "prep_nav_target_memory": "prep_nav_target_memory",
                 "llm_response_node": "llm_response_node",
@@ -95,6 +102,7 @@ class WorkFlow:
                 "user_input_audio": audio,
                 "extracted_entities": extracted_entities,  # Pass the extracted entities to the flow
                 "chat_history": self.chat_history,
+                "robot_id": self.robot_id,
             },
             config={"configurable": {"thread_id": "1"}},
             debug=debugMode,
@@ -1,4 +1,5 @@
-from typing import Tuple, Dict, Any, List
+import math
+from typing import Tuple, Dict, Any, List, Optional
 from ..utils.audio import (
     record_audio,
     play_audio,
@@ -35,32 +36,97 @@ def synthesize_speech(text: str) -> str:
 """Interfaces for Robot Navigation"""
 
 
-def get_current_pose() -> Tuple[float, float, float]:
+def get_current_pose(robot_id: int = 0) -> Tuple[float, float, float]:
     # Delegate to simulation API for pose
-    return sim.get_current_pose_from_sim()
-
-
-def query_memory(entity_type: str, criteria: Dict[str, Any]) -> List[Dict[str, Any]]:
-    # Fetch full memory from simulation
-    mem = sim.get_memory_data_from_sim()
-    print(mem)
-    results: List[Dict[str, Any]] = []
-    if entity_type == "object":
-        objs = mem.get("object_instances", {})
-        for entry in objs.values():
-            # filter by criteria if provided
-            match = True
-            if criteria:
-                # assume criteria contains 'label' to match object label
-                label = criteria.get("label")
-                if label and entry.get("label", "").lower() != str(label).lower():
-                    match = False
-            if match:
-                results.append(entry)
-    # TODO: support other entity types
+    return sim.get_current_pose_from_sim(robot_id)
+
+
+def get_memory_snapshot():
+    """
+    Return the current immutable memory snapshot; pass it to the query
+    functions so a whole turn reads one memory version, then release() it.
+    """
+    return sim.get_memory_snapshot_from_sim()
+
+
+def query_memory(
+    entity_type: str, criteria: Dict[str, Any], snapshot=None
+) -> List[Dict[str, Any]]:
+    # Look up entries of the entity type in the simulation's indexed memory
+    # store; criteria may contain 'label' to match (case-insensitive)
+    label = (criteria or {}).get("label")
+    results = sim.query_memory_in_sim(entity_type, label or None, snapshot)
+    if not results and label:
+        # no exact match: fall back to similar labels ("mug" -> "cup"),
+        # best scoring first, before asking the user to clarify
+        results = sim.search_memory_in_sim(entity_type, label, snapshot=snapshot)
+    return results
+
+
+def query_memory_near(
+    entity_type: str,
+    criteria: Dict[str, Any],
+    pose: Optional[Tuple[float, float, float]],
+    k: int = 5,
+    radius: Optional[float] = None,
+    snapshot=None,
+) -> List[Dict[str, Any]]:
+    """
+    Return the `k` entries matching `criteria` nearest to `pose` (within
+    `radius` if given), each with a straight-line "distance", nearest first.
+    """
+    if pose is None:
+        return query_memory(entity_type, criteria, snapshot)[:k]
+    x, y = pose[0], pose[1]
+    label = (criteria or {}).get("label") or None
+    results = sim.query_memory_near_in_sim(
+        x, y, k, entity_type, label, radius, snapshot
+    )
+    if not results and label:
+        # no exact label match nearby: similar labels, nearest first
+        similar = []
+        for entry in sim.search_memory_in_sim(entity_type, label, snapshot=snapshot):
+            coords = entry.get("map_coordinates", {})
+            distance = math.hypot(coords.get("x", 0.0) - x, coords.get("y", 0.0) - y)
+            if radius is None or distance <= radius:
+                similar.append({**entry, "distance": distance})
+        similar.sort(key=lambda e: e["distance"])
+        results = similar[:k]
     return results
 
 
+def query_memory_in_region(
+    region: str, entity_type: str = "object", snapshot=None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Return the entries inside the named region, or None if it is not a
+    known region.
+    """
+    return sim.query_memory_in_region_in_sim(region, entity_type, snapshot)
+
+
+def rank_by_travel_distance(
+    results: List[Dict[str, Any]], robot_id: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Return memory entries sorted by path distance from the robot, nearest first.
+
+    Each entry is copied with a "travel_distance" field (None if unreachable);
+    distances come from a single distance-field flood in the simulation.
+    """
+    distances = sim.get_memory_travel_distances_from_sim(
+        robot_id, [entry.get("entry_id") for entry in results]
+    )
+    ranked = [
+        {**entry, "travel_distance": distances.get(entry.get("entry_id"))}
+        for entry in results
+    ]
+    ranked.sort(
+        key=lambda e: (e["travel_distance"] is None, e["travel_distance"] or 0.0)
+    )
+    return ranked
+
+
 def get_full_memory() -> Dict[str, Any]:
     """
     Return the full structured memory from the simulation.
@@ -68,19 +134,25 @@ def get_full_memory() -> Dict[str, Any]:
     return sim.get_memory_data_from_sim()
 
 
-def send_nav_goal(x: float, y: float, theta: float) -> None:
-    # Delegate to simulation API for navigation goal
-    sim.send_nav_goal_to_sim(x, y, theta)
+def send_nav_goal(x: float, y: float, theta: float, robot_id: int = 0):
+    # Delegate to simulation API for navigation goal; returns a NavHandle
+    # resolved with the final status
+    return sim.send_nav_goal_to_sim(x, y, theta, robot_id)
+
+
+async def navigate(x: float, y: float, theta: float, robot_id: int = 0) -> str:
+    # Await the final navigation status without blocking a thread
+    return await sim.navigate_in_sim(x, y, theta, robot_id)
 
 
-def get_nav_status() -> str:
+def get_nav_status(robot_id: int = 0) -> str:
     # Delegate to simulation API for navigation status
-    return sim.get_nav_status_from_sim()
+    return sim.get_nav_status_from_sim(robot_id)
 
 
-def execute_robot_action(action: str, params: Dict[str, Any]) -> str:
+def execute_robot_action(action: str, params: Dict[str, Any], robot_id: int = 0) -> str:
     # Delegate to simulation API for direct robot actions
-    return sim.execute_robot_action_in_sim(action, params)
+    return sim.execute_robot_action_in_sim(action, params, robot_id)
 
 
 if __name__ == "__main__":
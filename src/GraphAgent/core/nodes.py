@@ -9,8 +9,16 @@ from ..utils.audio import record_audio
 from ..llm.final_response import generate_final_response
 from ..llm.action_execution import extract_action_params
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
-from ..config.constants import USER_INTENTS, USE_AUDIO_INPUT, USE_AUDIO_OUTPUT
-import time
+from ..config.constants import (
+    USER_INTENTS,
+    USE_AUDIO_INPUT,
+    USE_AUDIO_OUTPUT,
+    AUTO_SELECT_NEAREST_MATCH,
+    MEMORY_QUERY_MAX_RESULTS,
+    DESCRIBE_AREA_RADIUS,
+    DESCRIBE_AREA_MAX_OBJECTS,
+)
+from concurrent.futures import CancelledError
 
 
 class Nodes:
@@ -39,7 +47,9 @@ class Nodes:
         else:
             state["user_input_text"] = input("Enter Command >")
         # Update current pose as gathered from robot sensors.
-        state["current_robot_pose"] = interfaces.get_current_pose()
+        state["current_robot_pose"] = interfaces.get_current_pose(
+            state.get("robot_id", 0)
+        )
         print(
             f"{Colors.BLUE}[user_input_node] Captured input: {state.get('user_input_text')}{Colors.ENDC}"
         )
@@ -92,16 +102,59 @@ class Nodes:
             )
             # Store extracted entity for debugging or reuse
             state["extracted_entities"]["label"] = label
-            # Query memory for matching objects
-            results = interfaces.query_memory(
-                "object", {"label": label} if label else {}
-            )
+            pose = state.get("current_robot_pose")
+            results = None
+            # Every query of the turn reads one memory version; the snapshot
+            # is released afterwards so mapping can move past it
+            snapshot = interfaces.get_memory_snapshot()
+            state["memory_version"] = snapshot.version if snapshot else None
+            try:
+                if state.get("current_intent") == "DESCRIBE_AREA":
+                    # A named region, else the objects around the robot
+                    if label:
+                        results = interfaces.query_memory_in_region(
+                            label, snapshot=snapshot
+                        )
+                    if results is None:
+                        results = interfaces.query_memory_near(
+                            "object",
+                            {},
+                            pose,
+                            k=DESCRIBE_AREA_MAX_OBJECTS,
+                            radius=DESCRIBE_AREA_RADIUS,
+                            snapshot=snapshot,
+                        )
+                else:
+                    # Matching objects nearest to the robot
+                    results = interfaces.query_memory_near(
+                        "object",
+                        {"label": label} if label else {},
+                        pose,
+                        k=MEMORY_QUERY_MAX_RESULTS,
+                        snapshot=snapshot,
+                    )
+            finally:
+                if snapshot is not None:
+                    snapshot.release()
+            if len(results) > 1:
+                # Rank candidates by travel distance (nearest first)
+                results = interfaces.rank_by_travel_distance(
+                    results, state.get("robot_id", 0)
+                )
             state["memory_query_results"] = results
             # Determine if clarification is needed
             if not results:
                 state["requires_clarification"] = True
+            elif state.get("current_intent") == "DESCRIBE_AREA":
+                # every object found is part of the description
+                state["requires_clarification"] = False
             elif len(results) > 1:
-                state["requires_clarification"] = True
+                # For FIND_OBJECT the nearest reachable instance can be used directly
+                state["requires_clarification"] = not (
+                    AUTO_SELECT_NEAREST_MATCH.lower() == "true"
+                    and state.get("current_intent") == "FIND_OBJECT"
+                    and results[0].get("travel_distance") is not None
+                )
             else:
                 state["requires_clarification"] = False
             print(
@@ -110,7 +163,7 @@ class Nodes:
             # Log to history
             state["chat_history"].append(
                 SystemMessage(
-                    content=f"Memory query for '{label}' returned {len(results)} result(s), clarification needed: {state.get('requires_clarification')}"
+                    content=f"Memory query for '{label}' (memory version {state.get('memory_version')}) returned {len(results)} result(s), clarification needed: {state.get('requires_clarification')}"
                 )
             )
         return state
@@ -146,7 +199,7 @@ class Nodes:
         # Prepare navigation target based on memory query result
         results = state.get("memory_query_results", [])
         if results and not state.get("requires_clarification"):
-            # Use first unique result's map_coordinates
+            # Use first result's map_coordinates (nearest first when ranked)
             entry = results[0]
             coords = entry.get("map_coordinates", {})
             x = coords.get("x", 0.0)
@@ -168,8 +221,8 @@ class Nodes:
         # Execute navigation if a target is set.
         if state.get("navigation_target"):
             x, y, theta = state["navigation_target"]
-            interfaces.send_nav_goal(x, y, theta)
-            state["navigation_status"] = interfaces.get_nav_status()
+            robot_id = state.get("robot_id", 0)
+            handle = interfaces.send_nav_goal(x, y, theta, robot_id)
 
             # Log to history
             state["chat_history"].append(
@@ -179,23 +232,23 @@ class Nodes:
             )
 
             timeout = 60  # Timeout in seconds
-            start_time = time.time()
-            while state["navigation_status"] == "IN_PROGRESS":
-                # Poll for navigation status until completed
-                state["navigation_status"] = interfaces.get_nav_status()
-                if time.time() - start_time > timeout:
-                    print(
-                        f"{Colors.RED}[navigation_node] Navigation timed out.{Colors.ENDC}"
-                    )
-                    state["navigation_status"] = "TIMEOUT"
-                    break
-                time.sleep(0.1)  # Add a short delay to avoid resource exhaustion
+            try:
+                # Wait for the simulation to report completion
+                state["navigation_status"] = handle.result(timeout=timeout)
+            except TimeoutError:
+                print(
+                    f"{Colors.RED}[navigation_node] Navigation timed out.{Colors.ENDC}"
+                )
+                handle.cancel()
+                state["navigation_status"] = "TIMEOUT"
+            except CancelledError:
+                state["navigation_status"] = "CANCELLED"
             print(
                 f"{Colors.BLUE}[navigation_node] Navigation status: {state.get('navigation_status')}{Colors.ENDC}"
             )
 
             # Update current pose
-            state["current_robot_pose"] = interfaces.get_current_pose()
+            state["current_robot_pose"] = interfaces.get_current_pose(robot_id)
 
             # Log to history
             state["chat_history"].append(
@@ -212,7 +265,9 @@ class Nodes:
         params = extract_action_params(user_input, history, self.chat_llm)
         action = params.get("action")
         # Execute the action via interfaces
-        state["action_status"] = interfaces.execute_robot_action(action, params)
+        state["action_status"] = interfaces.execute_robot_action(
+            action, params, state.get("robot_id", 0)
+        )
         print(
             f"{Colors.BLUE}[action_execution_node] Executed action: {action} with params: {params}, status: {state.get('action_status')}{Colors.ENDC}"
         )
@@ -23,6 +23,7 @@ class State(MessagesState):
 
     extracted_entities: Dict[str, Any] = {}
     memory_query_results: List[Dict[str, Any]] = []
+    memory_version: Optional[int] = None  # memory snapshot the turn queried
     navigation_target: Optional[Tuple[float, float, float]] = None  # (x, y, theta)
     navigation_status: Optional[str] = None
     action_status: Optional[str] = None
@@ -31,3 +32,4 @@ class State(MessagesState):
     requires_clarification: bool = False
     error_message: Optional[str] = None
     current_robot_pose: Optional[Tuple[float, float, float]] = None
+    robot_id: int = 0  # which simulated robot this session controls
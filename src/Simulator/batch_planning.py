@@ -0,0 +1,176 @@
+# filepath: src/Simulator/batch_planning.py
+"""
+Process-pool batch path planning.
+
+The occupancy cells and clearance layer of a Costmap are copied once into a
+shared memory block; a worker attaches to it read-only on its first task of
+a batch and rebuilds its Costmap view from it, so tasks only carry the
+block's spec and (start, goal) pairs. That lets one long-lived pool serve
+every batch, whatever the map version.
+
+Workers are started with the "forkserver" method ("spawn" where it is not
+available): the simulation runs planner and agent threads, and forking a
+multi-threaded process can deadlock the child.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .occupancy import Costmap, OccupancyGrid
+from .planners import PlanResult, plan_path
+
+Point = Tuple[float, float]
+
+# Costmap rebuilt in each worker process from the shared block of the
+# batch it is serving
+_worker_costmap: Optional[Costmap] = None
+_worker_shm: Optional[shared_memory.SharedMemory] = None
+
+
+def planner_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Process pool for plan_paths_batch(), safe to start from a threaded
+    process. Reuse it across batches and shut it down when done.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    method = "forkserver" if "forkserver" in methods else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context(method)
+    )
+
+
+class SharedCostmap:
+    """
+    Owns a shared memory block holding a costmap's cells and clearance.
+
+    Use as a context manager; the block is unlinked on exit.
+    """
+
+    def __init__(self, costmap: Costmap):
+        cells = costmap.grid.cells
+        clearance = costmap.clearance
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=_clearance_offset(cells.shape) + clearance.nbytes
+        )
+        self.spec: Dict[str, Any] = {
+            "name": self.shm.name,
+            "shape": cells.shape,
+            "cell_size": costmap.grid.cell_size,
+            "version": costmap.version,
+            "robot_radius": costmap.robot_radius,
+            "inflation_radius": costmap.inflation_radius,
+            "cost_weight": costmap.cost_weight,
+        }
+        cells_view, clearance_view = _views(self.shm, cells.shape)
+        cells_view[:] = cells
+        clearance_view[:] = clearance
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self) -> "SharedCostmap":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _views(
+    shm: shared_memory.SharedMemory, shape: Tuple[int, int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    cells = np.ndarray(shape, dtype=bool, buffer=shm.buf, offset=0)
+    clearance = np.ndarray(
+        shape, dtype=np.float64, buffer=shm.buf, offset=_clearance_offset(shape)
+    )
+    return cells, clearance
+
+
+def _clearance_offset(shape: Tuple[int, int]) -> int:
+    # clearance follows the one-byte cells, padded to 8-byte alignment
+    return -(-shape[0] * shape[1] // 8) * 8
+
+
+def _attach(spec: Dict[str, Any]) -> Costmap:
+    global _worker_costmap, _worker_shm
+    if _worker_shm is not None and _worker_shm.name == spec["name"]:
+        return _worker_costmap
+    if _worker_shm is not None:
+        # detach from the previous batch's block (already unlinked)
+        _worker_costmap = None
+        try:
+            _worker_shm.close()
+        except BufferError:
+            pass  # a view is still alive; the mapping goes with it
+    # Pool workers share the parent's resource tracker, so attaching by name
+    # does not hand ownership of the block to the worker.
+    _worker_shm = shared_memory.SharedMemory(name=spec["name"])
+    cells, clearance = _views(_worker_shm, spec["shape"])
+    cells.flags.writeable = False
+    clearance.flags.writeable = False
+    grid = OccupancyGrid(cells, spec["cell_size"], spec["version"])
+    _worker_costmap = Costmap(
+        grid,
+        spec["robot_radius"],
+        spec["inflation_radius"],
+        spec["cost_weight"],
+        clearance=clearance,
+    )
+    return _worker_costmap
+
+
+def _plan_task(
+    spec: Dict[str, Any],
+    index: int,
+    start: Point,
+    goal: Point,
+    planner: str,
+    smooth: bool,
+) -> Tuple[int, PlanResult]:
+    return index, plan_path(start, goal, _attach(spec), planner, smooth=smooth)
+
+
+def plan_paths_batch(
+    costmap: Costmap,
+    pairs: List[Tuple[Point, Point]],
+    planner: str = "astar",
+    smooth: bool = True,
+    max_workers: Optional[int] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> Iterator[Tuple[int, PlanResult]]:
+    """
+    Plan every (start, goal) pair on a process pool: `pool` (see
+    planner_pool()) if given, else one of `max_workers` started for this
+    batch.
+
+    Yields (index into `pairs`, PlanResult) as each plan completes, so the
+    order is not the input order.
+    """
+    if not pairs:
+        return
+    own_pool = pool is None
+    if own_pool:
+        pool = planner_pool(max_workers)
+    try:
+        with SharedCostmap(costmap) as shared:
+            futures = [
+                pool.submit(_plan_task, shared.spec, i, start, goal, planner, smooth)
+                for i, (start, goal) in enumerate(pairs)
+            ]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                # the block must outlive every task that may still read it
+                for future in futures:
+                    future.cancel()
+                for future in futures:
+                    if not future.cancelled():
+                        future.exception()
+    finally:
+        if own_pool:
+            pool.shutdown()
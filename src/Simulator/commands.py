@@ -0,0 +1,229 @@
+# filepath: src/Simulator/commands.py
+"""
+Cross-thread access to a running Simulation.
+
+Other threads (the agent) never touch simulation state directly. They queue
+calls on a CommandQueue, which the simulation thread drains once per tick,
+and read robot state from the immutable SimSnapshot the simulation publishes
+after every tick. Each queued call returns a concurrent.futures.Future that
+is resolved after the snapshot reflecting its effect has been published.
+"""
+
+import asyncio
+import queue
+from concurrent.futures import CancelledError, Future, InvalidStateError
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+
+class RobotSnapshot(NamedTuple):
+    x: float
+    y: float
+    theta: float
+    nav_status: str
+    action_status: str
+    action: Optional[str]
+
+    @property
+    def pose(self) -> Tuple[float, float, float]:
+        return self.x, self.y, self.theta
+
+
+class SimSnapshot(NamedTuple):
+    """
+    Robot states after a tick; `version` increases with every publish.
+    """
+
+    version: int
+    step: int
+    sim_time: float
+    robots: Tuple[RobotSnapshot, ...]
+
+
+class NavProgress(NamedTuple):
+    """
+    Progress of a navigation goal after a tick, passed to progress callbacks.
+    """
+
+    robot_id: int
+    x: float
+    y: float
+    theta: float
+    nav_status: str
+    remaining: float  # path length (px) left to the goal
+
+
+class NavHandle:
+    """
+    Completion handle of a navigation goal.
+
+    Resolved by the simulation with the final nav status ("SUCCEEDED" or
+    "FAILED") at the end of the tick in which the robot finishes; cancelled
+    when the goal is cancelled or superseded by a newer goal for the robot.
+    Block with result(), chain with add_done_callback(), or `await` it from
+    asyncio code, which waits without holding a thread.
+    """
+
+    def __init__(self, sim, robot_id: int):
+        self.sim = sim
+        self.robot_id = robot_id
+        self.future: Future = Future()
+        self._progress_callbacks: List[Callable[[NavProgress], Any]] = []
+
+    def result(self, timeout: Optional[float] = None) -> str:
+        """
+        Wait for the final status; raises TimeoutError or CancelledError.
+        """
+        return self.future.result(timeout)
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancelled(self) -> bool:
+        return self.future.cancelled()
+
+    def cancel(self) -> bool:
+        """
+        Cancel the goal; the robot stops at the start of the next step.
+        """
+        if not self.future.cancel():
+            return False
+        if self.sim is not None:
+            self.sim.submit(self.sim.cancel_nav_goal, self.robot_id, self)
+        return True
+
+    def watch(self, started: Future):
+        """
+        Fail or cancel the handle if `started`, the queued call that starts
+        the goal, does.
+        """
+
+        def check(done: Future):
+            if done.cancelled():
+                self.future.cancel()
+            elif done.exception() is not None:
+                try:
+                    self.future.set_exception(done.exception())
+                except InvalidStateError:
+                    # cancelled or resolved meanwhile
+                    pass
+
+        started.add_done_callback(check)
+
+    def resolve(self, status: str) -> bool:
+        """
+        Resolve with the final status (simulation thread). Returns False if
+        the handle was already cancelled, possibly just now by another
+        thread, or resolved.
+        """
+        try:
+            self.future.set_result(status)
+        except InvalidStateError:
+            return False
+        return True
+
+    def add_done_callback(self, fn: Callable[["NavHandle"], Any]):
+        self.future.add_done_callback(lambda _: fn(self))
+
+    def add_progress_callback(self, fn: Callable[[NavProgress], Any]):
+        """
+        Call fn(NavProgress) after every tick while the robot is underway.
+
+        Callbacks run on the simulation thread and must return quickly.
+        """
+        self._progress_callbacks.append(fn)
+
+    def _report(self, progress: NavProgress):
+        for fn in list(self._progress_callbacks):
+            fn(progress)
+
+    @property
+    def wants_progress(self) -> bool:
+        return bool(self._progress_callbacks)
+
+    def __await__(self):
+        return asyncio.wrap_future(self.future).__await__()
+
+
+def chain_future(source: Future, target: Future):
+    """
+    Resolve `target` like `source` once `source` is done.
+    """
+
+    def copy(done: Future):
+        if done.cancelled():
+            # a running Future can no longer be cancelled
+            if not target.cancel():
+                target.set_exception(CancelledError())
+        elif done.exception() is not None:
+            target.set_exception(done.exception())
+        else:
+            target.set_result(done.result())
+
+    source.add_done_callback(copy)
+
+
+class CommandQueue:
+    """
+    Multi-producer, single-consumer queue of calls for the simulation thread.
+
+    Producers only append to a queue.SimpleQueue (no lock is held while the
+    simulation drains it). A call may return a Future of its own for work
+    that finishes in a later tick; the call's Future then follows it.
+    """
+
+    def __init__(self):
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        # (future, result, exception) of calls run this tick, resolved
+        # after the tick's snapshot is published
+        self._done: List[Tuple[Future, Any, Optional[BaseException]]] = []
+
+    def submit(self, fn: Callable, *args) -> Future:
+        future: Future = Future()
+        self._queue.put((fn, args, future))
+        return future
+
+    def run_pending(self) -> int:
+        """
+        Run every queued call (simulation thread). Returns how many ran.
+        """
+        count = 0
+        while True:
+            try:
+                fn, args, future = self._queue.get_nowait()
+            except queue.Empty:
+                return count
+            if not future.set_running_or_notify_cancel():
+                continue
+            count += 1
+            try:
+                result = fn(*args)
+            except Exception as exc:
+                self._done.append((future, None, exc))
+                continue
+            if isinstance(result, Future):
+                chain_future(result, future)
+            else:
+                self._done.append((future, result, None))
+
+    def resolve(self):
+        """
+        Resolve the Futures of calls run since the last resolve().
+        """
+        done, self._done = self._done, []
+        for future, result, exc in done:
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+    def cancel_pending(self):
+        """
+        Cancel queued calls that will never run (simulation shutting down).
+        """
+        self.resolve()
+        while True:
+            try:
+                _, _, future = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            future.cancel()
@@ -0,0 +1,482 @@
+# filepath: src/Simulator/fleet.py
+"""
+Vectorized multi-robot fleet with struct-of-arrays state.
+
+Positions, headings, speeds, statuses, actions and path cursors of every robot
+live in NumPy arrays, so kinematics, obstacle collision and robot-robot
+separation for the whole fleet are advanced in one vectorized step. FleetRobot exposes a single slot with the
+same attributes as Robot so planning, drawing and the simulation API can
+address any robot by id.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .collision import contact_fraction, swept_circle_toi
+from .occupancy import Costmap, OccupancyGrid
+
+NAV_STATUSES = ["IDLE", "PLANNING", "IN_PROGRESS", "SUCCEEDED", "FAILED"]
+ACTION_STATUSES = ["IDLE", "IN_PROGRESS", "SUCCEEDED"]
+ACTIONS = [None, "rotate", "move_forward"]
+
+_NAV = {name: code for code, name in enumerate(NAV_STATUSES)}
+_ACT_STATUS = {name: code for code, name in enumerate(ACTION_STATUSES)}
+_ACTION = {name: code for code, name in enumerate(ACTIONS)}
+
+# Max robot x obstacle pairs broadcast at once in the collision check
+_COLLISION_CHUNK = 1_000_000
+# How far ahead of a navigating robot its lane reaches, in robot radii
+_LANE_RADII = 8.0
+
+
+class Fleet:
+    def __init__(
+        self,
+        positions: np.ndarray,
+        theta: float = 0.0,
+        speed: float = 60.0,
+        radius: float = 10.0,
+        angular_speed: float = 90.0,
+        action_speed: float = 2.0,
+        path_capacity: int = 64,
+        max_wait: float = 5.0,
+    ):
+        n = len(positions)
+        self.size = n
+        self.radius = float(radius)  # all robots share one footprint
+        self.angular_speed = angular_speed
+        self.action_speed = action_speed  # move_forward, pixels per second
+        self.x = np.asarray(positions, dtype=np.float64)[:, 0].copy()
+        self.y = np.asarray(positions, dtype=np.float64)[:, 1].copy()
+        self.theta = np.full(n, theta, dtype=np.float64)
+        self.speed = np.full(n, speed, dtype=np.float64)  # pixels per second
+        self.final_theta = np.full(n, theta, dtype=np.float64)
+        self.nav_status = np.full(n, _NAV["IDLE"], dtype=np.int8)
+        # Direct actions
+        self.action = np.zeros(n, dtype=np.int8)
+        self.action_status = np.full(n, _ACT_STATUS["IDLE"], dtype=np.int8)
+        self.action_angle = np.zeros(n, dtype=np.float64)
+        self.action_time_left = np.zeros(n, dtype=np.float64)
+        # Paths are stored padded: paths[i, :path_len[i]] are robot i's waypoints
+        self.paths = np.zeros((n, path_capacity, 2), dtype=np.float64)
+        self.path_len = np.zeros(n, dtype=np.int32)
+        self.path_index = np.zeros(n, dtype=np.int32)
+        self._acting = np.zeros(n, dtype=bool)
+        # Seconds each robot has been waiting for other robots; navigation
+        # fails after max_wait so a gridlock cannot hang its callers
+        self.max_wait = max_wait
+        self.wait_time = np.zeros(n, dtype=np.float64)
+        # Robots checked exactly against obstacle rects in the last update
+        self.collision_candidates = 0
+        # Robots held in place to keep clear of another robot in the last update
+        self.yielded = 0
+
+    def robot(self, robot_id: int) -> "FleetRobot":
+        if not 0 <= robot_id < self.size:
+            raise IndexError(f"robot_id {robot_id} out of range (fleet of {self.size})")
+        return FleetRobot(self, robot_id)
+
+    def set_path(self, i: int, path: List[Tuple[float, float]]):
+        if len(path) > self.paths.shape[1]:
+            # grow the shared path buffer geometrically
+            capacity = max(len(path), 2 * self.paths.shape[1])
+            grown = np.zeros((self.size, capacity, 2), dtype=np.float64)
+            grown[:, : self.paths.shape[1]] = self.paths
+            self.paths = grown
+        if path:
+            self.paths[i, : len(path)] = path
+        self.path_len[i] = len(path)
+        self.path_index[i] = 0
+
+    def start_action(self, i: int, action: str, params: Dict[str, Any]):
+        """
+        Initiate an animated action for robot i: 'rotate' or 'move_forward'.
+        """
+        self.action[i] = _ACTION.get(action, 0)
+        if action == "rotate":
+            self.action_angle[i] = params.get("angle", 0.0)
+            self.action_time_left[i] = abs(self.action_angle[i]) / self.angular_speed
+        elif action == "move_forward":
+            self.action_time_left[i] = params.get("duration", 0.0)
+        else:
+            self.action_time_left[i] = 0.0
+        self.action_status[i] = _ACT_STATUS["IN_PROGRESS"]
+
+    def update(
+        self,
+        dt: float,
+        boxes: np.ndarray,
+        costmap: Optional[Costmap] = None,
+        static_grid: Optional[OccupancyGrid] = None,
+    ):
+        """
+        Advance every robot by one step and stop those that hit an obstacle
+        at the point of impact.
+
+        `boxes` is an (N, 4) array of obstacle (left, top, right, bottom) and
+        `static_grid` optional wall cells loaded from a map. Each robot's
+        circle is swept along its step, so large steps cannot pass through
+        thin obstacles. With a `costmap` built for the fleet radius, robots
+        whose step stays clearly away from obstacles skip the exact checks.
+        A robot whose step would run into another robot, or into the lane of
+        a navigating robot with a lower id, waits where it was instead; after
+        waiting longer than `max_wait` its navigation fails.
+        """
+        # state a robot that has to wait for another robot is put back to
+        prev = {
+            name: getattr(self, name).copy()
+            for name in ("x", "y", "theta", "nav_status", "path_len", "path_index")
+        }
+        prev_x, prev_y = prev["x"], prev["y"]
+        self._update_actions(dt)
+        self._follow_paths(dt)
+        toi = self._collisions(prev_x, prev_y, boxes, costmap, static_grid)
+        hit = toi <= 1.0
+        if hit.any():
+            # collision: stop at the point of impact and cancel navigation
+            t = contact_fraction(
+                prev_x[hit], prev_y[hit], self.x[hit], self.y[hit], toi[hit]
+            )
+            self.x[hit] = prev_x[hit] + (self.x[hit] - prev_x[hit]) * t
+            self.y[hit] = prev_y[hit] + (self.y[hit] - prev_y[hit]) * t
+            self.nav_status[hit] = _NAV["FAILED"]
+            self.path_len[hit] = 0
+            self.path_index[hit] = 0
+        held = self._keep_robots_apart(prev)
+        hit &= ~held
+        self.wait_time[held] += dt
+        self.wait_time[~held] = 0.0
+        stuck = self.wait_time > self.max_wait
+        if stuck.any():
+            # blocked for too long: give up so the goal can be replanned
+            gave_up = stuck & (self.path_len > 0)
+            self.nav_status[gave_up] = _NAV["FAILED"]
+            self.path_len[gave_up] = 0
+            self.path_index[gave_up] = 0
+            self.wait_time[stuck] = 0.0
+        return hit
+
+    def _update_actions(self, dt: float):
+        acting = self.action_status == _ACT_STATUS["IN_PROGRESS"]
+        if not acting.any():
+            self._acting = acting
+            return
+        rot = acting & (self.action == _ACTION["rotate"])
+        if rot.any():
+            # minimal circular difference to the (moving) target heading
+            diff = (self.action_angle[rot] % 360 + 540) % 360 - 180
+            step = np.minimum(self.angular_speed * dt, np.abs(diff))
+            self.theta[rot] = (
+                self.theta[rot] + step * np.where(diff >= 0, 1, -1)
+            ) % 360
+        fwd = acting & (self.action == _ACTION["move_forward"])
+        if fwd.any():
+            rad = np.radians(self.theta[fwd])
+            distance = self.action_speed * dt
+            self.x[fwd] += np.cos(rad) * distance
+            self.y[fwd] -= np.sin(rad) * distance
+        self.action_time_left[acting] -= dt
+        done = acting & (self.action_time_left <= 0)
+        self.action_status[done] = _ACT_STATUS["SUCCEEDED"]
+        self.action[done] = _ACTION[None]
+        # robots busy with an action do not follow their path this step
+        self._acting = acting
+
+    def _follow_paths(self, dt: float):
+        follow = (
+            ~self._acting & (self.path_len > 0) & (self.nav_status != _NAV["SUCCEEDED"])
+        )
+        idx = np.nonzero(follow)[0]
+        if not len(idx):
+            return
+        target = self.paths[idx, self.path_index[idx]]
+        dx = target[:, 0] - self.x[idx]
+        dy = target[:, 1] - self.y[idx]
+        dist = np.hypot(dx, dy)
+        # Update heading to face movement direction
+        moving = dist > 0
+        self.theta[idx[moving]] = np.degrees(np.arctan2(-dy[moving], dx[moving])) % 360
+        step = self.speed[idx] * dt
+        reached = dist < step
+        # reached waypoint: snap to it and advance or finish
+        r_idx = idx[reached]
+        self.x[r_idx] = target[reached, 0]
+        self.y[r_idx] = target[reached, 1]
+        last = self.path_index[r_idx] == self.path_len[r_idx] - 1
+        fin = r_idx[last]
+        self.theta[fin] = self.final_theta[fin]
+        self.nav_status[fin] = _NAV["SUCCEEDED"]
+        self.path_len[fin] = 0
+        self.path_index[fin] = 0
+        nxt = r_idx[~last]
+        self.path_index[nxt] += 1
+        self.nav_status[nxt] = _NAV["IN_PROGRESS"]
+        # move towards waypoint
+        m = ~reached
+        m_idx = idx[m]
+        self.x[m_idx] += step[m] * dx[m] / dist[m]
+        self.y[m_idx] += step[m] * dy[m] / dist[m]
+        self.nav_status[m_idx] = _NAV["IN_PROGRESS"]
+
+    def _collisions(
+        self,
+        prev_x: np.ndarray,
+        prev_y: np.ndarray,
+        boxes: np.ndarray,
+        costmap: Optional[Costmap],
+        static_grid: Optional[OccupancyGrid] = None,
+    ) -> np.ndarray:
+        """
+        Time of impact (fraction of the step, inf for none) of every robot's
+        move from (prev_x, prev_y) to its current position.
+        """
+        toi = np.full(self.size, np.inf)
+        if not len(boxes) and static_grid is None:
+            self.collision_candidates = 0
+            return toi
+        moved = np.hypot(self.x - prev_x, self.y - prev_y)
+        if costmap is not None:
+            # Any point of a cell is within half a diagonal of its center, so a
+            # robot whose cell clearance exceeds that margin plus the distance
+            # moved cannot have touched anything during the step.
+            grid = costmap.grid
+            cs = grid.cell_size
+            cx = np.floor(self.x / cs).astype(np.int64)
+            cy = np.floor(self.y / cs).astype(np.int64)
+            inside = (cx >= 0) & (cx < grid.cols) & (cy >= 0) & (cy < grid.rows)
+            clearance = np.zeros(self.size)
+            # inf (beyond the computed range) only bounds the clearance below
+            clearance[inside] = np.minimum(
+                costmap.clearance[cy[inside], cx[inside]], costmap.clearance_range
+            )
+            near = ~inside | (clearance - costmap.half_diagonal < self.radius + moved)
+            ids = np.nonzero(near)[0]
+        else:
+            ids = np.arange(self.size)
+        self.collision_candidates = len(ids)
+        if static_grid is not None and len(ids):
+            toi[ids] = static_grid.swept_circles_toi(
+                prev_x[ids], prev_y[ids], self.x[ids], self.y[ids], self.radius
+            )
+        if not len(boxes):
+            return toi
+        chunk = max(1, _COLLISION_CHUNK // len(boxes))
+        for start in range(0, len(ids), chunk):
+            sub = ids[start : start + chunk]
+            # The swept circle lies within radius + moved of the end point, so
+            # only boxes closer than that to it need the exact sweep.
+            px = np.clip(self.x[sub, None], boxes[None, :, 0], boxes[None, :, 2])
+            py = np.clip(self.y[sub, None], boxes[None, :, 1], boxes[None, :, 3])
+            d2 = (self.x[sub, None] - px) ** 2 + (self.y[sub, None] - py) ** 2
+            close = d2 < ((self.radius + moved[sub]) ** 2)[:, None]
+            rows = close.any(axis=1)
+            if not rows.any():
+                continue
+            swept = sub[rows]
+            toi[swept] = np.minimum(
+                toi[swept],
+                swept_circle_toi(
+                    prev_x[swept],
+                    prev_y[swept],
+                    self.x[swept],
+                    self.y[swept],
+                    self.radius,
+                    boxes,
+                    close[rows],
+                ),
+            )
+        return toi
+
+    def _keep_robots_apart(self, prev: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Undo the step of every robot that has to wait for another robot, and
+        return the mask of those robots.
+
+        A robot waits when its step would make it overlap another robot more
+        than before, or enter the lane (the stretch of path just ahead) of a
+        navigating robot with a lower id. Of two robots that would overlap,
+        the higher id waits if it moved, otherwise the mover does. Keeping out
+        of the lanes of lower ids lets a robot that crosses another's path
+        wait beside it instead of stopping in the way. Undone robots are back
+        where they were, so at most one round runs per robot.
+        """
+        prev_x, prev_y = prev["x"], prev["y"]
+        moved = (self.x != prev_x) | (self.y != prev_y)
+        held = np.zeros(self.size, dtype=bool)
+        self.yielded = 0
+        if not moved.any():
+            return held
+        diameter = 2.0 * self.radius
+        lane = _LANE_RADII * self.radius
+        # Only robots this close at the start of the step can meet during it
+        step = np.hypot(self.x - prev_x, self.y - prev_y).max()
+        a, b = _near_pairs(prev_x, prev_y, diameter + lane + 2.0 * step)
+        reach2 = diameter**2
+        while True:
+            keep = moved[a]
+            a, b = a[keep], b[keep]
+            if not len(a):
+                break
+            d2 = (self.x[a] - self.x[b]) ** 2 + (self.y[a] - self.y[b]) ** 2
+            before = (prev_x[a] - prev_x[b]) ** 2 + (prev_y[a] - prev_y[b]) ** 2
+            # touching is allowed, and so is easing an existing overlap
+            bump = (d2 < reach2) & (d2 < before)
+            ba, bb = a[bump], b[bump]
+            waits = [np.where(moved[bb] & (bb > ba), bb, ba)]
+            owner = (
+                (b < a)
+                & ~self._acting[b]
+                & (self.path_len[b] > 0)
+                & (self.nav_status[b] != _NAV["SUCCEEDED"])
+            )
+            if owner.any():
+                la, lb = a[owner], b[owner]
+                # lanes run towards the current waypoint, `lane` px at most
+                ax, ay = self.x[lb], self.y[lb]
+                target = self.paths[lb, self.path_index[lb]]
+                dx, dy = target[:, 0] - ax, target[:, 1] - ay
+                scale = np.minimum(1.0, lane / np.maximum(np.hypot(dx, dy), 1e-9))
+                args = (ax, ay, ax + dx * scale, ay + dy * scale)
+                after = _segment_dist2(self.x[la], self.y[la], *args)
+                before = _segment_dist2(prev_x[la], prev_y[la], *args)
+                waits.append(la[(after < reach2) & (before >= reach2)])
+            waits = np.unique(np.concatenate(waits))
+            if not len(waits):
+                break
+            for name, value in prev.items():
+                getattr(self, name)[waits] = value[waits]
+            held[waits] = True
+            moved[waits] = False
+        self.yielded = int(held.sum())
+        return held
+
+
+def _near_pairs(x: np.ndarray, y: np.ndarray, reach: float):
+    """
+    Index arrays (a, b), a != b, of every ordered pair of points closer than
+    `reach`, found by bucketing the points into reach-sized grid cells.
+    """
+    cx = np.floor(x / reach).astype(np.int64)
+    cy = np.floor(y / reach).astype(np.int64)
+    cx -= cx.min() - 1
+    cy -= cy.min() - 1
+    stride = int(cy.max()) + 2
+    key = cx * stride + cy
+    order = np.argsort(key, kind="stable")
+    sorted_key = key[order]
+    pairs_a, pairs_b = [], []
+    for ox in (-1, 0, 1):
+        for oy in (-1, 0, 1):
+            nk = (cx + ox) * stride + (cy + oy)
+            lo = np.searchsorted(sorted_key, nk, "left")
+            counts = np.searchsorted(sorted_key, nk, "right") - lo
+            total = int(counts.sum())
+            if not total:
+                continue
+            a = np.repeat(np.arange(len(x)), counts)
+            # position of each pair within its run of the sorted order
+            offset = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            b = order[np.repeat(lo, counts) + offset]
+            close = (a != b) & ((x[a] - x[b]) ** 2 + (y[a] - y[b]) ** 2 < reach**2)
+            pairs_a.append(a[close])
+            pairs_b.append(b[close])
+    if not pairs_a:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    return np.concatenate(pairs_a), np.concatenate(pairs_b)
+
+
+def _segment_dist2(px, py, ax, ay, bx, by) -> np.ndarray:
+    # squared distance from points (px, py) to segments (ax, ay)-(bx, by)
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = np.clip(
+        ((px - ax) * dx + (py - ay) * dy) / np.where(length2 > 0, length2, 1.0), 0, 1
+    )
+    return (ax + t * dx - px) ** 2 + (ay + t * dy - py) ** 2
+
+
+def _slot_property(name: str, cast=float):
+    def getter(self):
+        return cast(getattr(self.fleet, name)[self.i])
+
+    def setter(self, value):
+        getattr(self.fleet, name)[self.i] = value
+
+    return property(getter, setter)
+
+
+class FleetRobot:
+    """
+    Robot-compatible view of one fleet slot (reads and writes the arrays).
+    """
+
+    def __init__(self, fleet: Fleet, i: int):
+        self.fleet = fleet
+        self.i = i
+
+    x = _slot_property("x")
+    y = _slot_property("y")
+    theta = _slot_property("theta")
+    speed = _slot_property("speed")
+    final_theta = _slot_property("final_theta")
+    path_index = _slot_property("path_index", int)
+    action_time_left = _slot_property("action_time_left")
+
+    @property
+    def radius(self) -> float:
+        return self.fleet.radius
+
+    @property
+    def nav_status(self) -> str:
+        return NAV_STATUSES[self.fleet.nav_status[self.i]]
+
+    @nav_status.setter
+    def nav_status(self, status: str):
+        self.fleet.nav_status[self.i] = _NAV[status]
+
+    @property
+    def action_status(self) -> str:
+        return ACTION_STATUSES[self.fleet.action_status[self.i]]
+
+    @property
+    def current_action(self) -> Optional[str]:
+        return ACTIONS[self.fleet.action[self.i]]
+
+    @property
+    def path(self) -> List[Tuple[float, float]]:
+        n = self.fleet.path_len[self.i]
+        return [tuple(p) for p in self.fleet.paths[self.i, :n].tolist()]
+
+    @path.setter
+    def path(self, path: List[Tuple[float, float]]):
+        self.fleet.set_path(self.i, path)
+
+    def set_nav_goal(self, x: float, y: float, theta: Optional[float]):
+        # no heading given: keep the current final heading
+        if theta is not None:
+            self.final_theta = theta
+        self.nav_status = "PLANNING"
+
+    def start_action(self, action: str, params: Dict[str, Any]):
+        self.fleet.start_action(self.i, action, params)
+
+
+def spawn_positions(
+    costmap: Costmap, n: int, first: Tuple[float, float], seed: int = 0
+) -> np.ndarray:
+    """
+    Robot 0 at `first`, the others on distinct random non-lethal cell centers.
+    """
+    rng = np.random.default_rng(seed)
+    free = np.argwhere(~costmap.lethal)  # (row, col) pairs
+    if len(free) < n - 1:
+        raise ValueError(f"Map has only {len(free)} free cells for {n} robots")
+    picks = free[rng.choice(len(free), size=n - 1, replace=False)]
+    cs = costmap.grid.cell_size
+    positions = np.empty((n, 2))
+    positions[0] = first
+    positions[1:, 0] = (picks[:, 1] + 0.5) * cs
+    positions[1:, 1] = (picks[:, 0] + 0.5) * cs
+    return positions
@@ -0,0 +1,157 @@
+# filepath: src/Simulator/label_index.py
+"""
+Offline similarity index over memory labels.
+
+Labels are embedded as hashed character-trigram vectors (L2-normalized), so
+"books" lands close to "book" and "coffee mug" to "mug", and a query is one
+NumPy matrix-vector product followed by a top-k selection. A small synonym
+table covers words that share no spelling ("mug" -> "cup"). The index grows
+incrementally: only labels not seen before are embedded.
+"""
+
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .memory_store import normalize_label
+
+# Groups of interchangeable object names (normalized, singular)
+SYNONYMS: List[Tuple[str, ...]] = [
+    ("cup", "mug", "coffee cup", "coffee mug", "teacup", "tea cup"),
+    ("book", "novel", "textbook", "paperback"),
+    ("bottle", "water bottle", "flask"),
+    ("phone", "cellphone", "cell phone", "mobile phone", "smartphone"),
+    ("laptop", "notebook computer", "computer"),
+    ("sofa", "couch", "settee"),
+    ("television", "tv", "telly"),
+    ("remote", "remote control", "controller"),
+    ("trash can", "bin", "garbage can", "wastebasket", "dustbin"),
+    ("bag", "backpack", "rucksack"),
+    ("glasses", "spectacles", "eyeglasses"),
+    ("key", "keys", "keychain"),
+    ("plant", "houseplant", "potted plant"),
+    ("table", "desk"),
+]
+
+# Score multiplier for a match found through a synonym instead of spelling
+SYNONYM_WEIGHT = 0.9
+
+
+def singular(label: str) -> str:
+    """
+    Crude English singular of the last word ("boxes" -> "box").
+    """
+    if label.endswith("ies") and len(label) > 4:
+        return label[:-3] + "y"
+    if re.search(r"(s|x|z|ch|sh)es$", label):
+        return label[:-2]
+    if label.endswith("s") and not label.endswith(("ss", "us", "is")):
+        return label[:-1]
+    return label
+
+
+class LabelIndex:
+    def __init__(self, dim: int = 256, ngram: int = 3):
+        self.dim = dim
+        self.ngram = ngram
+        self._labels: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.zeros((64, dim), dtype=np.float32)
+        self._synonyms: Dict[str, Tuple[str, ...]] = {
+            word: group for group in SYNONYMS for word in group
+        }
+        self._version: Optional[int] = None
+        # the agent searches while the simulation thread may be adding
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def embed(self, label: str) -> np.ndarray:
+        """
+        Unit vector of the hashed character n-grams of " label ".
+        """
+        text = f" {label} "
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for i in range(max(1, len(text) - self.ngram + 1)):
+            gram = text[i : i + self.ngram].encode()
+            vec[zlib.crc32(gram) % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def add(self, labels) -> int:
+        """
+        Embed labels not indexed yet. Returns how many were added.
+        """
+        with self._lock:
+            return self._add(labels)
+
+    def _add(self, labels) -> int:
+        # caller holds self._lock
+        added = 0
+        for label in labels:
+            label = normalize_label(label)
+            if not label or label in self._rows:
+                continue
+            n = len(self._labels)
+            if n == len(self._vectors):
+                grown = np.zeros((2 * n, self.dim), dtype=np.float32)
+                grown[:n] = self._vectors
+                self._vectors = grown
+            self._vectors[n] = self.embed(singular(label))
+            self._rows[label] = n
+            self._labels.append(label)
+            added += 1
+        return added
+
+    def sync(self, store) -> int:
+        """
+        Add the labels of a memory store that changed since the last sync.
+        Safe to call from any thread: concurrent syncs run one at a time.
+        """
+        with self._lock:
+            version = store.version
+            if version == self._version:
+                return 0
+            # labels read after the version cover at least that version
+            added = self._add(store.labels())
+            self._version = version
+            return added
+
+    def search(
+        self, query: str, k: int = 5, min_score: float = 0.65
+    ) -> List[Tuple[str, float]]:
+        """
+        Up to `k` indexed labels most similar to `query` as (label, score),
+        best first, with scores in [0, 1] of at least `min_score`.
+
+        The score is the cosine similarity of the n-gram vectors, taken
+        against the query and (times SYNONYM_WEIGHT) against its synonyms.
+        """
+        query = singular(normalize_label(query))
+        if not query:
+            return []
+        variants = [(query, 1.0)] + [
+            (word, SYNONYM_WEIGHT)
+            for word in self._synonyms.get(query, ())
+            if word != query
+        ]
+        queries = np.stack([self.embed(singular(word)) for word, _ in variants])
+        weights = np.array([w for _, w in variants], dtype=np.float32)
+        with self._lock:
+            n = len(self._labels)
+            if n == 0:
+                return []
+            scores = (self._vectors[:n] @ queries.T * weights).max(axis=1)
+            labels = self._labels
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (labels[i], min(float(scores[i]), 1.0))
+            for i in top.tolist()
+            if scores[i] >= min_score
+        ]
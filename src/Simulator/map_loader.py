@@ -0,0 +1,47 @@
+# filepath: src/Simulator/map_loader.py
+"""
+Load occupancy maps (floor plans) from images or NumPy arrays.
+
+Every map pixel / array element becomes one grid cell of `cell_size` world
+pixels, so a 1000x800 image with cell_size 20 describes a 20000x16000 world.
+"""
+
+import os
+
+import numpy as np
+import pygame
+
+from .occupancy import OccupancyGrid
+
+
+def load_occupancy_grid(
+    path: str, cell_size: int = 20, occupied_thresh: float = 0.65
+) -> OccupancyGrid:
+    """
+    Read an occupancy grid from a PNG (or any pygame-readable image) or .npy.
+
+    Images follow the ROS map_server convention: a pixel is occupied when
+    its darkness (255 - gray) / 255 exceeds `occupied_thresh`. Arrays are
+    (rows, cols): bool arrays are used as-is, float arrays are occupancy
+    probabilities compared against `occupied_thresh`, and any other dtype
+    counts nonzero as occupied. .npy files are memory-mapped, so a bool
+    array is used without being read into memory up front.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npy":
+        data = np.load(path, mmap_mode="r")
+        if data.ndim != 2:
+            raise ValueError(f"Occupancy array must be 2D, got shape {data.shape}")
+        if data.dtype == np.bool_:
+            cells = data
+        elif np.issubdtype(data.dtype, np.floating):
+            cells = data >= occupied_thresh
+        else:
+            cells = data != 0
+    else:
+        image = pygame.image.load(path)
+        # surfarray is indexed [x, y]; grids are [row, col]
+        rgb = pygame.surfarray.array3d(image).transpose(1, 0, 2)
+        gray = rgb.mean(axis=2)
+        cells = (255.0 - gray) / 255.0 > occupied_thresh
+    return OccupancyGrid(cells, cell_size)
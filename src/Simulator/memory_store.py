@@ -0,0 +1,1073 @@
+# filepath: src/Simulator/memory_store.py
+"""
+Indexed store of mapped memory entries.
+
+Entries are the dicts the mapper produces (entry_id, entry_type, label,
+map_coordinates, ...). Besides the entries by id the store keeps three
+indexes, updated incrementally on every upsert:
+
+- entity-type partitions: entry_type -> ids
+- a label inverted index: normalized label -> ids
+- a uniform spatial grid over map_coordinates: (col, row) -> ids
+
+so a lookup touches only the matching ids, whatever the memory size.
+Pose-aware queries (nearest-k, within a radius, within a named region) are
+built on the label and grid indexes.
+
+Readers query immutable, versioned snapshots. Every write publishes a new
+snapshot that shares all unchanged structure with the previous one, so
+handing out a snapshot copies nothing, readers never wait for the mapper,
+and a reader keeps a consistent view for as long as it holds one.
+"""
+
+import heapq
+import json
+import math
+import pathlib
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def normalize_label(label: Any) -> str:
+    """
+    Canonical form of a label for matching: case-folded, trimmed, with runs
+    of whitespace, underscores and hyphens collapsed to one space.
+    """
+    return re.sub(r"[\s_-]+", " ", str(label)).strip().casefold()
+
+
+def entry_distance(entry: dict, x: float, y: float) -> float:
+    coords = entry.get("map_coordinates") or {}
+    return math.hypot(coords.get("x", 0.0) - x, coords.get("y", 0.0) - y)
+
+
+class SpatialQueries:
+    """
+    Pose-aware queries for the memory stores, in terms of their query(),
+    query_rect() and extent(). Results are (distance, entry) pairs, nearest
+    first.
+    """
+
+    def within_radius(
+        self,
+        x: float,
+        y: float,
+        radius: float,
+        entity_type: Optional[str] = None,
+        label: Optional[str] = None,
+    ) -> List[Tuple[float, dict]]:
+        """
+        Entries within `radius` of (x, y).
+        """
+        if label:
+            # the label index is usually the more selective one
+            candidates = self.query(entity_type, label)
+        else:
+            candidates = self.query_rect(
+                x - radius, y - radius, x + radius, y + radius, entity_type
+            )
+        found = [(entry_distance(e, x, y), e) for e in candidates]
+        found = [(d, e) for d, e in found if d <= radius]
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def nearest(
+        self,
+        x: float,
+        y: float,
+        k: int = 1,
+        entity_type: Optional[str] = None,
+        label: Optional[str] = None,
+        max_distance: Optional[float] = None,
+    ) -> List[Tuple[float, dict]]:
+        """
+        The `k` entries closest to (x, y), optionally no farther than
+        `max_distance`.
+        """
+        limit = math.inf if max_distance is None else max_distance
+        if label:
+            return self.within_radius(x, y, limit, entity_type, label)[:k]
+        extent = self.extent()
+        if extent is None:
+            return []
+        left, top, right, bottom = extent
+        # no entry is farther than the extent's farthest corner
+        reach = math.hypot(max(x - left, right - x), max(y - top, bottom - y))
+        limit = min(limit, reach)
+        # grow a circle until it holds k entries: they are then the k nearest
+        radius = self.cell_size
+        while True:
+            radius = min(radius, limit)
+            found = self.within_radius(x, y, radius, entity_type)
+            if len(found) >= k or radius >= limit:
+                return found[:k]
+            radius *= 2
+
+    def within_region(
+        self, region: str, entity_type: Optional[str] = None
+    ) -> Optional[List[dict]]:
+        """
+        Entries inside the bounds of the named region (a "region" entry), or
+        None if no such region is stored. Regions themselves are excluded.
+        """
+        regions = [e for e in self.query("region", region) if "bounds" in e]
+        if not regions:
+            return None
+        b = regions[0]["bounds"]
+        return [
+            e
+            for e in self.query_rect(
+                b["left"], b["top"], b["right"], b["bottom"], entity_type
+            )
+            if e.get("entry_type") != "region"
+        ]
+
+
+class PersistentMap:
+    """
+    Immutable mapping split into hash buckets.
+
+    update() returns a new map that copies the bucket table and only the
+    buckets it changes; every other bucket is shared with the old map.
+    Iteration order is arbitrary.
+    """
+
+    __slots__ = ("_buckets", "_len")
+
+    BUCKETS = 64
+    _EMPTY_BUCKET: Dict[Any, Any] = {}
+
+    def __init__(self, buckets: Optional[tuple] = None, length: int = 0):
+        self._buckets = buckets or (self._EMPTY_BUCKET,) * self.BUCKETS
+        self._len = length
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, key) -> bool:
+        return key in self._buckets[hash(key) % self.BUCKETS]
+
+    def __iter__(self) -> Iterator:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def get(self, key, default=None):
+        return self._buckets[hash(key) % self.BUCKETS].get(key, default)
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        for bucket in self._buckets:
+            yield from bucket.items()
+
+    def update(self, changes: Iterable[Tuple[Any, Any]]) -> "PersistentMap":
+        """
+        New map with (key, value) changes applied; DELETE as value removes.
+        """
+        buckets = list(self._buckets)
+        length = self._len
+        copied = set()
+        for key, value in changes:
+            b = hash(key) % self.BUCKETS
+            if b not in copied:
+                buckets[b] = dict(buckets[b])
+                copied.add(b)
+            bucket = buckets[b]
+            if value is DELETE:
+                if key in bucket:
+                    del bucket[key]
+                    length -= 1
+            else:
+                if key not in bucket:
+                    length += 1
+                bucket[key] = value
+        return PersistentMap(tuple(buckets), length)
+
+
+# Value marking a key to remove in PersistentMap.update()
+DELETE = object()
+EMPTY_MAP = PersistentMap()
+
+
+def _frozen_copy(entry: dict) -> dict:
+    # stored entries are never mutated; copy nested containers too, so the
+    # caller's dict can change without changing published snapshots
+    return {
+        key: dict(value)
+        if isinstance(value, dict)
+        else list(value)
+        if isinstance(value, list)
+        else value
+        for key, value in entry.items()
+    }
+
+
+class MemorySnapshot(SpatialQueries):
+    """
+    Memory at one version: entries and indexes, never modified.
+
+    Entries are id -> (seq, entry), seq being the insertion order; the type
+    and label indexes map their key to a PersistentMap of id -> seq and the
+    grid cells to small id -> seq dicts. Returned entry dicts are shared
+    with the store and must be treated as read-only.
+    """
+
+    def __init__(
+        self,
+        version: int,
+        cell_size: float,
+        entries: PersistentMap,
+        by_type: PersistentMap,
+        by_label: PersistentMap,
+        by_cell: PersistentMap,
+    ):
+        self.version = version
+        self.cell_size = cell_size
+        self._entries = entries
+        self._by_type = by_type
+        self._by_label = by_label
+        self._by_cell = by_cell
+        self._extent: Any = DELETE  # computed on first use
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._entries
+
+    def get(self, entry_id: str) -> Optional[dict]:
+        pair = self._entries.get(entry_id)
+        return pair[1] if pair is not None else None
+
+    def _ordered(self, ids: Iterable[Tuple[str, int]], limit: Optional[int]):
+        # (id, seq) pairs -> entries in insertion order
+        if limit is None:
+            pairs = sorted(ids, key=itemgetter(1))
+        else:
+            pairs = heapq.nsmallest(limit, ids, key=itemgetter(1))
+        return [self._entries.get(i)[1] for i, _ in pairs]
+
+    def query(
+        self,
+        entity_type: Optional[str] = None,
+        label: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Entries of `entity_type` (any type if None) whose label matches
+        `label` after normalization (any label if None), in insertion order,
+        at most `limit` of them.
+        """
+        if label:
+            ids = self._by_label.get(normalize_label(label), EMPTY_MAP).items()
+            if entity_type is not None:
+                partition = self._by_type.get(entity_type, EMPTY_MAP)
+                ids = [(i, seq) for i, seq in ids if i in partition]
+        elif entity_type is not None:
+            ids = self._by_type.get(entity_type, EMPTY_MAP).items()
+        else:
+            ids = ((i, pair[0]) for i, pair in self._entries.items())
+        return self._ordered(ids, limit)
+
+    def query_rect(
+        self,
+        left: float,
+        top: float,
+        right: float,
+        bottom: float,
+        entity_type: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Entries whose map_coordinates lie inside the box (edges included).
+        """
+        s = self.cell_size
+        partition = (
+            self._by_type.get(entity_type, EMPTY_MAP)
+            if entity_type is not None
+            else None
+        )
+        found = []
+        for cx in range(math.floor(left / s), math.floor(right / s) + 1):
+            for cy in range(math.floor(top / s), math.floor(bottom / s) + 1):
+                for entry_id in self._by_cell.get((cx, cy), ()):
+                    if partition is not None and entry_id not in partition:
+                        continue
+                    entry = self._entries.get(entry_id)[1]
+                    coords = entry["map_coordinates"]
+                    if left <= coords["x"] <= right and top <= coords["y"] <= bottom:
+                        found.append(entry)
+        return found
+
+    def labels(self, entity_type: Optional[str] = None) -> List[str]:
+        """
+        Distinct normalized labels (of `entity_type` entries if given).
+        """
+        if entity_type is None:
+            return list(self._by_label)
+        partition = self._by_type.get(entity_type, EMPTY_MAP)
+        return [
+            label
+            for label, ids in self._by_label.items()
+            if any(i in partition for i in ids)
+        ]
+
+    def extent(self) -> Optional[Tuple[float, float, float, float]]:
+        """
+        (left, top, right, bottom) bounds of the occupied grid cells.
+        """
+        if self._extent is DELETE:
+            extent = None
+            if len(self._by_cell):
+                s = self.cell_size
+                cols = [c for c, _ in self._by_cell]
+                rows = [r for _, r in self._by_cell]
+                extent = (
+                    min(cols) * s,
+                    min(rows) * s,
+                    (max(cols) + 1) * s,
+                    (max(rows) + 1) * s,
+                )
+            self._extent = extent
+        return self._extent
+
+    def positions(
+        self, entity_type: Optional[str] = None
+    ) -> Dict[str, Tuple[float, float]]:
+        """
+        entry_id -> (x, y) of the entries of `entity_type` (any type if None)
+        that have map_coordinates, in insertion order.
+        """
+        found = {}
+        for entry in self.query(entity_type):
+            coords = entry.get("map_coordinates") or {}
+            if coords.get("x") is not None and coords.get("y") is not None:
+                found[entry["entry_id"]] = (coords["x"], coords["y"])
+        return found
+
+    def to_memory_data(self) -> Dict[str, Dict[str, dict]]:
+        """
+        All entries in the nested memory_data layout: {"<type>_instances":
+        {entry_id: entry}}, e.g. "object_instances" for objects.
+        """
+        return {
+            f"{entry_type}_instances": {
+                entry["entry_id"]: entry for entry in self._ordered(ids.items(), None)
+            }
+            for entry_type, ids in self._by_type.items()
+        }
+
+    def release(self):
+        """
+        Done with the snapshot (nothing to free: it is garbage collected).
+        """
+
+    def __enter__(self) -> "MemorySnapshot":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class MemoryStore:
+    """
+    In-memory store publishing a new MemorySnapshot on every change.
+
+    Writes are serialized by a lock; reads go to the current snapshot and
+    never take it. Multi-step readers should take snapshot() once and query
+    that, so all their lookups see the same version.
+    """
+
+    def __init__(self, cell_size: float = 100.0):
+        self.cell_size = cell_size
+        self._snapshot = MemorySnapshot(
+            0, cell_size, EMPTY_MAP, EMPTY_MAP, EMPTY_MAP, EMPTY_MAP
+        )
+        self._seq = 0
+        self._write_lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def snapshot(self) -> MemorySnapshot:
+        """
+        The current snapshot (not a copy: snapshots are immutable). Like
+        SqliteMemoryStore.snapshot(), release() it or use it as a context
+        manager.
+        """
+        return self._snapshot
+
+    def _index_keys(self, entry: dict):
+        # (index, key) pairs under which an entry is indexed
+        yield "type", entry.get("entry_type", "")
+        if entry.get("label"):
+            yield "label", normalize_label(entry["label"])
+        coords = entry.get("map_coordinates") or {}
+        if "x" in coords and "y" in coords:
+            yield (
+                "cell",
+                (
+                    math.floor(coords["x"] / self.cell_size),
+                    math.floor(coords["y"] / self.cell_size),
+                ),
+            )
+
+    def _apply(self, entries: Iterable[dict], removals: Iterable[str] = ()) -> int:
+        """
+        Publish a snapshot with `entries` upserted and `removals` removed.
+        Returns the number of entries changed.
+        """
+        with self._write_lock:
+            old = self._snapshot
+            # entry_id -> (seq, entry) or DELETE, and per index key the
+            # id -> seq / DELETE changes
+            changed: Dict[str, Any] = {}
+            index_changes: Dict[str, Dict[Any, Dict[str, Any]]] = {
+                "type": {},
+                "label": {},
+                "cell": {},
+            }
+
+            def current(entry_id):
+                if entry_id in changed:
+                    pair = changed[entry_id]
+                    return None if pair is DELETE else pair
+                return old._entries.get(entry_id)
+
+            def reindex(entry, value):
+                for index, key in self._index_keys(entry):
+                    index_changes[index].setdefault(key, {})[entry["entry_id"]] = value
+
+            count = 0
+            for entry_id in removals:
+                pair = current(entry_id)
+                if pair is not None:
+                    reindex(pair[1], DELETE)
+                    changed[entry_id] = DELETE
+                    count += 1
+            for entry in entries:
+                entry = _frozen_copy(entry)
+                pair = current(entry["entry_id"])
+                if pair is not None:
+                    reindex(pair[1], DELETE)
+                    seq = pair[0]  # keeps its place in insertion order
+                else:
+                    self._seq += 1
+                    seq = self._seq
+                changed[entry["entry_id"]] = (seq, entry)
+                reindex(entry, seq)
+                count += 1
+            if not count:
+                return 0
+
+            def nested(outer: PersistentMap, changes) -> PersistentMap:
+                updates = []
+                for key, ids in changes.items():
+                    inner = outer.get(key, EMPTY_MAP).update(ids.items())
+                    updates.append((key, inner if len(inner) else DELETE))
+                return outer.update(updates)
+
+            cells = []
+            for cell, ids in index_changes["cell"].items():
+                members = dict(old._by_cell.get(cell, {}))
+                for entry_id, seq in ids.items():
+                    if seq is DELETE:
+                        members.pop(entry_id, None)
+                    else:
+                        members[entry_id] = seq
+                cells.append((cell, members or DELETE))
+            # a single reference assignment publishes the new version
+            self._snapshot = MemorySnapshot(
+                old.version + 1,
+                self.cell_size,
+                old._entries.update(changed.items()),
+                nested(old._by_type, index_changes["type"]),
+                nested(old._by_label, index_changes["label"]),
+                old._by_cell.update(cells),
+            )
+            return count
+
+    def upsert(self, entry: dict):
+        """
+        Insert an entry, or replace the entry with the same entry_id.
+        """
+        self._apply((entry,))
+
+    def upsert_many(self, entries: Iterable[dict]) -> int:
+        """
+        Insert or replace several entries as one version. Returns the count.
+        """
+        return self._apply(entries)
+
+    def remove(self, entry_id: str) -> bool:
+        return bool(self._apply((), (entry_id,)))
+
+    # Reads, each against the snapshot current when called
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._snapshot
+
+    def get(self, entry_id: str) -> Optional[dict]:
+        return self._snapshot.get(entry_id)
+
+    def query(self, *args, **kwargs) -> List[dict]:
+        return self._snapshot.query(*args, **kwargs)
+
+    def query_rect(self, *args, **kwargs) -> List[dict]:
+        return self._snapshot.query_rect(*args, **kwargs)
+
+    def labels(self, entity_type: Optional[str] = None) -> List[str]:
+        return self._snapshot.labels(entity_type)
+
+    def extent(self) -> Optional[Tuple[float, float, float, float]]:
+        return self._snapshot.extent()
+
+    def within_radius(self, *args, **kwargs) -> List[Tuple[float, dict]]:
+        return self._snapshot.within_radius(*args, **kwargs)
+
+    def nearest(self, *args, **kwargs) -> List[Tuple[float, dict]]:
+        return self._snapshot.nearest(*args, **kwargs)
+
+    def within_region(self, *args, **kwargs) -> Optional[List[dict]]:
+        return self._snapshot.within_region(*args, **kwargs)
+
+    def positions(
+        self, entity_type: Optional[str] = None
+    ) -> Dict[str, Tuple[float, float]]:
+        return self._snapshot.positions(entity_type)
+
+    def to_memory_data(self) -> Dict[str, Dict[str, dict]]:
+        return self._snapshot.to_memory_data()
+
+    def close(self):
+        pass
+
+
+class _DecodeCache:
+    """
+    Bounded LRU cache of entry dicts decoded from a memory database, shared
+    by the store and its snapshots. Entries are keyed by entry_id with the
+    version that wrote the row, and only the newest version is kept.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[int, dict]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, entry_id: str, version: int) -> Optional[dict]:
+        with self._lock:
+            hit = self._entries.get(entry_id)
+            if hit is None or hit[0] != version:
+                return None
+            self._entries.move_to_end(entry_id)
+            return hit[1]
+
+    def put(self, entry_id: str, version: int, entry: dict):
+        with self._lock:
+            hit = self._entries.get(entry_id)
+            if hit is not None and hit[0] > version:
+                return
+            self._entries[entry_id] = (version, entry)
+            self._entries.move_to_end(entry_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, entry_id: str):
+        with self._lock:
+            self._entries.pop(entry_id, None)
+
+
+class _SqliteReader(SpatialQueries):
+    """
+    Queries over the entries table of a memory database, decoding entries
+    through a _DecodeCache.
+    """
+
+    _conn: sqlite3.Connection
+    _lock: threading.Lock
+    _cache: _DecodeCache
+    cell_size: float
+    version: int
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __contains__(self, entry_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM entries WHERE entry_id = ?", (entry_id,)
+            ).fetchone()
+        return row is not None
+
+    def get(self, entry_id: str) -> Optional[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry_id, version FROM entries WHERE entry_id = ?",
+                (entry_id,),
+            ).fetchall()
+            found = self._load(rows)
+        return found[0] if found else None
+
+    def _load(self, rows: List[Tuple[str, int]]) -> List[dict]:
+        """
+        Entries for (entry_id, version) rows in order, decoding the ones not
+        cached at that version.
+        """
+        entries: Dict[str, dict] = {}
+        missing = []
+        for entry_id, version in rows:
+            entry = self._cache.get(entry_id, version)
+            if entry is None:
+                missing.append(entry_id)
+            else:
+                entries[entry_id] = entry
+        # stay under SQLite's bound-parameter limit
+        for k in range(0, len(missing), 500):
+            chunk = missing[k : k + 500]
+            found = self._conn.execute(
+                "SELECT entry_id, version, data FROM entries WHERE entry_id IN (%s)"
+                % ",".join("?" * len(chunk)),
+                chunk,
+            )
+            for entry_id, version, data in found:
+                entries[entry_id] = entry = json.loads(data)
+                self._cache.put(entry_id, version, entry)
+        return [entries[i] for i, _ in rows if i in entries]
+
+    def query(
+        self,
+        entity_type: Optional[str] = None,
+        label: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Entries of `entity_type` (any type if None) whose label matches
+        `label` after normalization (any label if None), in insertion order,
+        at most `limit` of them.
+        """
+        where, params = [], []
+        if label:
+            where.append("label = ?")
+            params.append(normalize_label(label))
+        if entity_type is not None:
+            where.append("entry_type = ?")
+            params.append(entity_type)
+        sql = "SELECT entry_id, version FROM entries"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY rowid"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return self._load(self._conn.execute(sql, params).fetchall())
+
+    def query_rect(
+        self,
+        left: float,
+        top: float,
+        right: float,
+        bottom: float,
+        entity_type: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Entries whose map_coordinates lie inside the box (edges included).
+        """
+        s = self.cell_size
+        sql = (
+            "SELECT entry_id, version FROM entries INDEXED BY entries_cell "
+            "WHERE cx BETWEEN ? AND ? "
+            "AND cy BETWEEN ? AND ? AND x BETWEEN ? AND ? AND y BETWEEN ? AND ?"
+        )
+        params = [
+            math.floor(left / s),
+            math.floor(right / s),
+            math.floor(top / s),
+            math.floor(bottom / s),
+            left,
+            right,
+            top,
+            bottom,
+        ]
+        if entity_type is not None:
+            sql += " AND entry_type = ?"
+            params.append(entity_type)
+        with self._lock:
+            return self._load(self._conn.execute(sql, params).fetchall())
+
+    def labels(self, entity_type: Optional[str] = None) -> List[str]:
+        """
+        Distinct normalized labels (of `entity_type` entries if given).
+        """
+        sql = "SELECT DISTINCT label FROM entries WHERE label IS NOT NULL"
+        params = []
+        if entity_type is not None:
+            sql += " AND entry_type = ?"
+            params.append(entity_type)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
+
+    def extent(self) -> Optional[Tuple[float, float, float, float]]:
+        """
+        (left, top, right, bottom) bounds of the entry coordinates.
+        """
+        with self._lock:
+            if self._extent[0] != self.version:
+                row = self._conn.execute(
+                    "SELECT MIN(x), MIN(y), MAX(x), MAX(y) FROM entries"
+                ).fetchone()
+                self._extent = (self.version, None if row[0] is None else row)
+            return self._extent[1]
+
+    def positions(
+        self, entity_type: Optional[str] = None
+    ) -> Dict[str, Tuple[float, float]]:
+        """
+        entry_id -> (x, y) of the entries of `entity_type` (any type if None)
+        that have map_coordinates, in insertion order. Read from the indexed
+        columns: no entry is decoded.
+        """
+        sql = "SELECT entry_id, x, y FROM entries WHERE x IS NOT NULL AND y IS NOT NULL"
+        params = []
+        if entity_type is not None:
+            sql += " AND entry_type = ?"
+            params.append(entity_type)
+        sql += " ORDER BY rowid"
+        with self._lock:
+            return {i: (x, y) for i, x, y in self._conn.execute(sql, params)}
+
+    def to_memory_data(self) -> Dict[str, Dict[str, dict]]:
+        """
+        All entries in the nested memory_data layout (pages in every entry).
+        """
+        data: Dict[str, Dict[str, dict]] = {}
+        for entry in self.query():
+            key = f"{entry.get('entry_type', '')}_instances"
+            data.setdefault(key, {})[entry["entry_id"]] = entry
+        return data
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _ReaderPool:
+    """
+    Idle read-only connections to a memory database. Snapshots take one to
+    hold their read transaction and hand it back when they close, so a new
+    version does not open a new connection; at most `size` are kept idle.
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        self._uri = pathlib.Path(path).resolve().as_uri() + "?mode=ro"
+        self.size = size
+        self._lock = threading.Lock()
+        self._idle: List[sqlite3.Connection] = []
+        self.opened = 0
+        self.closed = False
+
+    def take(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            self.opened += 1
+        return sqlite3.connect(
+            self._uri, uri=True, check_same_thread=False, isolation_level=None
+        )
+
+    def put(self, conn: sqlite3.Connection):
+        with self._lock:
+            keep = not self.closed and len(self._idle) < self.size
+            if keep:
+                self._idle.append(conn)
+        if not keep:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class SqliteSnapshot(_SqliteReader):
+    """
+    Read-only view of a memory database at one version.
+
+    Holds a read transaction on a connection from the store's reader pool:
+    in WAL mode that pins the database as of the snapshot while the store
+    keeps writing, without copying anything and without blocking the
+    writer. A pinned reader also keeps the WAL from being checkpointed, so
+    the transaction ends (and the connection goes back to the pool) as soon
+    as the store has moved to a newer version and every reader has released
+    the snapshot.
+    """
+
+    def __init__(self, readers: _ReaderPool, cell_size: float, cache: _DecodeCache):
+        self._readers = readers
+        self._conn = readers.take()
+        self._lock = threading.Lock()
+        self._cache = cache
+        self.cell_size = cell_size
+        self._conn.execute("BEGIN")
+        # the first read fixes the transaction's view of the database
+        self.version = int(
+            self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'version'"
+            ).fetchone()[0]
+        )
+        self._extent: Tuple[Optional[int], Any] = (None, None)
+        # readers holding the snapshot; the lease lock is never held during
+        # a query, so retiring a snapshot never waits for one
+        self._lease_lock = threading.Lock()
+        self._leases = 0
+        self._retired = False
+        self.closed = False
+
+    def acquire(self) -> bool:
+        """
+        Take a lease; False if the snapshot is already closed.
+        """
+        with self._lease_lock:
+            if self.closed:
+                return False
+            self._leases += 1
+            return True
+
+    def release(self):
+        """
+        Return a lease taken by acquire() (or SqliteMemoryStore.snapshot()).
+        """
+        with self._lease_lock:
+            self._leases -= 1
+            done = self._retired and self._leases <= 0 and not self.closed
+            self.closed = self.closed or done
+        if done:
+            self.close()
+
+    def retire(self):
+        """
+        Mark the snapshot superseded: it closes once no reader holds it.
+        """
+        with self._lease_lock:
+            self._retired = True
+            done = self._leases <= 0 and not self.closed
+            self.closed = self.closed or done
+        if done:
+            self.close()
+
+    def __enter__(self) -> "SqliteSnapshot":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def close(self):
+        with self._lease_lock:
+            self.closed = True
+        with self._lock:
+            conn, self._conn = self._conn, None
+        if conn is not None:
+            # ending the read transaction unpins the version
+            conn.rollback()
+            self._readers.put(conn)
+
+
+class SqliteMemoryStore(_SqliteReader):
+    """
+    MemoryStore persisted to an SQLite database file.
+
+    Every upsert_many() is one write-ahead-logged transaction, so mapped
+    entries survive restarts. The indexes (entity type, normalized label,
+    grid cell) are B-tree indexes in the database itself: opening the store
+    reads nothing, queries go through the indexes, and entry dicts are
+    decoded from the database on first use and kept in a bounded LRU cache
+    of `cache_size` entries. Snapshots are read transactions pinned at a
+    version (SqliteSnapshot); up to `readers` idle reader connections are
+    kept for the snapshots of later versions.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        cell_size: float = 100.0,
+        cache_size: int = 10_000,
+        readers: int = 4,
+    ):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+                CREATE TABLE IF NOT EXISTS entries (
+                    entry_id TEXT UNIQUE NOT NULL,
+                    entry_type TEXT NOT NULL,
+                    label TEXT,
+                    x REAL,
+                    y REAL,
+                    cx INTEGER,
+                    cy INTEGER,
+                    data TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS entries_label
+                    ON entries (label, entry_type);
+                CREATE INDEX IF NOT EXISTS entries_type ON entries (entry_type);
+                CREATE INDEX IF NOT EXISTS entries_cell ON entries (cx, cy);
+                """
+            )
+            columns = [
+                row[1] for row in self._conn.execute("PRAGMA table_info(entries)")
+            ]
+            if "version" not in columns:
+                # databases written before entries were versioned
+                self._conn.execute(
+                    "ALTER TABLE entries ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+                )
+            # the grid cell size is part of the on-disk index
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('cell_size', ?)", (cell_size,)
+            )
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('version', 0)")
+            meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+        self.cell_size = float(meta["cell_size"])
+        # Bumped on every change and persisted with it
+        self.version = int(meta["version"])
+        self._cache = _DecodeCache(cache_size)
+        self._extent: Tuple[Optional[int], Any] = (None, None)
+        # snapshot of the current version, shared by its readers
+        self._snapshot: Optional[SqliteSnapshot] = None
+        self._snapshot_lock = threading.Lock()
+        self._readers = _ReaderPool(path, readers)
+
+    def snapshot(self) -> SqliteSnapshot:
+        """
+        A snapshot at the current version, shared by readers until the next
+        change. The caller holds a lease on it: release() it when done, or
+        use it as a context manager.
+        """
+        while True:
+            with self._snapshot_lock:
+                snapshot = self._snapshot
+            if snapshot is None or snapshot.version != self.version:
+                # open the read transaction holding neither lock, so writers
+                # and other readers never wait on it; WAL mode keeps it
+                # consistent however the writer interleaves
+                fresh = SqliteSnapshot(self._readers, self.cell_size, self._cache)
+                with self._snapshot_lock:
+                    current = self._snapshot
+                    if current is None or current.version < fresh.version:
+                        stale, self._snapshot = current, fresh
+                        snapshot = fresh
+                    else:
+                        # another reader installed this version first
+                        stale, snapshot = fresh, current
+                if stale is not None:
+                    stale.retire()
+            if snapshot.acquire():
+                return snapshot
+
+    def _retire_snapshot(self):
+        # the shared snapshot is out of date after a change; it closes once
+        # its last reader releases it
+        with self._snapshot_lock:
+            stale = self._snapshot
+            if stale is None or stale.version == self.version:
+                return
+            self._snapshot = None
+        stale.retire()
+
+    def upsert(self, entry: dict):
+        """
+        Insert an entry, or replace the entry with the same entry_id.
+        """
+        self.upsert_many((entry,))
+
+    def upsert_many(self, entries: Iterable[dict]) -> int:
+        """
+        Insert or replace several entries in one transaction. Returns the count.
+        """
+        entries = [_frozen_copy(entry) for entry in entries]
+        if not entries:
+            return 0
+        with self._lock, self._conn:
+            version = self.version + 1
+            rows = []
+            for entry in entries:
+                coords = entry.get("map_coordinates") or {}
+                x, y = coords.get("x"), coords.get("y")
+                has_xy = x is not None and y is not None
+                rows.append(
+                    (
+                        entry["entry_id"],
+                        entry.get("entry_type", ""),
+                        normalize_label(entry["label"]) if entry.get("label") else None,
+                        x,
+                        y,
+                        math.floor(x / self.cell_size) if has_xy else None,
+                        math.floor(y / self.cell_size) if has_xy else None,
+                        json.dumps(entry),
+                        version,
+                    )
+                )
+            # replacing keeps the rowid, i.e. the entry's insertion order
+            self._conn.executemany(
+                """
+                INSERT INTO entries
+                    (entry_id, entry_type, label, x, y, cx, cy, data, version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (entry_id) DO UPDATE SET
+                    entry_type = excluded.entry_type, label = excluded.label,
+                    x = excluded.x, y = excluded.y, cx = excluded.cx,
+                    cy = excluded.cy, data = excluded.data,
+                    version = excluded.version
+                """,
+                rows,
+            )
+            self._set_version(version)
+            for entry in entries:
+                self._cache.put(entry["entry_id"], version, entry)
+        self._retire_snapshot()
+        return len(rows)
+
+    def remove(self, entry_id: str) -> bool:
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM entries WHERE entry_id = ?", (entry_id,)
+            ).rowcount
+            if removed:
+                self._set_version(self.version + 1)
+                self._cache.discard(entry_id)
+        if removed:
+            self._retire_snapshot()
+        return bool(removed)
+
+    def _set_version(self, version: int):
+        self._conn.execute(
+            "UPDATE meta SET value = ? WHERE key = 'version'", (version,)
+        )
+        self.version = version
+
+    def close(self):
+        with self._snapshot_lock:
+            snapshot, self._snapshot = self._snapshot, None
+        if snapshot is not None:
+            snapshot.retire()
+        # snapshots still leased close their connections on release
+        self._readers.close()
+        super().close()
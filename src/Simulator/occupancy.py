@@ -0,0 +1,265 @@
+# filepath: src/Simulator/occupancy.py
+"""
+Occupancy grid and inflated costmap shared by the path planners.
+
+The grid is rasterized once from the environment obstacles with vectorized
+NumPy operations and reused until the obstacles change; the costmap derived
+from it is likewise computed once per map version.
+"""
+
+import math
+import numpy as np
+import pygame
+from typing import List, Optional, Tuple
+
+from .collision import swept_circle_toi
+
+
+def rects_to_array(rects: List[pygame.Rect]) -> np.ndarray:
+    """
+    Convert rects to an (N, 4) int array of (left, top, right, bottom).
+    Rects with a negative size are normalized, as colliderect does.
+    """
+    if not rects:
+        return np.zeros((0, 4), dtype=np.int64)
+    boxes = np.array(
+        [(r.left, r.top, r.right, r.bottom) for r in rects], dtype=np.int64
+    )
+    return np.concatenate(
+        [
+            np.minimum(boxes[:, :2], boxes[:, 2:]),
+            np.maximum(boxes[:, :2], boxes[:, 2:]),
+        ],
+        axis=1,
+    )
+
+
+class OccupancyGrid:
+    """
+    Boolean occupancy grid indexed as cells[row, col] (i.e. [cy, cx]).
+
+    A cell is occupied when any obstacle rect overlaps it, matching the
+    semantics of pygame.Rect.colliderect used by the original planner.
+    """
+
+    def __init__(self, cells: np.ndarray, cell_size: int, version: int = 0):
+        self.cells = cells
+        self.cell_size = cell_size
+        self.rows, self.cols = cells.shape
+        self.version = version
+
+    @classmethod
+    def from_rects(
+        cls,
+        rects: List[pygame.Rect],
+        width: int,
+        height: int,
+        cell_size: int = 20,
+        version: int = 0,
+    ) -> "OccupancyGrid":
+        cols = width // cell_size
+        rows = height // cell_size
+        # 2D difference array: +1 at each obstacle's top-left cell, -1 past its
+        # bottom-right, then two cumulative sums give per-cell coverage counts.
+        diff = np.zeros((rows + 1, cols + 1), dtype=np.int32)
+        boxes = rects_to_array(rects)
+        # pygame treats zero-sized rects as non-colliding
+        boxes = boxes[(boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])]
+        if len(boxes):
+            c0 = np.clip(boxes[:, 0] // cell_size, 0, cols)
+            r0 = np.clip(boxes[:, 1] // cell_size, 0, rows)
+            c1 = np.clip(-(-boxes[:, 2] // cell_size), 0, cols)  # ceil division
+            r1 = np.clip(-(-boxes[:, 3] // cell_size), 0, rows)
+            keep = (c1 > c0) & (r1 > r0)
+            c0, r0, c1, r1 = c0[keep], r0[keep], c1[keep], r1[keep]
+            np.add.at(diff, (r0, c0), 1)
+            np.add.at(diff, (r0, c1), -1)
+            np.add.at(diff, (r1, c0), -1)
+            np.add.at(diff, (r1, c1), 1)
+        coverage = diff.cumsum(axis=0).cumsum(axis=1)[:rows, :cols]
+        return cls(coverage > 0, cell_size, version)
+
+    def to_cell(self, p: Tuple[float, float]) -> Tuple[int, int]:
+        # convert point to (cx, cy), clamped to the grid
+        cx, cy = int(p[0]) // self.cell_size, int(p[1]) // self.cell_size
+        return max(0, min(cx, self.cols - 1)), max(0, min(cy, self.rows - 1))
+
+    def to_point(self, c: Tuple[int, int]) -> Tuple[float, float]:
+        # convert cell to its center point
+        return (c[0] + 0.5) * self.cell_size, (c[1] + 0.5) * self.cell_size
+
+    def in_bounds(self, c: Tuple[int, int]) -> bool:
+        return 0 <= c[0] < self.cols and 0 <= c[1] < self.rows
+
+    def is_occupied(self, c: Tuple[int, int]) -> bool:
+        return bool(self.cells[c[1], c[0]])
+
+    def circles_hit(self, xs, ys, radius: float) -> np.ndarray:
+        """
+        For circles of `radius` at (xs, ys), whether each overlaps an occupied
+        cell (same closest-point test as circle_rect_collision; cells outside
+        the grid count as free).
+        """
+        xs = np.atleast_1d(np.asarray(xs, dtype=np.float64))
+        ys = np.atleast_1d(np.asarray(ys, dtype=np.float64))
+        cs = self.cell_size
+        m = int(math.ceil(radius / cs))
+        offsets = np.arange(-m, m + 1)
+        cols = (
+            np.floor(xs / cs).astype(np.int64)[:, None, None] + offsets[None, None, :]
+        )
+        rows = (
+            np.floor(ys / cs).astype(np.int64)[:, None, None] + offsets[None, :, None]
+        )
+        inside = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+        occupied = (
+            inside
+            & self.cells[
+                np.clip(rows, 0, self.rows - 1), np.clip(cols, 0, self.cols - 1)
+            ]
+        )
+        # closest point of every candidate cell box to the circle center
+        px = np.clip(xs[:, None, None], cols * cs, (cols + 1) * cs)
+        py = np.clip(ys[:, None, None], rows * cs, (rows + 1) * cs)
+        d2 = (xs[:, None, None] - px) ** 2 + (ys[:, None, None] - py) ** 2
+        return (occupied & (d2 < radius * radius)).any(axis=(1, 2))
+
+    def swept_circles_toi(self, x0, y0, x1, y1, radius: float) -> np.ndarray:
+        """
+        For circles of `radius` swept from (x0, y0) to (x1, y1), the fraction
+        of the step at which each first touches an occupied cell (inf if
+        none; see swept_circle_toi).
+        """
+        x0 = np.atleast_1d(np.asarray(x0, dtype=np.float64))
+        y0 = np.atleast_1d(np.asarray(y0, dtype=np.float64))
+        x1 = np.atleast_1d(np.asarray(x1, dtype=np.float64))
+        y1 = np.atleast_1d(np.asarray(y1, dtype=np.float64))
+        cs = self.cell_size
+        # window of cells around each segment midpoint covering its sweep
+        mx = int(math.ceil((np.abs(x1 - x0).max() / 2 + radius) / cs))
+        my = int(math.ceil((np.abs(y1 - y0).max() / 2 + radius) / cs))
+        cols = (
+            np.floor((x0 + x1) / 2 / cs).astype(np.int64)[:, None, None]
+            + np.arange(-mx, mx + 1)[None, None, :]
+        )
+        rows = (
+            np.floor((y0 + y1) / 2 / cs).astype(np.int64)[:, None, None]
+            + np.arange(-my, my + 1)[None, :, None]
+        )
+        cols, rows = np.broadcast_arrays(cols, rows)
+        inside = (cols >= 0) & (cols < self.cols) & (rows >= 0) & (rows < self.rows)
+        occupied = (
+            inside
+            & self.cells[
+                np.clip(rows, 0, self.rows - 1), np.clip(cols, 0, self.cols - 1)
+            ]
+        )
+        n = len(x0)
+        boxes = np.stack(
+            (cols * cs, rows * cs, (cols + 1) * cs, (rows + 1) * cs), axis=-1
+        ).reshape(n, -1, 4)
+        return swept_circle_toi(x0, y0, x1, y1, radius, boxes, occupied.reshape(n, -1))
+
+
+class Costmap:
+    """
+    Inflated costmap layer built from an OccupancyGrid for a circular robot.
+
+    `clearance` holds the distance (px) from each cell center to the nearest
+    occupied cell, truncated beyond the inflation range. Cells whose center is
+    within the robot radius of an obstacle are lethal; cells inside the
+    inflation radius carry a traversal penalty that decays with clearance.
+    """
+
+    def __init__(
+        self,
+        grid: OccupancyGrid,
+        robot_radius: float,
+        inflation_radius: Optional[float] = None,
+        cost_weight: float = 4.0,
+        clearance: Optional[np.ndarray] = None,
+    ):
+        self.grid = grid
+        self.version = grid.version
+        self.robot_radius = float(robot_radius)
+        self.inflation_radius = float(
+            inflation_radius if inflation_radius is not None else 4 * robot_radius
+        )
+        self.cost_weight = cost_weight
+        cs = grid.cell_size
+        # Any point of a cell lies within half a diagonal of its center
+        self.half_diagonal = cs * math.sqrt(2) / 2
+        max_range = max(self.inflation_radius, self.robot_radius + self.half_diagonal)
+        # clearance is exact up to this distance and inf beyond it
+        self.clearance_range = max_range + cs
+        # A precomputed clearance layer (e.g. attached from shared memory) skips
+        # the distance transform; the other layers are cheap to derive from it.
+        if clearance is None:
+            clearance = self._distance_transform(grid.cells, cs, self.clearance_range)
+        self.clearance = clearance
+        self.lethal = grid.cells | (self.clearance <= self.robot_radius)
+        # Straight-line segments may cross any point of a cell, so line-of-sight
+        # checks need the stricter "whole cell is collision free" mask.
+        self.los_free = self.clearance - self.half_diagonal >= self.robot_radius
+        span = max(self.inflation_radius - self.robot_radius, 1e-6)
+        falloff = np.clip((self.inflation_radius - self.clearance) / span, 0.0, 1.0)
+        self.cost = 1.0 + self.cost_weight * falloff**2
+        # Flat Python lists for the planners' inner loops (index = cy * cols + cx)
+        self.lethal_flat: List[bool] = self.lethal.ravel().tolist()
+        self.cost_flat: List[float] = self.cost.ravel().tolist()
+        self.los_flat: List[bool] = self.los_free.ravel().tolist()
+
+    @staticmethod
+    def _distance_transform(
+        cells: np.ndarray, cell_size: int, max_range: float
+    ) -> np.ndarray:
+        """
+        Truncated distance from each cell center to the nearest occupied cell.
+
+        Each cell offset within `max_range` is applied as one shifted-array
+        minimum, so the cost is O(cells * kernel) in vectorized NumPy.
+        """
+        rows, cols = cells.shape
+        dist = np.full((rows, cols), np.inf)
+        reach = int(math.ceil(max_range / cell_size)) + 1
+        padded = np.zeros((rows + 2 * reach, cols + 2 * reach), dtype=bool)
+        padded[reach : reach + rows, reach : reach + cols] = cells
+        offsets = []
+        for dy in range(-reach, reach + 1):
+            for dx in range(-reach, reach + 1):
+                # center-to-box distance for an occupied cell at this offset
+                d = cell_size * math.hypot(
+                    max(abs(dx) - 0.5, 0.0), max(abs(dy) - 0.5, 0.0)
+                )
+                if d < max_range:
+                    offsets.append((d, dx, dy))
+        offsets.sort()
+        for d, dx, dy in offsets:
+            shifted = padded[
+                reach + dy : reach + dy + rows, reach + dx : reach + dx + cols
+            ]
+            np.minimum(dist, np.where(shifted, d, np.inf), out=dist)
+        return dist
+
+    def is_lethal(self, c: Tuple[int, int]) -> bool:
+        return bool(self.lethal[c[1], c[0]])
+
+    def nearest_free(
+        self, c: Tuple[int, int], max_cells: Optional[int] = None
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Return the closest non-lethal cell to `c` (itself if free), or None.
+        """
+        if not self.is_lethal(c):
+            return c
+        if max_cells is None:
+            max_cells = int(math.ceil(self.inflation_radius / self.grid.cell_size)) + 1
+        x0, x1 = max(0, c[0] - max_cells), min(self.grid.cols, c[0] + max_cells + 1)
+        y0, y1 = max(0, c[1] - max_cells), min(self.grid.rows, c[1] + max_cells + 1)
+        window = ~self.lethal[y0:y1, x0:x1]
+        if not window.any():
+            return None
+        ys, xs = np.nonzero(window)
+        d2 = (xs + x0 - c[0]) ** 2 + (ys + y0 - c[1]) ** 2
+        i = int(np.argmin(d2))
+        return int(xs[i] + x0), int(ys[i] + y0)
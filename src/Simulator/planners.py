@@ -0,0 +1,901 @@
+# filepath: src/Simulator/planners.py
+"""
+Grid path planners operating on the cached, inflated Costmap.
+
+All planners share the same interface: `plan(costmap, start_cell, goal_cell)`
+returns a PlanResult carrying the waypoint cells and the number of nodes the
+search expanded, so planners can be compared on a given map.
+"""
+
+import heapq
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .occupancy import Costmap
+
+Cell = Tuple[int, int]
+
+SQRT2 = math.sqrt(2)
+
+# 8-connected moves as (dx, dy, step length)
+_MOVES = [
+    (1, 0, 1.0),
+    (-1, 0, 1.0),
+    (0, 1, 1.0),
+    (0, -1, 1.0),
+    (1, 1, SQRT2),
+    (1, -1, SQRT2),
+    (-1, 1, SQRT2),
+    (-1, -1, SQRT2),
+]
+
+
+def octile(a: Cell, b: Cell) -> float:
+    """
+    Octile distance: exact shortest 8-connected length on an open grid.
+    """
+    dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return (dx + dy) + (SQRT2 - 2) * min(dx, dy)
+
+
+def euclidean(a: Cell, b: Cell) -> float:
+    """
+    Straight-line distance: a lower bound on any-angle path length.
+    """
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def line_cells(a: Cell, b: Cell) -> Iterator[Cell]:
+    """
+    Yield every cell touched by the segment between the centers of a and b.
+
+    Where the segment passes exactly through a cell corner both side cells are
+    yielded as well (supercover), so diagonal squeezes are never missed.
+    """
+    x, y = a
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    nx, ny = abs(dx), abs(dy)
+    sx = 1 if dx > 0 else -1
+    sy = 1 if dy > 0 else -1
+    ix = iy = 0
+    yield x, y
+    while ix < nx or iy < ny:
+        d = (1 + 2 * ix) * ny - (1 + 2 * iy) * nx
+        if d == 0:
+            yield x + sx, y
+            yield x, y + sy
+            x += sx
+            y += sy
+            ix += 1
+            iy += 1
+        elif d < 0:
+            x += sx
+            ix += 1
+        else:
+            y += sy
+            iy += 1
+        yield x, y
+
+
+def line_cost(costmap: Costmap, a: Cell, b: Cell) -> Optional[float]:
+    """
+    Traversal cost of the straight segment a -> b, or None without line of sight.
+
+    Intermediate cells must be collision free over their whole area
+    (Costmap.los_free); the endpoints only need to be non-lethal.
+    """
+    cols = costmap.grid.cols
+    rows = costmap.grid.rows
+    los_free = costmap.los_flat
+    cost = costmap.cost_flat
+    total = 0.0
+    n = 0
+    for c in line_cells(a, b):
+        if not (0 <= c[0] < cols and 0 <= c[1] < rows):
+            return None
+        idx = c[1] * cols + c[0]
+        if c != a and c != b and not los_free[idx]:
+            return None
+        total += cost[idx]
+        n += 1
+    return math.hypot(b[0] - a[0], b[1] - a[1]) * total / n
+
+
+def prune_collinear(cells: List[Cell]) -> List[Cell]:
+    """
+    Drop waypoints that lie on a straight run between their neighbors.
+    """
+    if len(cells) < 3:
+        return list(cells)
+    pruned = [cells[0]]
+    for prev, cur, nxt in zip(cells, cells[1:], cells[2:]):
+        # cross product of the two step directions is zero on a straight run
+        d1 = (cur[0] - prev[0], cur[1] - prev[1])
+        d2 = (nxt[0] - cur[0], nxt[1] - cur[1])
+        if d1[0] * d2[1] - d1[1] * d2[0] != 0 or d1[0] * d2[0] + d1[1] * d2[1] < 0:
+            pruned.append(cur)
+    pruned.append(cells[-1])
+    return pruned
+
+
+def smooth_path(costmap: Costmap, cells: List[Cell]) -> List[Cell]:
+    """
+    Collapse a waypoint list by removing collinear and line-of-sight-redundant
+    waypoints against the inflated costmap.
+
+    From each kept waypoint the path is extended to the furthest following
+    waypoint that is still directly visible, so the robot drives straight
+    segments instead of stopping and re-aiming at every cell.
+    """
+    cells = prune_collinear(cells)
+    if len(cells) < 3:
+        return cells
+    smoothed = [cells[0]]
+    anchor = 0
+    while anchor < len(cells) - 1:
+        nxt = anchor + 1
+        while nxt + 1 < len(cells) and (
+            line_cost(costmap, cells[anchor], cells[nxt + 1]) is not None
+        ):
+            nxt += 1
+        smoothed.append(cells[nxt])
+        anchor = nxt
+    return smoothed
+
+
+class PlanResult:
+    """
+    Outcome of a single planner run.
+    """
+
+    def __init__(
+        self,
+        planner: str,
+        cells: List[Cell],
+        expanded: int,
+        cost: float = math.inf,
+        elapsed: float = 0.0,
+    ):
+        self.planner = planner
+        self.cells = cells
+        self.expanded = expanded
+        self.cost = cost
+        self.elapsed = elapsed  # wall-clock seconds spent searching
+        self.path: List[Tuple[float, float]] = []
+        # waypoints as produced by the search, before smooth_path()
+        self.raw_cells: List[Cell] = cells
+        self.cached = False  # served from a PlanCache instead of searched
+
+    def copy(self, reverse: bool = False) -> "PlanResult":
+        order = -1 if reverse else 1
+        result = PlanResult(self.planner, self.cells[::order], self.expanded, self.cost)
+        result.raw_cells = self.raw_cells[::order]
+        result.path = self.path[::order]
+        return result
+
+    @property
+    def found(self) -> bool:
+        return bool(self.cells)
+
+    @property
+    def raw_waypoints(self) -> int:
+        return len(self.raw_cells)
+
+    @property
+    def waypoints(self) -> int:
+        return len(self.cells)
+
+    def __repr__(self) -> str:
+        return (
+            f"PlanResult(planner={self.planner!r}, waypoints={self.waypoints}, "
+            f"raw_waypoints={self.raw_waypoints}, expanded={self.expanded}, "
+            f"cost={self.cost:.1f}, elapsed={self.elapsed * 1000:.2f}ms)"
+        )
+
+
+def _reconstruct(came_from: Dict[int, int], goal: int, cols: int) -> List[Cell]:
+    cells = []
+    node = goal
+    while node != -1:
+        cells.append((node % cols, node // cols))
+        node = came_from[node]
+    cells.reverse()
+    return cells
+
+
+class Planner:
+    """
+    Base class for grid planners. Subclasses implement `_search`.
+    """
+
+    name = "base"
+
+    def plan(self, costmap: Costmap, start: Cell, goal: Cell) -> PlanResult:
+        t0 = time.perf_counter()
+        cells, expanded, cost = self._search(costmap, start, goal)
+        result = PlanResult(self.name, cells, expanded, cost, time.perf_counter() - t0)
+        result.path = [costmap.grid.to_point(c) for c in cells]
+        return result
+
+    def _search(
+        self, costmap: Costmap, start: Cell, goal: Cell
+    ) -> Tuple[List[Cell], int, float]:
+        raise NotImplementedError
+
+    @staticmethod
+    def _neighbors(costmap: Costmap, idx: int) -> Iterator[Tuple[int, float]]:
+        """
+        Yield (neighbor index, step length) for free 8-connected neighbors.
+
+        Diagonal moves are only allowed when both adjacent orthogonal cells are
+        free, so paths never cut obstacle corners.
+        """
+        cols, rows = costmap.grid.cols, costmap.grid.rows
+        lethal = costmap.lethal_flat
+        x, y = idx % cols, idx // cols
+        for dx, dy, step in _MOVES:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < cols and 0 <= ny < rows):
+                continue
+            if lethal[ny * cols + nx]:
+                continue
+            if dx and dy and (lethal[y * cols + nx] or lethal[ny * cols + x]):
+                continue
+            yield ny * cols + nx, step
+
+
+class AStarPlanner(Planner):
+    """
+    8-connected A* with an octile heuristic over the costmap's cell costs.
+
+    Edge cost is the step length times the mean cost of the two cells, which
+    keeps costs symmetric so a path is equally optimal in both directions.
+    """
+
+    name = "astar"
+
+    def _search(self, costmap, start, goal):
+        cols = costmap.grid.cols
+        cost = costmap.cost_flat
+        s = start[1] * cols + start[0]
+        g_idx = goal[1] * cols + goal[0]
+        gx, gy = goal
+        g_score = {s: 0.0}
+        came_from: Dict[int, int] = {}
+        open_set = [(octile(start, goal), 0.0, s, -1)]
+        expanded = 0
+        while open_set:
+            _, g, current, parent = heapq.heappop(open_set)
+            if current in came_from:
+                continue
+            came_from[current] = parent
+            if current == g_idx:
+                return _reconstruct(came_from, g_idx, cols), expanded, g
+            expanded += 1
+            c_cost = cost[current]
+            for nb, step in self._neighbors(costmap, current):
+                if nb in came_from:
+                    continue
+                new_g = g + step * (c_cost + cost[nb]) * 0.5
+                if new_g < g_score.get(nb, math.inf):
+                    g_score[nb] = new_g
+                    h = octile((nb % cols, nb // cols), (gx, gy))
+                    heapq.heappush(open_set, (new_g + h, new_g, nb, current))
+        return [], expanded, math.inf
+
+
+class JumpPointPlanner(Planner):
+    """
+    Jump Point Search on the lethal mask, treating free cells as uniform cost.
+
+    JPS prunes symmetric paths and only expands jump points, which makes it
+    much faster than A* on open maps. It ignores the inflation penalties (but
+    never enters lethal cells), so paths may run closer to obstacles than A*.
+    Uses the no-corner-cutting move rules of `Planner._neighbors`.
+    """
+
+    name = "jps"
+
+    def _search(self, costmap, start, goal):
+        cols, rows = costmap.grid.cols, costmap.grid.rows
+        lethal = costmap.lethal_flat
+
+        def free(x, y):
+            return 0 <= x < cols and 0 <= y < rows and not lethal[y * cols + x]
+
+        def jump_straight(x, y, dx, dy):
+            # Walk horizontally or vertically until blocked, goal, or forced neighbor
+            while True:
+                if not free(x, y):
+                    return None
+                if (x, y) == goal:
+                    return x, y
+                if dx:
+                    if (free(x, y - 1) and not free(x - dx, y - 1)) or (
+                        free(x, y + 1) and not free(x - dx, y + 1)
+                    ):
+                        return x, y
+                else:
+                    if (free(x - 1, y) and not free(x - 1, y - dy)) or (
+                        free(x + 1, y) and not free(x + 1, y - dy)
+                    ):
+                        return x, y
+                x += dx
+                y += dy
+
+        def jump(x, y, dx, dy):
+            if not (dx and dy):
+                return jump_straight(x, y, dx, dy)
+            while True:
+                if not free(x, y):
+                    return None
+                if (x, y) == goal:
+                    return x, y
+                # a diagonal step is a jump point if a straight branch finds one
+                if jump_straight(x + dx, y, dx, 0) or jump_straight(x, y + dy, 0, dy):
+                    return x, y
+                if not (free(x + dx, y) and free(x, y + dy)):
+                    return None
+                x += dx
+                y += dy
+
+        def successors_dirs(x, y, px, py):
+            if px is None:
+                return [(dx, dy) for dx, dy, _ in _MOVES]
+            dx = (x > px) - (x < px)
+            dy = (y > py) - (y < py)
+            dirs = []
+            if dx and dy:
+                if free(x, y + dy):
+                    dirs.append((0, dy))
+                if free(x + dx, y):
+                    dirs.append((dx, 0))
+                if free(x, y + dy) and free(x + dx, y):
+                    dirs.append((dx, dy))
+            elif dx:
+                nxt, up, down = free(x + dx, y), free(x, y + 1), free(x, y - 1)
+                if nxt:
+                    dirs.append((dx, 0))
+                    if up:
+                        dirs.append((dx, 1))
+                    if down:
+                        dirs.append((dx, -1))
+                if up:
+                    dirs.append((0, 1))
+                if down:
+                    dirs.append((0, -1))
+            else:
+                nxt, right, left = free(x, y + dy), free(x + 1, y), free(x - 1, y)
+                if nxt:
+                    dirs.append((0, dy))
+                    if right:
+                        dirs.append((1, dy))
+                    if left:
+                        dirs.append((-1, dy))
+                if right:
+                    dirs.append((1, 0))
+                if left:
+                    dirs.append((-1, 0))
+            return dirs
+
+        g_score = {start: 0.0}
+        came_from: Dict[Cell, Optional[Cell]] = {}
+        open_set = [(octile(start, goal), 0.0, start, None)]
+        expanded = 0
+        while open_set:
+            _, g, current, parent = heapq.heappop(open_set)
+            if current in came_from:
+                continue
+            came_from[current] = parent
+            if current == goal:
+                cells = []
+                node = goal
+                while node is not None:
+                    cells.append(node)
+                    node = came_from[node]
+                cells.reverse()
+                return cells, expanded, g
+            expanded += 1
+            x, y = current
+            px, py = parent if parent is not None else (None, None)
+            for dx, dy in successors_dirs(x, y, px, py):
+                # diagonal successors still need both orthogonal cells free
+                if dx and dy and not (free(x + dx, y) and free(x, y + dy)):
+                    continue
+                jp = jump(x + dx, y + dy, dx, dy)
+                if jp is None or jp in came_from:
+                    continue
+                new_g = g + octile(current, jp)
+                if new_g < g_score.get(jp, math.inf):
+                    g_score[jp] = new_g
+                    heapq.heappush(
+                        open_set, (new_g + octile(jp, goal), new_g, jp, current)
+                    )
+        return [], expanded, math.inf
+
+
+class ThetaStarPlanner(Planner):
+    """
+    Any-angle Theta*: like A*, but a node may take its grandparent as parent
+    when the two have line of sight, producing straight segments between
+    arbitrary cells instead of 45-degree staircases. Any-angle paths can be
+    shorter than octile distance, so the heuristic is Euclidean.
+    """
+
+    name = "theta"
+
+    def _search(self, costmap, start, goal):
+        cols = costmap.grid.cols
+        cost = costmap.cost_flat
+        s = start[1] * cols + start[0]
+        g_idx = goal[1] * cols + goal[0]
+        g_score = {s: 0.0}
+        parent_of = {s: s}
+        closed = set()
+        open_set = [(euclidean(start, goal), s)]
+        expanded = 0
+
+        def cell(i):
+            return i % cols, i // cols
+
+        while open_set:
+            _, current = heapq.heappop(open_set)
+            if current in closed:
+                continue
+            closed.add(current)
+            if current == g_idx:
+                cells = [cell(current)]
+                while parent_of[current] != current:
+                    current = parent_of[current]
+                    cells.append(cell(current))
+                cells.reverse()
+                return cells, expanded, g_score[g_idx]
+            expanded += 1
+            p = parent_of[current]
+            c_cost = cost[current]
+            for nb, step in self._neighbors(costmap, current):
+                if nb in closed:
+                    continue
+                # Path 2: straight from the parent if it can see the neighbor
+                shortcut = (
+                    line_cost(costmap, cell(p), cell(nb)) if p != current else None
+                )
+                if shortcut is not None:
+                    new_g, new_parent = g_score[p] + shortcut, p
+                else:
+                    new_g = g_score[current] + step * (c_cost + cost[nb]) * 0.5
+                    new_parent = current
+                if new_g < g_score.get(nb, math.inf):
+                    g_score[nb] = new_g
+                    parent_of[nb] = new_parent
+                    heapq.heappush(open_set, (new_g + euclidean(cell(nb), goal), nb))
+        return [], expanded, math.inf
+
+
+PLANNERS: Dict[str, Planner] = {
+    p.name: p for p in (AStarPlanner(), JumpPointPlanner(), ThetaStarPlanner())
+}
+
+
+class DStarLite:
+    """
+    Incremental planner (D* Lite, Koenig & Likhachev) for one goal.
+
+    The search runs backwards from the goal, so g/rhs values stay valid as
+    the robot moves; when the costmap changes only the vertices whose edge
+    costs changed, and those depending on them, are re-expanded. Uses the
+    same 8-connected edges and costs as AStarPlanner.
+    """
+
+    name = "dstar"
+
+    def __init__(self, costmap: Costmap, start: Cell, goal: Cell):
+        self.costmap = costmap
+        self.cols = costmap.grid.cols
+        self.rows = costmap.grid.rows
+        self.start = start
+        self.goal = goal
+        self._goal_idx = goal[1] * self.cols + goal[0]
+        self._km = 0.0
+        self._g: Dict[int, float] = {}
+        self._rhs: Dict[int, float] = {self._goal_idx: 0.0}
+        self._open: List[Tuple[Tuple[float, float], int]] = []
+        self._open_keys: Dict[int, Tuple[float, float]] = {}
+        self._push(self._goal_idx)
+        # nodes expanded by the last compute (initial search or repair)
+        self.expanded = 0
+        self.total_expanded = 0
+        self.repairs = 0
+        self._compute()
+
+    def _h(self, idx: int) -> float:
+        return octile((idx % self.cols, idx // self.cols), self.start)
+
+    def _key(self, idx: int) -> Tuple[float, float]:
+        m = min(self._g.get(idx, math.inf), self._rhs.get(idx, math.inf))
+        # the first component sums the same costs in different orders
+        # depending on the path taken; rounding keeps equal keys tied (in the
+        # heap and in the termination test) instead of off by the last bit
+        return round(m + self._h(idx) + self._km, 9), m
+
+    def _push(self, idx: int):
+        key = self._key(idx)
+        self._open_keys[idx] = key
+        heapq.heappush(self._open, (key, idx))
+
+    def _top(self) -> Tuple[Tuple[float, float], int]:
+        # drop entries superseded by a later push or removal
+        while self._open:
+            key, idx = self._open[0]
+            if self._open_keys.get(idx) == key:
+                return key, idx
+            heapq.heappop(self._open)
+        return (math.inf, math.inf), -1
+
+    def _succ(self, idx: int) -> Iterator[Tuple[int, float]]:
+        cost = self.costmap.cost_flat
+        for nb, step in Planner._neighbors(self.costmap, idx):
+            yield nb, step * (cost[idx] + cost[nb]) * 0.5
+
+    def _pred(self, idx: int) -> Iterator[Tuple[int, float]]:
+        # (cell, step length) of cells that can move into idx: none if it is
+        # lethal, otherwise its neighbors subject to the same corner-cutting
+        # rule (symmetric)
+        lethal = self.costmap.lethal_flat
+        if lethal[idx]:
+            return
+        cols, rows = self.cols, self.rows
+        x, y = idx % cols, idx // cols
+        for dx, dy, step in _MOVES:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < cols and 0 <= ny < rows):
+                continue
+            if dx and dy and (lethal[y * cols + nx] or lethal[ny * cols + x]):
+                continue
+            yield ny * cols + nx, step
+
+    def _update_vertex(self, idx: int):
+        if idx != self._goal_idx:
+            g = self._g
+            self._rhs[idx] = min(
+                (c + g.get(nb, math.inf) for nb, c in self._succ(idx)),
+                default=math.inf,
+            )
+        self._requeue(idx)
+
+    def _requeue(self, idx: int):
+        # on the open list exactly while inconsistent
+        self._open_keys.pop(idx, None)
+        if self._g.get(idx, math.inf) != self._rhs.get(idx, math.inf):
+            self._push(idx)
+
+    def _compute(self):
+        s = self.start[1] * self.cols + self.start[0]
+        g, rhs = self._g, self._rhs
+        expanded = 0
+        while True:
+            k_old, u = self._top()
+            if u < 0:
+                break
+            if not (k_old < self._key(s) or rhs.get(s, math.inf) != g.get(s, math.inf)):
+                break
+            k_new = self._key(u)
+            if k_old < k_new:
+                self._push(u)
+                continue
+            heapq.heappop(self._open)
+            del self._open_keys[u]
+            expanded += 1
+            if g.get(u, math.inf) > rhs.get(u, math.inf):
+                g[u] = rhs[u]
+                # g(u) only decreased: a predecessor's rhs can only drop to
+                # the path through u, no need to rescan its successors
+                cost = self.costmap.cost_flat
+                for p, step in self._pred(u):
+                    if p != self._goal_idx:
+                        through = step * (cost[p] + cost[u]) * 0.5 + g[u]
+                        if through < rhs.get(p, math.inf):
+                            rhs[p] = through
+                    self._requeue(p)
+            else:
+                g[u] = math.inf
+                self._update_vertex(u)
+                for p, _ in self._pred(u):
+                    self._update_vertex(p)
+        self.expanded = expanded
+        self.total_expanded += expanded
+
+    def update(self, costmap: Costmap, start: Cell) -> int:
+        """
+        Repair the plan after the robot moved to `start` and/or the map
+        changed to `costmap`. Returns the number of nodes re-expanded.
+        """
+        self._km += octile(self.start, start)
+        self.start = start
+        old = self.costmap
+        self.costmap = costmap
+        if old is not costmap:
+            # cells whose traversability or cost changed; every edge touching
+            # them (and diagonals cornering them) starts at one of their
+            # 8 neighbors or the cell itself
+            changed = np.nonzero(
+                (old.lethal != costmap.lethal) | (old.cost != costmap.cost)
+            )
+            affected = set()
+            for y, x in zip(*changed):
+                for dy in (-1, 0, 1):
+                    for dx in (-1, 0, 1):
+                        nx, ny = x + dx, y + dy
+                        if 0 <= nx < self.cols and 0 <= ny < self.rows:
+                            affected.add(int(ny * self.cols + nx))
+            for idx in affected:
+                self._update_vertex(idx)
+        self._compute()
+        self.repairs += 1
+        return self.expanded
+
+    def plan(self) -> PlanResult:
+        """
+        Current best path from start to goal as a PlanResult (cells only;
+        smoothing is left to the caller).
+        """
+        t0 = time.perf_counter()
+        cols = self.cols
+        s = self.start[1] * cols + self.start[0]
+        total = self._g.get(s, math.inf)
+        cells: List[Cell] = []
+        if total < math.inf:
+            g = self._g
+            idx = s
+            cells.append(self.start)
+            # follow the cheapest successor; bounded in case of ties/loops
+            for _ in range(self.cols * self.rows):
+                if idx == self._goal_idx:
+                    break
+                idx = min(
+                    self._succ(idx),
+                    key=lambda nc: nc[1] + g.get(nc[0], math.inf),
+                )[0]
+                cells.append((idx % cols, idx // cols))
+            else:
+                cells = []
+        result = PlanResult(
+            self.name, cells, self.expanded, total, time.perf_counter() - t0
+        )
+        result.path = [self.costmap.grid.to_point(c) for c in cells]
+        return result
+
+
+class PlanCache:
+    """
+    Bounded LRU cache of planned paths.
+
+    Entries are keyed on (start cell, goal cell, planner, smoothing, robot
+    radius, map version). When the costmap version changes every entry is
+    dropped, so paths planned on an outdated map are never served. Since edge
+    costs are symmetric, a cached b -> a path also answers an a -> b query.
+
+    The cache is shared with the background planner thread, so every access
+    holds a lock; queries against a map older than the cached one (a plan
+    that started before the map changed) miss and are not stored.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, PlanResult]" = OrderedDict()
+        self._version: Optional[int] = None
+        self.hits = 0
+        self.reverse_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: int) -> bool:
+        # map versions only grow; False for a query against an outdated map
+        if self._version is not None and version < self._version:
+            return False
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+        return True
+
+    @staticmethod
+    def _key(costmap: Costmap, start: Cell, goal: Cell, planner: str, smooth: bool):
+        return (start, goal, planner, smooth, costmap.robot_radius, costmap.version)
+
+    def get(
+        self, costmap: Costmap, start: Cell, goal: Cell, planner: str, smooth: bool
+    ) -> Optional[PlanResult]:
+        with self._lock:
+            entry = None
+            if self._check_version(costmap.version):
+                key = self._key(costmap, start, goal, planner, smooth)
+                entry = self._entries.get(key)
+                reverse = False
+                if entry is None:
+                    key = self._key(costmap, goal, start, planner, smooth)
+                    entry = self._entries.get(key)
+                    reverse = entry is not None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if reverse:
+                self.reverse_hits += 1
+            else:
+                self.hits += 1
+        # nothing was expanded to answer this query
+        result = entry.copy(reverse=reverse)
+        result.expanded = 0
+        result.cached = True
+        return result
+
+    def put(
+        self,
+        costmap: Costmap,
+        start: Cell,
+        goal: Cell,
+        planner: str,
+        smooth: bool,
+        result: PlanResult,
+    ):
+        with self._lock:
+            if not self._check_version(costmap.version):
+                return
+            key = self._key(costmap, start, goal, planner, smooth)
+            self._entries[key] = result.copy()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.reverse_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "reverse_hits": self.reverse_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": (self.hits + self.reverse_hits) / lookups if lookups else 0.0,
+        }
+
+
+def get_planner(planner: Union[str, Planner]) -> Planner:
+    """
+    Resolve a planner name (e.g. "astar", "jps", "theta") or instance.
+    """
+    if isinstance(planner, Planner):
+        return planner
+    try:
+        return PLANNERS[planner]
+    except KeyError:
+        raise ValueError(
+            f"Unknown planner '{planner}', expected one of {sorted(PLANNERS)}"
+        ) from None
+
+
+def plan_path(
+    start: Tuple[float, float],
+    goal: Tuple[float, float],
+    costmap: Costmap,
+    planner: Union[str, Planner] = "astar",
+    smooth: bool = True,
+    cache: Optional[PlanCache] = None,
+) -> PlanResult:
+    """
+    Plan from world point `start` to world point `goal` over the costmap.
+
+    With `smooth`, the search output is post-processed by smooth_path();
+    the unsmoothed waypoints stay available as `PlanResult.raw_cells`.
+    When a `cache` is given, found paths are stored in and served from it.
+    """
+    engine = get_planner(planner)
+    grid = costmap.grid
+    start_cell = grid.to_cell(start)
+    # goals inside the inflation band are moved to the nearest reachable cell
+    goal_cell = costmap.nearest_free(grid.to_cell(goal))
+    if goal_cell is None:
+        return PlanResult(engine.name, [], 0)
+    if cache is not None:
+        hit = cache.get(costmap, start_cell, goal_cell, engine.name, smooth)
+        if hit is not None:
+            return hit
+    result = engine.plan(costmap, start_cell, goal_cell)
+    if smooth and result.found:
+        result.cells = smooth_path(costmap, result.raw_cells)
+        result.path = [grid.to_point(c) for c in result.cells]
+    if cache is not None and result.found:
+        cache.put(costmap, start_cell, goal_cell, engine.name, smooth, result)
+    return result
+
+
+def compare_planners(
+    start: Tuple[float, float],
+    goal: Tuple[float, float],
+    costmap: Costmap,
+    planners: Optional[List[str]] = None,
+) -> Dict[str, PlanResult]:
+    """
+    Run several planners on the same query to pick the fastest one for a map.
+    """
+    return {
+        name: plan_path(start, goal, costmap, name)
+        for name in (planners or list(PLANNERS))
+    }
+
+
+def distance_field(
+    costmap: Costmap,
+    start: Cell,
+    targets: Optional[List[Cell]] = None,
+) -> np.ndarray:
+    """
+    Single-source Dijkstra flood over the costmap from `start`.
+
+    Returns a (rows, cols) array of travel costs in pixels (inf where
+    unreachable), using the same edges and costs as AStarPlanner. If
+    `targets` are given the flood stops once all of them are settled.
+    """
+    cols, rows = costmap.grid.cols, costmap.grid.rows
+    cost = costmap.cost_flat
+    dist = [math.inf] * (cols * rows)
+    s = start[1] * cols + start[0]
+    dist[s] = 0.0
+    pending = {t[1] * cols + t[0] for t in targets} if targets is not None else None
+    settled = bytearray(cols * rows)
+    open_set = [(0.0, s)]
+    while open_set:
+        d, current = heapq.heappop(open_set)
+        if settled[current]:
+            continue
+        settled[current] = 1
+        if pending is not None:
+            pending.discard(current)
+            if not pending:
+                break
+        c_cost = cost[current]
+        for nb, step in Planner._neighbors(costmap, current):
+            nd = d + step * (c_cost + cost[nb]) * 0.5
+            if nd < dist[nb]:
+                dist[nb] = nd
+                heapq.heappush(open_set, (nd, nb))
+    field = np.array(dist).reshape(rows, cols)
+    # unsettled cells only hold tentative upper bounds
+    field[np.frombuffer(settled, dtype=np.uint8).reshape(rows, cols) == 0] = math.inf
+    return field * costmap.grid.cell_size
+
+
+def travel_distances(
+    start: Tuple[float, float],
+    goals: Dict[str, Tuple[float, float]],
+    costmap: Costmap,
+) -> Dict[str, Optional[float]]:
+    """
+    Path distance (px) from world point `start` to each named goal point,
+    computed with one distance_field() flood. Unreachable goals map to None.
+    """
+    grid = costmap.grid
+    goal_cells = {
+        key: costmap.nearest_free(grid.to_cell(point)) for key, point in goals.items()
+    }
+    targets = [c for c in goal_cells.values() if c is not None]
+    if not targets:
+        return {key: None for key in goals}
+    field = distance_field(costmap, grid.to_cell(start), targets)
+    distances: Dict[str, Optional[float]] = {}
+    for key, cell in goal_cells.items():
+        d = field[cell[1], cell[0]] if cell is not None else math.inf
+        distances[key] = float(d) if math.isfinite(d) else None
+    return distances
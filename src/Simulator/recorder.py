@@ -0,0 +1,395 @@
+# filepath: src/Simulator/recorder.py
+"""
+Append-only binary trajectory log and deterministic replay.
+
+A recording is a directory holding:
+
+    meta.json   - map size, fixed_dt, robots, objects and the record layouts
+    ticks.bin   - one TICK_DTYPE record per robot after every physics step
+    events.bin  - EVENT_DTYPE records: nav goals, actions, map changes and
+                  path repairs
+    points.bin  - float64 (x, y) pairs referenced by events (paths, rects)
+
+Files are only ever appended to while recording and are memory-mapped by
+Recording, so long runs can be inspected without loading them. Replay
+rebuilds the simulation from the log and re-applies the recorded goals and
+actions at the recorded physics steps; since physics runs at a fixed dt the
+run is reproduced exactly, independent of wall-clock or playback speed.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from .fleet import ACTIONS, ACTION_STATUSES, NAV_STATUSES
+
+FORMAT_VERSION = 1
+
+TICK_DTYPE = np.dtype(
+    [
+        ("step", "<i8"),
+        ("t", "<f8"),
+        ("robot", "<i4"),
+        ("x", "<f8"),
+        ("y", "<f8"),
+        ("theta", "<f8"),
+        ("path_index", "<i4"),
+        ("nav_status", "i1"),
+        ("action_status", "i1"),
+        ("action", "i1"),
+    ]
+)
+
+EVENT_DTYPE = np.dtype(
+    [
+        ("step", "<i8"),  # applied before physics step `step` + 1
+        ("t", "<f8"),
+        ("robot", "<i4"),
+        ("kind", "i1"),
+        ("code", "i1"),  # nav status after planning / action code
+        ("a", "<f8"),  # goal x / action angle
+        ("b", "<f8"),  # goal y / action duration
+        ("c", "<f8"),  # goal theta
+        ("offset", "<i8"),  # first row in points.bin
+        ("count", "<i4"),  # number of rows in points.bin
+    ]
+)
+
+EVENT_GOAL = 0  # nav goal; points hold the planned path
+EVENT_ACTION = 1  # direct action
+EVENT_MAP = 2  # obstacle set; points hold (left, top), (right, bottom) per rect
+# path replaced without a new goal (repaired after a map change, or cleared
+# when navigation is cancelled); points hold the new path
+EVENT_REPAIR = 3
+
+_TICKS = "ticks.bin"
+_EVENTS = "events.bin"
+_POINTS = "points.bin"
+_META = "meta.json"
+
+
+def robot_state_codes(robot) -> Tuple[int, int, int]:
+    """
+    (nav_status, action_status, action) codes for a Robot or FleetRobot.
+    """
+    return (
+        NAV_STATUSES.index(robot.nav_status),
+        ACTION_STATUSES.index(robot.action_status),
+        ACTIONS.index(robot.current_action),
+    )
+
+
+class TrajectoryRecorder:
+    def __init__(self, path: str, meta: Dict[str, Any]):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        meta = dict(meta, format_version=FORMAT_VERSION)
+        meta["tick_dtype"] = TICK_DTYPE.descr
+        meta["event_dtype"] = EVENT_DTYPE.descr
+        with open(os.path.join(path, _META), "w") as f:
+            json.dump(meta, f, indent=2)
+        self._ticks = open(os.path.join(path, _TICKS), "wb")
+        self._events = open(os.path.join(path, _EVENTS), "wb")
+        self._points = open(os.path.join(path, _POINTS), "wb")
+        self._point_rows = 0
+        self.ticks = 0
+        self.events = 0
+
+    def record_tick(
+        self,
+        step: int,
+        t: float,
+        x: np.ndarray,
+        y: np.ndarray,
+        theta: np.ndarray,
+        path_index: np.ndarray,
+        nav_status: np.ndarray,
+        action_status: np.ndarray,
+        action: np.ndarray,
+    ):
+        """
+        Append the state of every robot after physics step `step`.
+        """
+        rec = np.empty(len(x), dtype=TICK_DTYPE)
+        rec["step"] = step
+        rec["t"] = t
+        rec["robot"] = np.arange(len(x))
+        rec["x"] = x
+        rec["y"] = y
+        rec["theta"] = theta
+        rec["path_index"] = path_index
+        rec["nav_status"] = nav_status
+        rec["action_status"] = action_status
+        rec["action"] = action
+        self._ticks.write(rec.tobytes())
+        self.ticks += 1
+
+    def record_event(
+        self,
+        step: int,
+        t: float,
+        kind: int,
+        robot: int = 0,
+        code: int = 0,
+        values: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+        points: Optional[List[Tuple[float, float]]] = None,
+    ):
+        rec = np.zeros(1, dtype=EVENT_DTYPE)
+        rec["step"] = step
+        rec["t"] = t
+        rec["robot"] = robot
+        rec["kind"] = kind
+        rec["code"] = code
+        rec["a"], rec["b"], rec["c"] = values
+        rec["offset"] = self._point_rows
+        if points:
+            arr = np.asarray(points, dtype="<f8").reshape(-1, 2)
+            self._points.write(arr.tobytes())
+            self._point_rows += len(arr)
+            rec["count"] = len(arr)
+        self._events.write(rec.tobytes())
+        self.events += 1
+
+    def flush(self):
+        for f in (self._ticks, self._events, self._points):
+            f.flush()
+
+    def close(self):
+        for f in (self._ticks, self._events, self._points):
+            f.close()
+
+
+def _memmap(path: str, dtype) -> np.ndarray:
+    # whole records only: a crashed run may have left a partial one behind
+    dtype = np.dtype(dtype)
+    count = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+    # np.memmap cannot map an empty file
+    if count == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+
+class Recording:
+    """
+    Read-only, memory-mapped view of a recording directory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, _META)) as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        if self.meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported recording format {self.meta.get('format_version')}"
+            )
+        self.robot_count: int = self.meta["robot_count"]
+        self.ticks = _memmap(os.path.join(path, _TICKS), TICK_DTYPE)
+        # a partially written last tick (crashed run) is ignored
+        whole = len(self.ticks) - len(self.ticks) % self.robot_count
+        self.ticks = self.ticks[:whole]
+        self.events = _memmap(os.path.join(path, _EVENTS), EVENT_DTYPE)
+        points = _memmap(os.path.join(path, _POINTS), np.dtype("<f8"))
+        self.points = points[: len(points) - len(points) % 2].reshape(-1, 2)
+
+    @property
+    def tick_count(self) -> int:
+        return len(self.ticks) // self.robot_count
+
+    @property
+    def start_time(self) -> float:
+        return float(self.ticks["t"][0]) if len(self.ticks) else 0.0
+
+    @property
+    def end_time(self) -> float:
+        return float(self.ticks["t"][-1]) if len(self.ticks) else 0.0
+
+    def tick_index(self, t: float) -> int:
+        """
+        Index of the last tick at or before time `t` (clamped to the log).
+        """
+        times = self.ticks["t"][:: self.robot_count]
+        i = int(np.searchsorted(times, t + 1e-9, side="right")) - 1
+        return min(max(i, 0), self.tick_count - 1)
+
+    def state_at(self, t: float) -> np.ndarray:
+        """
+        TICK_DTYPE records of every robot at the last tick at or before `t`.
+        """
+        i = self.tick_index(t)
+        return self.ticks[i * self.robot_count : (i + 1) * self.robot_count]
+
+    def trajectory(self, robot_id: int = 0) -> np.ndarray:
+        return self.ticks[robot_id :: self.robot_count]
+
+    def event_points(self, event) -> np.ndarray:
+        return self.points[event["offset"] : event["offset"] + event["count"]]
+
+    def events_between(self, t0: float, t1: float) -> np.ndarray:
+        times = self.events["t"]
+        return self.events[(times >= t0) & (times <= t1)]
+
+    def status_changes(self, nav_status: str = "FAILED") -> List[Tuple[float, int]]:
+        """
+        (time, robot) of every tick where a robot switched to `nav_status`,
+        e.g. to find collision failures for post-mortem seeking.
+        """
+        code = NAV_STATUSES.index(nav_status)
+        status = self.ticks["nav_status"].reshape(-1, self.robot_count)
+        times = self.ticks["t"][:: self.robot_count]
+        entered = (status[1:] == code) & (status[:-1] != code)
+        ticks, robots = np.nonzero(entered)
+        return [(float(times[i + 1]), int(r)) for i, r in zip(ticks, robots)]
+
+
+class Replay:
+    """
+    Re-run a recording in a fresh Simulation, headless or with a display.
+    """
+
+    def __init__(self, recording: Recording, headless: bool = True):
+        if not recording.tick_count:
+            raise ValueError("Recording has no ticks")
+        self.recording = recording
+        self.headless = headless
+        self.sim = None
+        self._event_index = 0
+        self.reset()
+
+    def reset(self):
+        # imported here: simulation_core imports this module for recording
+        from .simulation_core import Simulation
+
+        meta = self.recording.meta
+        self.sim = Simulation(
+            meta["width"],
+            meta["height"],
+            planner=meta["planner"],
+            smooth_paths=meta["smooth_paths"],
+            headless=self.headless,
+            fixed_dt=meta["fixed_dt"],
+            fleet_size=meta["fleet_size"],
+            map_path=meta["map_path"],
+            map_cell_size=meta["map_cell_size"],
+        )
+        sim = self.sim
+        # repaired paths are applied from the log like planned ones
+        sim.repair_paths = False
+        sim.objects = [
+            dict(obj, rect=pygame.Rect(obj["rect"])) for obj in meta["objects"]
+        ]
+        first = self.recording.ticks[: self.recording.robot_count]
+        for rec, speed in zip(first, meta["speeds"]):
+            robot = sim.get_robot(int(rec["robot"]))
+            robot.x, robot.y, robot.theta = rec["x"], rec["y"], rec["theta"]
+            robot.speed = speed
+            robot.nav_status = NAV_STATUSES[rec["nav_status"]]
+        sim.steps = int(first[0]["step"])
+        sim.sim_time = float(first[0]["t"])
+        sim._prev_poses = sim._poses()
+        self._event_index = 0
+        self._apply_events()
+
+    @property
+    def time(self) -> float:
+        return self.sim.sim_time
+
+    def _apply_events(self):
+        """
+        Apply every event recorded before the next physics step.
+        """
+        events = self.recording.events
+        sim = self.sim
+        while (
+            self._event_index < len(events)
+            and events[self._event_index]["step"] <= sim.steps
+        ):
+            event = events[self._event_index]
+            self._event_index += 1
+            if event["kind"] == EVENT_MAP:
+                rects = self.recording.event_points(event).reshape(-1, 4)
+                sim.env.obstacles = [
+                    pygame.Rect(int(l), int(t), int(r - l), int(b - t))
+                    for l, t, r, b in rects.tolist()
+                ]
+                continue
+            robot = sim.get_robot(int(event["robot"]))
+            if event["kind"] == EVENT_GOAL:
+                # the recorded path is reused, so replay does not depend on
+                # the planner producing the same result; like send_nav_goal,
+                # a failed plan only changes the status
+                if event["count"]:
+                    robot.path = [
+                        tuple(p) for p in self.recording.event_points(event).tolist()
+                    ]
+                    robot.path_index = 0
+                    robot.final_theta = float(event["c"])
+                robot.nav_status = NAV_STATUSES[event["code"]]
+            elif event["kind"] == EVENT_REPAIR:
+                # an empty path (failed repair, cancel) stopped the robot
+                robot.path = [
+                    tuple(p) for p in self.recording.event_points(event).tolist()
+                ]
+                robot.path_index = 0
+                robot.nav_status = NAV_STATUSES[event["code"]]
+            elif event["kind"] == EVENT_ACTION:
+                robot.start_action(
+                    ACTIONS[event["code"]],
+                    {"angle": float(event["a"]), "duration": float(event["b"])},
+                )
+
+    def step(self) -> bool:
+        """
+        Advance one physics step; False once the end of the log is reached.
+        """
+        if self.sim.sim_time >= self.recording.end_time - 1e-9:
+            return False
+        self.sim._physics_step(self.sim.fixed_dt)
+        self._apply_events()
+        return True
+
+    def seek(self, t: float):
+        """
+        Move to the last physics step at or before time `t`.
+
+        Seeking backwards re-runs from the start of the log; physics steps
+        are cheap without drawing, so this is fast even for long runs.
+        """
+        if t < self.sim.sim_time - 1e-9:
+            self.reset()
+        while self.sim.sim_time + self.sim.fixed_dt <= t + 1e-9 and self.step():
+            pass
+
+    def play(self, speed: float = 1.0, until: Optional[float] = None):
+        """
+        Play back at `speed` times realtime (headless: as fast as possible).
+        """
+        sim = self.sim
+        end = self.recording.end_time if until is None else until
+        sim.running = True
+        if self.headless:
+            self.seek(end)
+            return
+        while sim.running and sim.sim_time < end - 1e-9:
+            sim.handle_events()
+            frame_dt = sim.clock.tick(sim.render_fps) / 1000.0
+            sim._accumulator = min(
+                sim._accumulator + frame_dt * speed, sim.max_frame_time * speed
+            )
+            while sim._accumulator >= sim.fixed_dt and sim.running:
+                if not self.step():
+                    sim.running = False
+                    break
+                sim._accumulator -= sim.fixed_dt
+            sim.draw()
+
+    def divergence(self) -> float:
+        """
+        Largest position difference between the replayed robots and the
+        recorded state at the current time (0.0 for a faithful replay).
+        """
+        recorded = self.recording.state_at(self.sim.sim_time)
+        x, y, _ = self.sim._poses()
+        return float(np.max(np.hypot(x - recorded["x"], y - recorded["y"])))
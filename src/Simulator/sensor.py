@@ -0,0 +1,225 @@
+# filepath: src/Simulator/sensor.py
+"""
+Simulated range sensor and the probabilistic occupancy map it builds.
+
+A scan casts a fan of rays from each robot through the occupancy grid. Each
+ray is traversed exactly cell by cell (every cell boundary it crosses, in
+order), all rays at once in NumPy, so a scan costs O(rays * range / cell)
+however large the world is. The cells a ray passes through are evidence of
+free space and the cell it stops in of an obstacle; only those cells of the
+map are updated.
+"""
+
+import math
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .occupancy import OccupancyGrid
+
+
+class RayHits(NamedTuple):
+    ranges: np.ndarray  # (R,) distance (px) travelled by each ray
+    hit: np.ndarray  # (R,) whether the ray stopped on an occupied cell
+    free_cells: np.ndarray  # flat indices (row * cols + col) of traversed cells
+    hit_cells: np.ndarray  # flat indices of the cells the rays stopped in
+
+
+def cast_rays(
+    grid: OccupancyGrid, x0, y0, angles, max_range, record_cells: bool = True
+) -> RayHits:
+    """
+    Cast rays from (x0, y0) in directions `angles` (radians) up to
+    `max_range` px (scalars or (R,) arrays).
+
+    A ray stops at the first occupied cell, or where it leaves the grid
+    (which is not a hit). With `record_cells` false only ranges are computed.
+    """
+    angles = np.atleast_1d(np.asarray(angles, dtype=np.float64))
+    n = len(angles)
+    x0 = np.broadcast_to(np.asarray(x0, dtype=np.float64), (n,))[:, None]
+    y0 = np.broadcast_to(np.asarray(y0, dtype=np.float64), (n,))[:, None]
+    reach = np.broadcast_to(np.asarray(max_range, dtype=np.float64), (n,))[:, None]
+    cs = grid.cell_size
+    dx, dy = np.cos(angles)[:, None], np.sin(angles)[:, None]
+    # distances along each ray at which it crosses vertical / horizontal cell
+    # boundaries; a ray within max_range crosses at most this many of each
+    crossings = np.arange(int(math.ceil(reach.max() / cs)) + 1)
+
+    def boundary_t(p0, d):
+        first = np.floor(p0 / cs) + (d > 0)
+        bounds = (first + np.where(d > 0, 1, -1) * crossings) * cs
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (bounds - p0) / d
+        return np.where(np.abs(d) > 1e-12, t, np.inf)
+
+    t = np.concatenate(
+        (np.zeros((n, 1)), boundary_t(x0, dx), boundary_t(y0, dy)), axis=1
+    )
+    t = np.minimum(np.sort(t, axis=1), reach)
+    # one segment per cell entered, identified by its midpoint
+    t_in, t_out = t[:, :-1], t[:, 1:]
+    valid = t_out > t_in
+    mid = (t_in + t_out) / 2
+    cols = np.floor((x0 + dx * mid) / cs).astype(np.int64)
+    rows = np.floor((y0 + dy * mid) / cs).astype(np.int64)
+    inside = (cols >= 0) & (cols < grid.cols) & (rows >= 0) & (rows < grid.rows)
+    occupied = (
+        valid
+        & inside
+        & grid.cells[np.clip(rows, 0, grid.rows - 1), np.clip(cols, 0, grid.cols - 1)]
+    )
+    stop = occupied | (valid & ~inside)
+    stopped = stop.any(axis=1)
+    first = np.where(stopped, stop.argmax(axis=1), t_in.shape[1])
+    index = np.arange(n)
+    hit = stopped & occupied[index, np.minimum(first, t_in.shape[1] - 1)]
+    ranges = np.where(
+        stopped, t_in[index, np.minimum(first, t_in.shape[1] - 1)], reach[:, 0]
+    )
+    if not record_cells:
+        empty = np.zeros(0, dtype=np.int64)
+        return RayHits(ranges, hit, empty, empty)
+    before = valid & (np.arange(t_in.shape[1])[None, :] < first[:, None])
+    flat = rows * grid.cols + cols
+    return RayHits(ranges, hit, flat[before], flat[index[hit], first[hit]])
+
+
+class ProbabilisticMap:
+    """
+    Log-odds occupancy map over the cells of an OccupancyGrid.
+
+    Cells start unknown (probability 0.5). Each scan adds `l_free` to the
+    cells its rays passed through and `l_occupied` to the cells they stopped
+    in, once per cell per scan, clamped so the map can still follow changes.
+    """
+
+    def __init__(
+        self,
+        rows: int,
+        cols: int,
+        cell_size: int,
+        l_occupied: float = 0.85,
+        l_free: float = -0.4,
+        l_min: float = -2.0,
+        l_max: float = 3.5,
+    ):
+        self.rows = rows
+        self.cols = cols
+        self.cell_size = cell_size
+        self.l_occupied = l_occupied
+        self.l_free = l_free
+        self.l_min = l_min
+        self.l_max = l_max
+        self.log_odds = np.zeros((rows, cols), dtype=np.float32)
+        self.cells_updated = 0
+
+    @classmethod
+    def like(cls, grid: OccupancyGrid, **kwargs) -> "ProbabilisticMap":
+        return cls(grid.rows, grid.cols, grid.cell_size, **kwargs)
+
+    def update(self, free_cells: np.ndarray, hit_cells: np.ndarray):
+        """
+        Integrate one scan given flat cell indices (duplicates allowed).
+        """
+        hits = np.unique(hit_cells)
+        # a cell a ray stopped in is not free, even if another ray crossed it
+        free = np.setdiff1d(free_cells, hits, assume_unique=False)
+        flat = self.log_odds.reshape(-1)
+        flat[free] = np.maximum(flat[free] + self.l_free, self.l_min)
+        flat[hits] = np.minimum(flat[hits] + self.l_occupied, self.l_max)
+        self.cells_updated += len(free) + len(hits)
+
+    @property
+    def probability(self) -> np.ndarray:
+        """
+        Occupancy probability of every cell.
+        """
+        return 1.0 / (1.0 + np.exp(-self.log_odds))
+
+    @property
+    def known(self) -> np.ndarray:
+        return self.log_odds != 0
+
+    def occupied(self, threshold: float = 0.65) -> np.ndarray:
+        return self.log_odds > math.log(threshold / (1.0 - threshold))
+
+    def free(self, threshold: float = 0.35) -> np.ndarray:
+        return self.log_odds < math.log(threshold / (1.0 - threshold))
+
+
+class RangeSensor:
+    """
+    Fan of `num_rays` rays spread over `fov` degrees around the robot heading
+    (360 for a full lidar sweep), seeing up to `max_range` px.
+
+    Headings are in degrees counter-clockwise with y up, like Robot.theta;
+    ray directions passed to cast_rays are in screen coordinates (y down).
+    """
+
+    def __init__(
+        self, num_rays: int = 90, max_range: float = 500.0, fov: float = 360.0
+    ):
+        self.num_rays = num_rays
+        self.max_range = float(max_range)
+        self.fov = float(fov)
+
+    def ray_angles(self, theta) -> np.ndarray:
+        """
+        (N, num_rays) screen ray directions in radians for headings
+        `theta` (deg).
+        """
+        theta = np.atleast_1d(np.asarray(theta, dtype=np.float64))
+        if self.fov >= 360.0:
+            # full circle: do not cast the first direction twice
+            offsets = np.arange(self.num_rays) * (360.0 / self.num_rays)
+        else:
+            offsets = np.linspace(-self.fov / 2, self.fov / 2, self.num_rays)
+        # y points down on screen: a counter-clockwise angle is negated
+        return np.radians(-(theta[:, None] + offsets[None, :]))
+
+    def scan(self, grid: OccupancyGrid, xs, ys, thetas) -> RayHits:
+        """
+        One scan from every pose (xs, ys, thetas), all rays cast together.
+        """
+        xs = np.atleast_1d(np.asarray(xs, dtype=np.float64))
+        ys = np.atleast_1d(np.asarray(ys, dtype=np.float64))
+        angles = self.ray_angles(thetas)
+        return cast_rays(
+            grid,
+            np.repeat(xs, self.num_rays),
+            np.repeat(ys, self.num_rays),
+            angles.ravel(),
+            self.max_range,
+        )
+
+    def in_view(
+        self,
+        x: float,
+        y: float,
+        theta: float,
+        tx: np.ndarray,
+        ty: np.ndarray,
+        grid: Optional[OccupancyGrid] = None,
+    ) -> np.ndarray:
+        """
+        Whether each target point (tx, ty) is within range and the field of
+        view from pose (x, y, theta), and, given a grid, in line of sight.
+        """
+        tx = np.asarray(tx, dtype=np.float64)
+        ty = np.asarray(ty, dtype=np.float64)
+        dist = np.hypot(tx - x, ty - y)
+        # bearing in the heading convention (y up)
+        bearing = np.degrees(np.arctan2(-(ty - y), tx - x))
+        off = (bearing - theta + 180.0) % 360.0 - 180.0
+        seen = (dist <= self.max_range) & (
+            (self.fov >= 360.0) | (np.abs(off) <= self.fov / 2)
+        )
+        if grid is not None and seen.any():
+            idx = np.nonzero(seen)[0]
+            rays = cast_rays(
+                grid, x, y, np.radians(-bearing[idx]), dist[idx], record_cells=False
+            )
+            # the ray to a visible target runs its full length unobstructed
+            seen[idx] = ~rays.hit & (rays.ranges >= dist[idx])
+        return seen
@@ -1,19 +1,70 @@
 import pygame
-from typing import List
+from contextlib import nullcontext
+from typing import List, Optional
 
+from .commands import NavHandle, SimSnapshot
 from .simulation_core import Simulation
 
 # Global simulation instance
 _simulation: Simulation = None
 
+# The simulation is stepped by the main thread while the agent calls this
+# module from its own thread. Calls that change the simulation are queued and
+# run on the simulation thread at the start of its next step (or directly
+# when made from that thread); robot state is read from the snapshot the
+# simulation publishes after each step.
 
-def initialize_simulation():
+
+def _call(fn, *args):
+    """
+    Run a Simulation method on the simulation thread and wait for its result.
+    """
+    if _simulation.on_simulation_thread():
+        result = fn(*args)
+        _simulation.publish_snapshot()
+        return result
+    return _simulation.submit(fn, *args).result()
+
+
+def initialize_simulation(
+    planner: str = "astar",
+    headless: bool = False,
+    fleet_size: int = 0,
+    record_path: Optional[str] = None,
+    map_path: Optional[str] = None,
+    live_mapping: bool = False,
+    memory_path: Optional[str] = None,
+):
     """
     Initialize the simulation.
+
+    `planner` selects the path planning engine: "astar", "jps" or "theta".
+    `headless` runs without a display, advancing a fixed dt per step as fast
+    as possible (for batch runs and benchmarks).
+    `fleet_size` > 0 simulates a vectorized fleet; robots are addressed by
+    the `robot_id` argument of the functions below (default robot 0).
+    `record_path` logs the run to a trajectory recording directory that
+    `python -m src.replay_simulation` can replay.
+    `map_path` loads the world from a PNG occupancy image or .npy grid.
+    `live_mapping` takes a range sensor scan every physics step, so memory
+    only holds objects a robot has had in line of sight.
+    `memory_path` persists mapped memory to an SQLite file and reopens it
+    on the next start.
     """
     global _simulation
     if _simulation is None:
-        _simulation = Simulation(width=1280, height=768)
+        _simulation = Simulation(
+            width=1280,
+            height=768,
+            planner=planner,
+            headless=headless,
+            fleet_size=fleet_size,
+            map_path=map_path,
+            live_mapping=live_mapping,
+            memory_path=memory_path,
+        )
+        if record_path:
+            _simulation.start_recording(record_path)
 
 
 def shutdown_simulation():
@@ -25,38 +76,112 @@ def shutdown_simulation():
         _simulation.shutdown()
 
 
-def get_current_pose_from_sim() -> tuple:
+def get_robot_count() -> int:
+    """
+    Return the number of simulated robots (1 unless running a fleet).
+    """
+    global _simulation
+    if _simulation is None:
+        return 0
+    return _simulation.robot_count
+
+
+def get_current_pose_from_sim(robot_id: int = 0) -> tuple:
     """
     Return the current pose (x, y, theta) of the simulated robot.
     """
     global _simulation
     if _simulation is None:
         return (0.0, 0.0, 0.0)
-    r = _simulation.robot
-    return (r.x, r.y, r.theta)
+    return _simulation.snapshot.robots[robot_id].pose
 
 
-def send_nav_goal_to_sim(x: float, y: float, theta: float) -> None:
+def get_snapshot_from_sim() -> Optional[SimSnapshot]:
+    """
+    Return the latest immutable snapshot of every robot's pose and status.
+    """
+    global _simulation
+    if _simulation is None:
+        return None
+    return _simulation.snapshot
+
+
+def send_nav_goal_to_sim(
+    x: float, y: float, theta: float, robot_id: int = 0
+) -> NavHandle:
     """
     Send a navigation goal to the simulated robot.
+
+    Returns at once with a NavHandle that resolves to "SUCCEEDED" or
+    "FAILED" when the robot finishes (or is cancelled); `await` it from
+    asyncio code. From another thread the path is planned off the
+    simulation thread.
     """
     global _simulation
-    if _simulation is not None:
+    if _simulation is None:
+        handle = NavHandle(None, robot_id)
+        handle.future.set_result("UNKNOWN")
+        return handle
+    if _simulation.on_simulation_thread():
         # Use Simulation.send_nav_goal to perform path planning
-        _simulation.send_nav_goal(x, y, theta)
+        handle = _simulation.send_nav_goal(x, y, theta, robot_id=robot_id)
+        _simulation.publish_snapshot()
+        return handle
+    handle = NavHandle(_simulation, robot_id)
+    handle.watch(
+        _simulation.submit(_simulation.request_nav_goal, x, y, theta, robot_id, handle)
+    )
+    return handle
+
 
+async def navigate_in_sim(x: float, y: float, theta: float, robot_id: int = 0) -> str:
+    """
+    Send a navigation goal and wait for its final status without blocking a
+    thread; gather several to drive many robots at once.
+    """
+    return await send_nav_goal_to_sim(x, y, theta, robot_id)
 
-def get_nav_status_from_sim() -> str:
+
+def add_dynamic_obstacle_to_sim(x: int, y: int, width: int, height: int) -> int:
+    """
+    Add an obstacle that can be moved or removed later. Returns its id (-1
+    if the simulation is not running).
+    """
+    global _simulation
+    if _simulation is None:
+        return -1
+    return _call(_simulation.add_dynamic_obstacle, x, y, width, height)
+
+
+def move_dynamic_obstacle_in_sim(obstacle_id: int, x: int, y: int) -> None:
+    """
+    Move a dynamic obstacle; blocked robot paths are repaired on the next step.
+    """
+    global _simulation
+    if _simulation is not None:
+        _call(_simulation.move_dynamic_obstacle, obstacle_id, x, y)
+
+
+def remove_dynamic_obstacle_from_sim(obstacle_id: int) -> None:
+    """
+    Remove a dynamic obstacle from the simulation.
+    """
+    global _simulation
+    if _simulation is not None:
+        _call(_simulation.remove_dynamic_obstacle, obstacle_id)
+
+
+def get_nav_status_from_sim(robot_id: int = 0) -> str:
     """
     Get the current navigation status of the simulated robot.
     """
     global _simulation
     if _simulation is None:
         return "UNKNOWN"
-    return _simulation.robot.nav_status
+    return _simulation.snapshot.robots[robot_id].nav_status
 
 
-def execute_robot_action_in_sim(action: str, params: dict) -> str:
+def execute_robot_action_in_sim(action: str, params: dict, robot_id: int = 0) -> str:
     """
     Execute a direct robot action in simulation (e.g., rotate).
 
@@ -67,7 +192,7 @@ def execute_robot_action_in_sim(action: str, params: dict) -> str:
         return "SIM_NOT_INITIALIZED"
     # Initiate animated action on robot
     if action in ("rotate", "move_forward"):
-        _simulation.robot.start_action(action, params)
+        _call(_simulation.start_action, action, params, robot_id)
         return "IN_PROGRESS"
     # Unknown action
     return "UNKNOWN_ACTION"
@@ -101,3 +226,167 @@ def get_memory_data_from_sim() -> dict:
     if _simulation is None or not hasattr(_simulation, "memory_data"):
         return {}
     return _simulation.memory_data
+
+
+def get_memory_snapshot_from_sim():
+    """
+    Return the current immutable memory snapshot (None without a
+    simulation). Its `version` identifies the memory state; queries given
+    the snapshot all see that state, however the memory changes meanwhile.
+    release() it when done (or use it as a context manager): a persisted
+    store keeps a read transaction open for every live snapshot.
+    """
+    global _simulation
+    if _simulation is None:
+        return None
+    return _simulation.memory.snapshot()
+
+
+def _memory_view(snapshot):
+    # context manager for the snapshot to query: the given one (released by
+    # its owner), or one of the current memory released on exit
+    if snapshot is not None:
+        return nullcontext(snapshot)
+    return _simulation.memory.snapshot()
+
+
+def query_memory_in_sim(
+    entity_type: Optional[str] = None, label: Optional[str] = None, snapshot=None
+) -> List[dict]:
+    """
+    Return copies of the mapped memory entries of `entity_type` whose label
+    matches `label` (case-insensitive), looked up in the memory store's
+    indexes.
+    """
+    global _simulation
+    if _simulation is None:
+        return []
+    with _memory_view(snapshot) as view:
+        return [dict(entry) for entry in view.query(entity_type, label)]
+
+
+def search_memory_in_sim(
+    entity_type: Optional[str],
+    label: str,
+    k: int = 5,
+    min_score: float = 0.65,
+    snapshot=None,
+) -> List[dict]:
+    """
+    Return memory entries whose label is similar to `label` (spelling
+    variants, plurals, synonyms), ranked by "label_score", best first.
+    """
+    global _simulation
+    if _simulation is None:
+        return []
+    return _simulation.search_memory(label, entity_type, k, min_score, snapshot)
+
+
+def _with_distances(pairs) -> List[dict]:
+    # copy entries with their distance from the query pose
+    return [{**entry, "distance": distance} for distance, entry in pairs]
+
+
+def query_memory_near_in_sim(
+    x: float,
+    y: float,
+    k: int = 1,
+    entity_type: Optional[str] = None,
+    label: Optional[str] = None,
+    max_distance: Optional[float] = None,
+    snapshot=None,
+) -> List[dict]:
+    """
+    Return the `k` memory entries nearest to (x, y), optionally matching
+    `label` and no farther than `max_distance`, each copied with its
+    straight-line "distance", nearest first.
+    """
+    global _simulation
+    if _simulation is None:
+        return []
+    with _memory_view(snapshot) as view:
+        return _with_distances(view.nearest(x, y, k, entity_type, label, max_distance))
+
+
+def query_memory_within_in_sim(
+    x: float,
+    y: float,
+    radius: float,
+    entity_type: Optional[str] = None,
+    label: Optional[str] = None,
+    snapshot=None,
+) -> List[dict]:
+    """
+    Return the memory entries within `radius` of (x, y), each copied with
+    its "distance", nearest first.
+    """
+    global _simulation
+    if _simulation is None:
+        return []
+    with _memory_view(snapshot) as view:
+        return _with_distances(view.within_radius(x, y, radius, entity_type, label))
+
+
+def query_memory_in_region_in_sim(
+    region: str, entity_type: Optional[str] = None, snapshot=None
+) -> Optional[List[dict]]:
+    """
+    Return copies of the memory entries inside the named region, or None if
+    no region of that name has been defined.
+    """
+    global _simulation
+    if _simulation is None:
+        return None
+    with _memory_view(snapshot) as view:
+        found = view.within_region(region, entity_type)
+    return None if found is None else [dict(entry) for entry in found]
+
+
+def add_region_to_sim(
+    name: str, left: float, top: float, right: float, bottom: float
+) -> None:
+    """
+    Define a named region (e.g. "kitchen") for within-region memory queries.
+    """
+    global _simulation
+    if _simulation is not None:
+        _call(_simulation.add_region, name, left, top, right, bottom)
+
+
+def get_plan_cache_stats_from_sim() -> dict:
+    """
+    Return hit/miss counters of the simulation's path plan cache.
+    """
+    global _simulation
+    if _simulation is None:
+        return {}
+    return _simulation.plan_cache.stats()
+
+
+def get_memory_travel_distances_from_sim(
+    robot_id: int = 0, entry_ids: Optional[List[str]] = None
+) -> dict:
+    """
+    Return {entry_id: path distance or None} from the robot to the given
+    (default: every) mapped memory entry, computed with one distance-field
+    flood over the map. From another thread the flood runs on the planner
+    thread, not the simulation thread.
+    """
+    global _simulation
+    if _simulation is None:
+        return {}
+    if _simulation.on_simulation_thread():
+        return _simulation.memory_travel_distances(robot_id, entry_ids)
+    return _simulation.submit(
+        _simulation.request_travel_distances, robot_id, entry_ids
+    ).result()
+
+
+def get_sim_stats() -> dict:
+    """
+    Return simulated time, wall time and simulated-seconds per wall-second.
+    """
+    global _simulation
+    if _simulation is None:
+        return {}
+    return _simulation.get_stats()
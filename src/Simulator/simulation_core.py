@@ -2,8 +2,52 @@
 import pygame
 import pygame.freetype
 import math
-import heapq
-from typing import List, Tuple, Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import (
+    CancelledError,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+import numpy as np
+from typing import List, Tuple, Optional, Dict, Any, Iterator
+
+from .batch_planning import plan_paths_batch, planner_pool
+from .collision import contact_fraction, swept_circle_toi
+from .commands import (
+    CommandQueue,
+    NavHandle,
+    NavProgress,
+    RobotSnapshot,
+    SimSnapshot,
+)
+from .fleet import ACTION_STATUSES, ACTIONS, NAV_STATUSES, Fleet, spawn_positions
+from .label_index import LabelIndex
+from .map_loader import load_occupancy_grid
+from .memory_store import MemoryStore, SqliteMemoryStore, normalize_label
+from .occupancy import Costmap, OccupancyGrid, rects_to_array
+from .planners import (
+    DStarLite,
+    PlanCache,
+    PlanResult,
+    get_planner,
+    plan_path,
+    smooth_path,
+    travel_distances,
+)
+from .recorder import (
+    EVENT_ACTION,
+    EVENT_GOAL,
+    EVENT_MAP,
+    EVENT_REPAIR,
+    TrajectoryRecorder,
+    robot_state_codes,
+)
+from .sensor import ProbabilisticMap, RangeSensor
+from .spatial import SpatialHash
+from .text_cache import TextCache
+from .viewport import MapTiles, Viewport
 
 
 # Helper functions
@@ -11,6 +55,20 @@ def _clamp(val: float, min_val: float, max_val: float) -> float:
     return max(min_val, min(val, max_val))
 
 
+def _goal_replanner(
+    costmap: Costmap, start: Tuple[float, float], goal: Tuple[float, float]
+) -> Optional[DStarLite]:
+    """
+    D* Lite search for a newly installed goal, so the first map change
+    after it is already an incremental repair.
+    """
+    grid = costmap.grid
+    goal_cell = costmap.nearest_free(grid.to_cell(goal))
+    if goal_cell is None:
+        return None
+    return DStarLite(costmap, grid.to_cell(start), goal_cell)
+
+
 def circle_rect_collision(
     cx: float, cy: float, radius: float, rect: pygame.Rect
 ) -> bool:
@@ -22,13 +80,22 @@ def circle_rect_collision(
     return (dx * dx + dy * dy) < (radius * radius)
 
 
+# Arrow key -> (dx, dy) viewport pan direction
+_PAN_KEYS = {
+    pygame.K_LEFT: (-1, 0),
+    pygame.K_RIGHT: (1, 0),
+    pygame.K_UP: (0, -1),
+    pygame.K_DOWN: (0, 1),
+}
+
+
 # Simple robot representation
 class Robot:
-    def __init__(self, x: float, y: float, theta: float = 0.0, speed: float = 2.0):
+    def __init__(self, x: float, y: float, theta: float = 0.0, speed: float = 60.0):
         self.x = x
         self.y = y
         self.theta = theta
-        self.speed = speed  # pixels per frame
+        self.speed = speed  # pixels per second
         # Action execution attributes
         self.current_action: Optional[str] = None
         self.action_params: Dict[str, Any] = {}
@@ -36,6 +103,8 @@ class Robot:
         self.action_status: str = "IDLE"
         # Rotation speed (degrees per second)
         self.angular_speed: float = 90.0
+        # move_forward speed (pixels per second), independent of path speed
+        self.action_speed: float = 2.0
         # path following attributes
         self.path: List[Tuple[float, float]] = []
         self.path_index: int = 0
@@ -43,9 +112,11 @@ class Robot:
         self.nav_status: str = "IDLE"
         self.radius: float = 10.0  # collision radius
 
-    def set_nav_goal(self, x: float, y: float, theta: float):
+    def set_nav_goal(self, x: float, y: float, theta: Optional[float]):
         # Placeholder: actual planning done in Simulation.send_nav_goal
-        self.final_theta = theta
+        # no heading given: keep the current final heading
+        if theta is not None:
+            self.final_theta = theta
         self.nav_status = "PLANNING"
 
     def start_action(self, action: str, params: Dict[str, Any]):
@@ -78,7 +149,7 @@ class Robot:
                 self.theta = (self.theta + step * (1 if diff >= 0 else -1)) % 360
             elif self.current_action == "move_forward":
                 # move step
-                distance = self.speed * dt
+                distance = self.action_speed * dt
                 rad = math.radians(self.theta)
                 self.x += math.cos(rad) * distance
                 self.y -= math.sin(rad) * distance
@@ -99,7 +170,8 @@ class Robot:
         if dist > 0:
             rad = math.atan2(-dy, dx)
             self.theta = math.degrees(rad) % 360
-        if dist < self.speed:
+        step = self.speed * dt
+        if dist < step:
             # reached waypoint
             self.x, self.y = tx, ty
             if self.path_index == len(self.path) - 1:
@@ -113,13 +185,15 @@ class Robot:
                 self.nav_status = "IN_PROGRESS"
         else:
             # move towards waypoint
-            self.x += self.speed * dx / dist
-            self.y += self.speed * dy / dist
+            self.x += step * dx / dist
+            self.y += step * dy / dist
             self.nav_status = "IN_PROGRESS"
 
-    def draw(self, surface: pygame.Surface, colors=None):
-        # draw robot as a circle with heading indicator
-        center = (int(self.x), int(self.y))
+    def draw(self, surface: pygame.Surface, colors=None, pose=None):
+        # draw robot as a circle with heading indicator, at an (interpolated)
+        # (x, y, theta) pose when one is given
+        x, y, theta = pose if pose is not None else (self.x, self.y, self.theta)
+        center = (int(x), int(y))
         radius = int(self.radius)
 
         # Use provided colors or defaults
@@ -139,93 +213,238 @@ class Robot:
         pygame.draw.circle(surface, heading_color, center, radius, 1)  # White border
 
         # heading line
-        rad = math.radians(self.theta)
+        rad = math.radians(theta)
         end_pos = (
-            int(self.x + math.cos(rad) * radius * 2),
-            int(self.y - math.sin(rad) * radius * 2),
+            int(x + math.cos(rad) * radius * 2),
+            int(y - math.sin(rad) * radius * 2),
         )
         pygame.draw.line(surface, heading_color, center, end_pos, 2)
 
 
-# Path planning: simple grid-based A* avoiding rectangular obstacles
-def plan_path(
-    start: Tuple[float, float],
-    goal: Tuple[float, float],
-    obstacles: List[pygame.Rect],
-    width: int,
-    height: int,
-    cell_size: int = 20,
-) -> List[Tuple[float, float]]:
-    cols = width // cell_size
-    rows = height // cell_size
-
-    # convert point to cell
-    def to_cell(p):
-        cx, cy = int(p[0]) // cell_size, int(p[1]) // cell_size
-        return max(0, min(cx, cols - 1)), max(0, min(cy, rows - 1))
-
-    # convert cell to center point
-    def to_point(c):
-        return (c[0] + 0.5) * cell_size, (c[1] + 0.5) * cell_size
-
-    start_cell = to_cell(start)
-    goal_cell = to_cell(goal)
-    # occupancy grid
-    grid = [[0] * rows for _ in range(cols)]
-    for ox in range(cols):
-        for oy in range(rows):
-            cell_rect = pygame.Rect(
-                ox * cell_size, oy * cell_size, cell_size, cell_size
+# Simple environment with obstacles
+class Environment:
+    def __init__(
+        self,
+        obstacles: List[pygame.Rect] = None,
+        width: int = 800,
+        height: int = 600,
+        cell_size: int = 20,
+        bucket_size: int = 64,
+        static_grid: Optional[OccupancyGrid] = None,
+    ):
+        self._obstacles = list(obstacles or [])
+        # Walls loaded from an occupancy map; obstacle rects are added on top
+        # of them and the world takes the map's size.
+        self.static_grid = static_grid
+        if static_grid is not None:
+            cell_size = static_grid.cell_size
+            width = static_grid.cols * cell_size
+            height = static_grid.rows * cell_size
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        # Bumped on every obstacle change; derived grids are keyed on it
+        self.version = 0
+        self._grid: Optional[OccupancyGrid] = None
+        self._costmaps: Dict[float, Costmap] = {}
+        # Spatial hash over obstacle rects for neighbourhood collision queries
+        self._index = SpatialHash(bucket_size)
+        self._index_version = -1
+        self._boxes: Optional[np.ndarray] = None
+        self._boxes_version = -1
+
+    @classmethod
+    def from_map(
+        cls,
+        path: str,
+        cell_size: int = 20,
+        obstacles: List[pygame.Rect] = None,
+        bucket_size: int = 64,
+    ) -> "Environment":
+        """
+        Environment whose walls come from a PNG occupancy image or .npy grid.
+        """
+        grid = load_occupancy_grid(path, cell_size)
+        return cls(obstacles, bucket_size=bucket_size, static_grid=grid)
+
+    @property
+    def obstacles(self) -> List[pygame.Rect]:
+        return self._obstacles
+
+    @obstacles.setter
+    def obstacles(self, obstacles: List[pygame.Rect]):
+        self._obstacles = list(obstacles)
+        self.mark_dirty()
+
+    def add_obstacle(self, rect: pygame.Rect):
+        self._obstacles.append(rect)
+        index_current = self._index_version == self.version
+        self.mark_dirty()
+        if index_current:
+            # keep the spatial hash up to date incrementally
+            self._index.insert(rect)
+            self._index_version = self.version
+
+    def remove_obstacle(self, rect: pygame.Rect):
+        # by identity, like the spatial hash: equal rects are distinct
+        # obstacles
+        for i, r in enumerate(self._obstacles):
+            if r is rect:
+                del self._obstacles[i]
+                break
+        else:
+            raise ValueError("obstacle not in environment")
+        index_current = self._index_version == self.version
+        self.mark_dirty()
+        if index_current:
+            self._index.remove(rect)
+            self._index_version = self.version
+
+    def move_obstacle(self, rect: pygame.Rect, x: int, y: int):
+        """
+        Move an obstacle rect (in place) so its top-left corner is at (x, y).
+        """
+        index_current = self._index_version == self.version
+        if index_current:
+            self._index.remove(rect)
+        rect.topleft = (x, y)
+        self.mark_dirty()
+        if index_current:
+            self._index.insert(rect)
+            self._index_version = self.version
+
+    def mark_dirty(self):
+        """
+        Invalidate cached grids. Call after mutating obstacle rects in place.
+        """
+        self.version += 1
+
+    @property
+    def grid(self) -> OccupancyGrid:
+        """
+        Occupancy grid for the current obstacles, rasterized only when stale.
+        """
+        if self._grid is None or self._grid.version != self.version:
+            if self.static_grid is not None and not self._obstacles:
+                # the loaded map as-is (a memory-mapped .npy stays mapped)
+                self._grid = OccupancyGrid(
+                    self.static_grid.cells, self.cell_size, self.version
+                )
+                return self._grid
+            self._grid = OccupancyGrid.from_rects(
+                self._obstacles,
+                self.width,
+                self.height,
+                self.cell_size,
+                version=self.version,
             )
-            if any(obs.colliderect(cell_rect) for obs in obstacles):
-                grid[ox][oy] = 1
-    # A* search
-    open_set = []
-    heapq.heappush(
-        open_set,
-        (
-            0 + abs(goal_cell[0] - start_cell[0]) + abs(goal_cell[1] - start_cell[1]),
-            0,
-            start_cell,
-            None,
-        ),
-    )
-    came_from = {}
-    cost_so_far = {start_cell: 0}
-    while open_set:
-        _, cost, current, parent = heapq.heappop(open_set)
-        if current == goal_cell:
-            came_from[current] = parent
-            break
-        if current in came_from:
-            continue
-        came_from[current] = parent
-        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-            nb = (current[0] + dx, current[1] + dy)
-            if 0 <= nb[0] < cols and 0 <= nb[1] < rows and grid[nb[0]][nb[1]] == 0:
-                new_cost = cost + 1
-                if nb not in cost_so_far or new_cost < cost_so_far[nb]:
-                    cost_so_far[nb] = new_cost
-                    priority = (
-                        new_cost + abs(goal_cell[0] - nb[0]) + abs(goal_cell[1] - nb[1])
-                    )
-                    heapq.heappush(open_set, (priority, new_cost, nb, current))
-    # reconstruct path
-    path = []
-    node = goal_cell
-    if node not in came_from:
-        return []
-    while node:
-        path.append(to_point(node))
-        node = came_from[node]
-    path.reverse()
-    return path
+            if self.static_grid is not None:
+                self._grid.cells |= self.static_grid.cells
+        return self._grid
+
+    @property
+    def index(self) -> SpatialHash:
+        """
+        Spatial hash of the current obstacles, rebuilt only when stale.
+        """
+        if self._index_version != self.version:
+            self._index.rebuild(self._obstacles)
+            self._index_version = self.version
+        return self._index
 
+    @property
+    def obstacle_boxes(self) -> np.ndarray:
+        """
+        (N, 4) array of obstacle (left, top, right, bottom), cached per version.
+        """
+        if self._boxes_version != self.version:
+            self._boxes = rects_to_array(self._obstacles)
+            self._boxes_version = self.version
+        return self._boxes
 
-# Simple environment with obstacles
-class Environment:
-    def __init__(self, obstacles: List[pygame.Rect] = None):
-        self.obstacles = obstacles or []
+    def obstacles_near(self, x: float, y: float, radius: float) -> List[pygame.Rect]:
+        """
+        Candidate obstacles that may touch the circle at (x, y).
+        """
+        return self.index.query_circle(x, y, radius)
+
+    def circle_collides(
+        self,
+        x: float,
+        y: float,
+        radius: float,
+        candidates: Optional[List[pygame.Rect]] = None,
+    ) -> bool:
+        """
+        True if the circle touches an obstacle rect or a loaded wall cell.
+
+        `candidates` may pass rects prefetched from the spatial hash for an
+        area containing the circle.
+        """
+        if candidates is None:
+            candidates = self.obstacles_near(x, y, radius)
+        if any(circle_rect_collision(x, y, radius, obs) for obs in candidates):
+            return True
+        return self.static_grid is not None and bool(
+            self.static_grid.circles_hit(x, y, radius)[0]
+        )
+
+    def swept_circle_toi(
+        self,
+        x0: float,
+        y0: float,
+        x1: float,
+        y1: float,
+        radius: float,
+        candidates: Optional[List[pygame.Rect]] = None,
+    ) -> float:
+        """
+        Fraction of the move from (x0, y0) to (x1, y1) at which a circle of
+        `radius` first touches an obstacle rect or wall cell, inf if it
+        touches none.
+
+        `candidates` may pass rects prefetched for an area containing the
+        swept circle.
+        """
+        if candidates is None:
+            candidates = self.index.query_rect(
+                min(x0, x1) - radius,
+                min(y0, y1) - radius,
+                max(x0, x1) + radius,
+                max(y0, y1) + radius,
+            )
+        # the swept circle lies within `reach` of the end point; only
+        # obstacles inside that circle need the exact sweep
+        reach = radius + math.hypot(x1 - x0, y1 - y0)
+        near = [obs for obs in candidates if circle_rect_collision(x1, y1, reach, obs)]
+        toi = math.inf
+        if near:
+            toi = float(
+                swept_circle_toi(x0, y0, x1, y1, radius, rects_to_array(near))[0]
+            )
+        static = self.static_grid
+        if static is not None:
+            cs = static.cell_size
+            c0 = max(0, int((min(x0, x1) - radius) // cs))
+            r0 = max(0, int((min(y0, y1) - radius) // cs))
+            c1 = int((max(x0, x1) + radius) // cs) + 1
+            r1 = int((max(y0, y1) + radius) // cs) + 1
+            if static.cells[r0:r1, c0:c1].any():
+                toi = min(
+                    toi, float(static.swept_circles_toi(x0, y0, x1, y1, radius)[0])
+                )
+        return toi
+
+    def costmap(self, robot_radius: float) -> Costmap:
+        """
+        Costmap inflated for `robot_radius`, computed once per map version.
+        """
+        grid = self.grid
+        cm = self._costmaps.get(robot_radius)
+        if cm is None or cm.version != grid.version:
+            cm = Costmap(grid, robot_radius)
+            self._costmaps[robot_radius] = cm
+        return cm
 
     def draw(self, surface: pygame.Surface, color=(200, 60, 80)):
         for obs in self.obstacles:
@@ -235,32 +454,131 @@ class Environment:
 
 # Main simulation class
 class Simulation:
-    def __init__(self, width: int = 800, height: int = 600):
-        pygame.init()
-        self.screen = pygame.display.set_mode((width, height))
+    def __init__(
+        self,
+        width: int = 800,
+        height: int = 600,
+        planner: str = "astar",
+        smooth_paths: bool = True,
+        plan_cache_size: int = 128,
+        headless: bool = False,
+        fixed_dt: float = 1 / 30,
+        fleet_size: int = 0,
+        fleet_seed: int = 0,
+        debug_overlay: bool = False,
+        render_fps: int = 60,
+        max_frame_time: float = 0.25,
+        max_substeps: int = 8,
+        map_path: Optional[str] = None,
+        map_cell_size: int = 20,
+        live_mapping: bool = False,
+        memory_path: Optional[str] = None,
+    ):
+        # Headless mode never creates a display: no window, no event polling,
+        # no drawing, and each step advances a fixed virtual dt without
+        # waiting on the frame clock.
+        self.headless = headless
+        # Physics always advances in steps of fixed_dt. With a display, frame
+        # time is accumulated and drained in fixed steps, and the frame is
+        # drawn interpolated between the last two physics states.
+        self.fixed_dt = fixed_dt
+        self.render_fps = render_fps  # frame cap, 0 for uncapped
+        self.max_frame_time = max_frame_time  # longer stalls are clamped
+        # physics steps per frame before a render is dropped
+        self.max_substeps = max_substeps
+        self._accumulator = 0.0
+        self.frames = 0
+        self.dropped_frames = 0
+        if headless:
+            self.screen = None
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode((width, height))
+            pygame.display.set_caption("LLM on Wheels - Exploration Simulation")
         # store dimensions for rendering
         self.width = width
         self.height = height
-        pygame.display.set_caption("LLM on Wheels - Exploration Simulation")
         self.clock = pygame.time.Clock()
         self.running = False
-        # initialize robot in center
-        self.robot = Robot(width / 2, height / 2)
-        # example static obstacles
-        obs1 = pygame.Rect(100, 100, 50, 50)
-        obs2 = pygame.Rect(500, 300, 100, 20)
-        self.env = Environment([obs1, obs2])
+        # Simulated vs wall-clock time, for realtime-factor reporting
+        self.sim_time = 0.0
+        self.steps = 0
+        self._wall_start: Optional[float] = None
+        # Obstacles considered by the collision check (last frame / cumulative)
+        self.collision_candidates = 0
+        self.total_collision_candidates = 0
+        self.map_path = map_path
+        self.map_cell_size = map_cell_size
+        if map_path:
+            # floor plan loaded from an occupancy image / array; the world can
+            # be much larger than the window
+            self.env = Environment.from_map(map_path, map_cell_size)
+            self.robot = Robot(self.env.width / 2, self.env.height / 2)
+            costmap = self.env.costmap(self.robot.radius)
+            start = costmap.nearest_free(
+                costmap.grid.to_cell((self.robot.x, self.robot.y))
+            )
+            if start is not None:
+                self.robot.x, self.robot.y = costmap.grid.to_point(start)
+        else:
+            # initialize robot in center
+            self.robot = Robot(width / 2, height / 2)
+            # example static obstacles
+            obs1 = pygame.Rect(100, 100, 50, 50)
+            obs2 = pygame.Rect(500, 300, 100, 20)
+            self.env = Environment([obs1, obs2], width, height)
+        # Camera over the world; follows robot 0 when the world exceeds the window
+        self.viewport = Viewport(width, height, self.env.width, self.env.height)
+        self.follow_robot = True
+        self.viewport.center_on(self.robot.x, self.robot.y)
+        # Fleet mode: robots live in struct-of-arrays state, robot 0 at center
+        self.fleet: Optional[Fleet] = None
+        if fleet_size > 0:
+            positions = spawn_positions(
+                self.env.costmap(self.robot.radius),
+                fleet_size,
+                (self.robot.x, self.robot.y),
+                seed=fleet_seed,
+            )
+            self.fleet = Fleet(positions, radius=self.robot.radius)
+            self.robot = self.fleet.robot(0)
+        # path planner engine ("astar", "jps" or "theta") and its last result
+        self.planner = get_planner(planner).name
+        # prune collinear / line-of-sight-redundant waypoints after planning
+        self.smooth_paths = smooth_paths
+        # LRU cache of planned paths, flushed whenever the map version changes
+        self.plan_cache = PlanCache(maxsize=plan_cache_size)
+        self.last_plan: Optional[PlanResult] = None
+        # Dynamic obstacles by id, see add_dynamic_obstacle()
+        self.dynamic_obstacles: Dict[int, pygame.Rect] = {}
+        self._next_obstacle_id = 0
+        # When the map changes under an active path that it now blocks, the
+        # path is repaired with a per-robot D* Lite search (created on the
+        # first repair of a goal, then updated incrementally)
+        self.repair_paths = True
+        self._nav_goals: Dict[int, Tuple[float, float, float]] = {}
+        self._replanners: Dict[int, DStarLite] = {}
+        self._repair_version = None
+        self._repair_costmaps: Dict[float, Costmap] = {}
+        self.repairs = 0
+        self.repair_expanded = 0
+        self.last_repair_expanded = 0
         # UI elements
         pygame.freetype.init()
+        # rendered text surfaces, reused across frames
+        self.text_cache = TextCache()
+        self.show_debug_overlay = debug_overlay
         self.font = pygame.freetype.SysFont("Arial", 16)
         self.title_font = pygame.freetype.SysFont("Arial", 20, bold=True)
         self.button_font = pygame.freetype.SysFont("Arial", 16, bold=True)
         # Create a properly sized button - measure text first to ensure proper sizing
-        text_rect = self.button_font.get_rect("Record Audio")
+        text_rect = self.text_cache.get_rect(self.button_font, "Record Audio")
         button_width = text_rect.width + 30  # Add padding
         button_height = text_rect.height + 20  # Add padding
         self.record_button = pygame.Rect(20, 20, button_width, button_height)
         self.record_pressed = False
+        # Bumped on every change to the objects; the scan index is keyed on it
+        self.objects_version = 0
         # Initialize objects for detection (example static objects)
         cup_rect = pygame.Rect(200, 150, 20, 20)
         book_rect = pygame.Rect(600, 400, 30, 20)
@@ -273,11 +591,34 @@ class Simulation:
                 "confidence": 0.85,
             },
         ]
-        # Memory storage for mapped objects
-        self.memory_data: dict = {}
+        # Indexed storage for mapped objects, persisted to an SQLite file
+        # when memory_path is set (see memory_data for the nested dict)
+        self.memory_path = memory_path
+        if memory_path:
+            self.memory = SqliteMemoryStore(memory_path)
+            print(
+                f"[Simulation] Opened memory {memory_path} ({len(self.memory)} entries)"
+            )
+        else:
+            self.memory = MemoryStore()
+        self._memory_data: Tuple[Optional[int], dict] = (None, {})
+        # similarity index over the stored labels, caught up on each search
+        self.label_index = LabelIndex()
+        # Range sensor casting rays from every robot; its scans build a
+        # probabilistic occupancy map and add the objects in line of sight
+        # to memory. Scans run on "Map Area", or every physics step
+        # with live_mapping.
+        self.sensor = RangeSensor()
+        self.live_mapping = live_mapping
+        self.prob_map: Optional[ProbabilisticMap] = None
+        self._object_index = SpatialHash()
+        self._object_index_version = -1
+        self._objects_by_rect: Dict[int, dict] = {}
+        self.rays_cast = 0
+        self.mapping_time = 0.0
         # Create Map Area button below Record Audio
         map_text = "Map Area"
-        text_rect2 = self.button_font.get_rect(map_text)
+        text_rect2 = self.text_cache.get_rect(self.button_font, map_text)
         map_w = text_rect2.width + 30
         map_h = text_rect2.height + 20
         self.map_button = pygame.Rect(20, self.record_button.bottom + 10, map_w, map_h)
@@ -295,16 +636,54 @@ class Simulation:
             "robot": (0, 160, 230),
             "heading": (255, 255, 255),
             "obstacle": (200, 60, 80),
+            "wall": (90, 90, 110),
         }
+        # Map layer rendered in world tiles, culled to the viewport
+        self.map_tiles = MapTiles(self.env, self.colors)
+        # Binary trajectory log, see start_recording()
+        self.recorder: Optional[TrajectoryRecorder] = None
+        self._recorded_map_version: Optional[int] = None
+        # Robot poses before the last physics step, and the interpolated
+        # (x, y, theta) poses of the frame being drawn
+        self._prev_poses = self._poses()
+        self._frame_poses: List[Tuple[int, Tuple[float, float, float]]] = []
+        # Cached static layer and the dynamic areas drawn in the last frame
+        self._static_layer: Optional[pygame.Surface] = None
+        self._static_layer_key_value: Optional[tuple] = None
+        self._dirty_rects: List[pygame.Rect] = []
+        # Calls queued by other threads, run at the start of every step, and
+        # the robot states published for them after every step
+        self.commands = CommandQueue()
+        # the thread stepping the simulation (the creating thread until then)
+        self._step_thread = threading.get_ident()
+        self._planner_pool: Optional[ThreadPoolExecutor] = None
+        # process pool of plan_paths_batch(), started on first use
+        self._batch_pool: Optional[ProcessPoolExecutor] = None
+        self._nav_tickets: Dict[int, object] = {}
+        # completion handles of the robots' current nav goals
+        self._nav_handles: Dict[int, NavHandle] = {}
+        self.snapshot: Optional[SimSnapshot] = None
+        self.publish_snapshot()
 
     def handle_events(self) -> List[pygame.event.EventType]:
         """
         Poll events, handle quit, and return all events for external UI.
         """
+        if self.headless:
+            return []
         events = pygame.event.get()
         for event in events:
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.show_debug_overlay = not self.show_debug_overlay
+            elif event.type == pygame.KEYDOWN and event.key in _PAN_KEYS:
+                # arrow keys pan by a quarter window and stop following
+                dx, dy = _PAN_KEYS[event.key]
+                self.viewport.pan(dx * self.width // 4, dy * self.height // 4)
+                self.follow_robot = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_c:
+                self.follow_robot = True
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if self.record_button.collidepoint(event.pos):
                     self.record_pressed = True
@@ -314,86 +693,350 @@ class Simulation:
 
     def map_area(self):
         """
-        Simulate object detection and build memory data.
+        Survey the area around every robot and record the objects in sight
+        in memory data.
         """
-        data = {"object_instances": {}}
-        for obj in self.objects:
-            cx, cy = obj["rect"].center
-            entry = {
-                "entry_id": obj["entry_id"],
-                "entry_type": "object",
-                "label": obj["label"],
-                "confidence": obj["confidence"],
-                "map_coordinates": {"x": float(cx), "y": float(cy), "theta": 0.0},
-                "timestamp": "",
-                "detected_in_images": [],
-            }
-            data["object_instances"][obj["entry_id"]] = entry
-        self.memory_data = data
-        print(f"[Simulation] Mapped area: {len(self.objects)} objects detected")
+        changed = self.scan(survey=True)
+        print(
+            f"[Simulation] Mapped area: {changed} objects added or updated "
+            f"({len(self.memory)} in memory)"
+        )
         self.map_pressed = False
 
-    def update(self, dt: float):
-        prev_x, prev_y, prev_theta = self.robot.x, self.robot.y, self.robot.theta
-        self.robot.update(dt)
-        # Detect collision with any obstacle and revert if needed
-        for obs in self.env.obstacles:
-            if circle_rect_collision(
-                self.robot.x, self.robot.y, self.robot.radius, obs
-            ):
-                # collision: revert position and cancel navigation
-                self.robot.x, self.robot.y, self.robot.theta = (
-                    prev_x,
-                    prev_y,
-                    prev_theta,
+    @property
+    def memory_data(self) -> dict:
+        """
+        Mapped memory as {"object_instances": {entry_id: entry}}, rebuilt
+        from the memory store when it has changed. This is the full dump
+        behind get_memory_data_from_sim (a persisted store pages in every
+        entry); lookups and travel distances use the store's indexes.
+        """
+        version, data = self._memory_data
+        if version != self.memory.version:
+            with self.memory.snapshot() as snapshot:
+                version, data = snapshot.version, snapshot.to_memory_data()
+            # one tuple assignment, so readers on other threads see either
+            # the old or the new pair
+            self._memory_data = (version, data)
+        return data
+
+    def search_memory(
+        self,
+        label: str,
+        entity_type: Optional[str] = None,
+        k: int = 5,
+        min_score: float = 0.65,
+        snapshot=None,
+    ) -> List[dict]:
+        """
+        Memory entries whose label is similar to `label` ("mugs" finds
+        "cup"), from the `k` best matching labels scoring at least
+        `min_score`, best first. Each entry is copied with "matched_label"
+        and "label_score" fields. Searches `snapshot` if given, else the
+        current memory.
+        """
+        if snapshot is None:
+            with self.memory.snapshot() as current:
+                return self.search_memory(label, entity_type, k, min_score, current)
+        # labels only ever accumulate, so an index synced with the current
+        # store covers every older snapshot too
+        self.label_index.sync(self.memory)
+        results = []
+        for matched, score in self.label_index.search(label, k, min_score):
+            for entry in snapshot.query(entity_type, matched):
+                results.append(
+                    {**entry, "matched_label": matched, "label_score": score}
                 )
-                self.robot.nav_status = "FAILED"
-                self.robot.path = []
-                self.robot.path_index = 0
-                break
+        return results
 
-    def draw(self):
-        # clear background and draw grid
-        self.screen.fill(self.colors["background"])
-        grid_size = 50
-        for x in range(0, self.width + grid_size, grid_size):
-            pygame.draw.line(self.screen, self.colors["grid"], (x, 0), (x, self.height))
-        for y in range(0, self.height + grid_size, grid_size):
-            pygame.draw.line(self.screen, self.colors["grid"], (0, y), (self.width, y))
+    def scan(self, survey: bool = False) -> int:
+        """
+        Cast one sensor scan from every robot, update the probabilistic map
+        with the cells the rays crossed and stopped in, and record the
+        objects in line of sight in memory data. With `survey`, also scan
+        from the free viewpoints around the robots (survey_poses), so objects
+        hidden from where the robots stand are found too.
+
+        Returns how many objects were added or changed (e.g. moved).
+        """
+        start = time.perf_counter()
+        grid = self.env.grid
+        if self.prob_map is None:
+            self.prob_map = ProbabilisticMap.like(grid)
+        xs, ys, thetas = self._poses()
+        if survey:
+            vx, vy, vt = self.survey_poses()
+            xs, ys, thetas = (
+                np.concatenate((xs, vx)),
+                np.concatenate((ys, vy)),
+                np.concatenate((thetas, vt)),
+            )
+        self._sync_object_index()
+        hits = self.sensor.scan(grid, xs, ys, thetas)
+        self.prob_map.update(hits.free_cells, hits.hit_cells)
+        self.rays_cast += len(hits.ranges)
+        found = {}
+        for x, y, theta in zip(xs.tolist(), ys.tolist(), thetas.tolist()):
+            for obj in self._objects_in_view(grid, x, y, theta):
+                if obj["entry_id"] in found:
+                    continue
+                entry = self._object_entry(obj)
+                # only entries that are new or differ (e.g. moved) make a
+                # new memory version
+                if self.memory.get(obj["entry_id"]) != entry:
+                    found[obj["entry_id"]] = entry
+        self.mapping_time += time.perf_counter() - start
+        if found:
+            self.memory.upsert_many(found.values())
+            # the memory list is part of the static layer
+            self.invalidate_static_layer()
+        return len(found)
+
+    def survey_poses(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Viewpoints a robot could stand at within sensor range of the robots:
+        free points (for the robot footprint) of a world-aligned lattice
+        spaced half the sensor range, so nearby robots share viewpoints.
+        Each gets enough headings for its scans to cover a full turn.
+        """
+        spacing = self.sensor.max_range / 2
+        reach = self.sensor.max_range
+        costmap = self.env.costmap(self.robot.radius)
+        grid = costmap.grid
+        robot_xs, robot_ys, _ = self._poses()
+        points = set()
+        for x, y in zip(robot_xs.tolist(), robot_ys.tolist()):
+            for i in range(
+                math.ceil((x - reach) / spacing), math.floor((x + reach) / spacing) + 1
+            ):
+                for j in range(
+                    math.ceil((y - reach) / spacing),
+                    math.floor((y + reach) / spacing) + 1,
+                ):
+                    px, py = i * spacing, j * spacing
+                    if math.hypot(px - x, py - y) <= reach:
+                        points.add((px, py))
+        free = [
+            (px, py)
+            for px, py in sorted(points)
+            if 0 <= px < self.env.width
+            and 0 <= py < self.env.height
+            and not costmap.lethal[grid.to_cell((px, py))[::-1]]
+        ]
+        headings = np.arange(0.0, 360.0, min(self.sensor.fov, 360.0))
+        n = len(headings)
+        xs = np.repeat(np.array([p[0] for p in free], dtype=np.float64), n)
+        ys = np.repeat(np.array([p[1] for p in free], dtype=np.float64), n)
+        return xs, ys, np.tile(headings, len(free))
+
+    @property
+    def objects(self) -> List[dict]:
+        return self._objects
+
+    @objects.setter
+    def objects(self, objects: List[dict]):
+        self._objects = list(objects)
+        self.mark_objects_dirty()
+
+    def mark_objects_dirty(self):
+        """
+        Reindex the objects for scans. Call after mutating them in place.
+        """
+        self.objects_version += 1
+
+    def move_object(self, entry_id: str, x: int, y: int):
+        """
+        Move an object's rect (in place) so its top-left corner is at (x, y).
+        """
+        for obj in self._objects:
+            if obj["entry_id"] == entry_id:
+                obj["rect"].topleft = (x, y)
+                self.mark_objects_dirty()
+                return
+        raise KeyError(entry_id)
+
+    def _sync_object_index(self):
+        # rebuild the spatial hash over the objects when they have changed
+        if self._object_index_version != self.objects_version:
+            self._object_index.rebuild(obj["rect"] for obj in self._objects)
+            self._objects_by_rect = {id(obj["rect"]): obj for obj in self._objects}
+            self._object_index_version = self.objects_version
+
+    def _objects_in_view(
+        self, grid: OccupancyGrid, x: float, y: float, theta: float
+    ) -> List[dict]:
+        """
+        Objects whose center the sensor at (x, y, theta) can see (through the
+        object index, see _sync_object_index).
+        """
+        rects = self._object_index.query_circle(x, y, self.sensor.max_range)
+        if not rects:
+            return []
+        centers = np.array([r.center for r in rects], dtype=np.float64)
+        seen = self.sensor.in_view(x, y, theta, centers[:, 0], centers[:, 1], grid)
+        return [self._objects_by_rect[id(r)] for r, s in zip(rects, seen.tolist()) if s]
+
+    @staticmethod
+    def _object_entry(obj: dict) -> dict:
+        cx, cy = obj["rect"].center
+        return {
+            "entry_id": obj["entry_id"],
+            "entry_type": "object",
+            "label": obj["label"],
+            "confidence": obj["confidence"],
+            "map_coordinates": {"x": float(cx), "y": float(cy), "theta": 0.0},
+            "timestamp": "",
+            "detected_in_images": [],
+        }
+
+    def get_robot(self, robot_id: int = 0):
+        """
+        Return the robot addressed by `robot_id` (a FleetRobot view in fleet mode).
+        """
+        if self.fleet is not None:
+            return self.fleet.robot(robot_id)
+        if robot_id != 0:
+            raise IndexError(f"robot_id {robot_id} out of range (single robot)")
+        return self.robot
+
+    @property
+    def robot_count(self) -> int:
+        return self.fleet.size if self.fleet is not None else 1
+
+    def memory_travel_distances(
+        self, robot_id: int = 0, entry_ids: Optional[List[str]] = None
+    ) -> Dict[str, Optional[float]]:
+        """
+        Path distance from the robot to the given (default: every) mapped
+        memory entry.
+
+        Runs a single Dijkstra flood from the robot's cell over the cached
+        costmap instead of one plan per entry. Unreachable entries map to None.
+        """
+        return travel_distances(*self._travel_distance_args(robot_id, entry_ids))
+
+    def request_travel_distances(
+        self, robot_id: int = 0, entry_ids: Optional[List[str]] = None
+    ) -> Future:
+        """
+        Like memory_travel_distances, but the flood runs on the planner
+        thread against the current costmap and robot position, so the
+        simulation keeps stepping. Returns a Future of the distances.
+        """
+        return self._planner_executor().submit(
+            travel_distances, *self._travel_distance_args(robot_id, entry_ids)
+        )
+
+    def _travel_distance_args(self, robot_id: int, entry_ids: Optional[List[str]]):
+        # (start, goals, costmap) for travel_distances; the costmap of a map
+        # version is never modified, so other threads can flood it
+        if entry_ids is None:
+            # straight from the position index, without decoding entries
+            goals = self.memory.positions()
+        else:
+            goals = {}
+            for entry in map(self.memory.get, entry_ids):
+                if entry is not None:
+                    coords = entry.get("map_coordinates", {})
+                    goals[entry["entry_id"]] = (
+                        coords.get("x", 0.0),
+                        coords.get("y", 0.0),
+                    )
+        robot = self.get_robot(robot_id)
+        return (robot.x, robot.y), goals, self.env.costmap(robot.radius)
+
+    def update(self, dt: float):
+        if self.repair_paths and self.env.version != self._repair_version:
+            self._repair_blocked_paths()
+        if self.fleet is not None:
+            # one vectorized step for every robot in the fleet
+            self.fleet.update(
+                dt,
+                self.env.obstacle_boxes,
+                self.env.costmap(self.fleet.radius),
+                self.env.static_grid,
+            )
+            self.collision_candidates = self.fleet.collision_candidates
+            self.total_collision_candidates += self.collision_candidates
+            return
+        robot = self.robot
+        prev_x, prev_y = robot.x, robot.y
+        robot.update(dt)
+        # Sweep the robot's circle along the step against nearby obstacles
+        # (spatial hash), so a large dt cannot tunnel through thin ones
+        r = robot.radius
+        candidates = self.env.index.query_rect(
+            min(prev_x, robot.x) - r,
+            min(prev_y, robot.y) - r,
+            max(prev_x, robot.x) + r,
+            max(prev_y, robot.y) + r,
+        )
+        self.collision_candidates = len(candidates)
+        self.total_collision_candidates += len(candidates)
+        toi = self.env.swept_circle_toi(prev_x, prev_y, robot.x, robot.y, r, candidates)
+        if toi <= 1.0:
+            # collision: stop at the point of impact and cancel navigation
+            t = float(contact_fraction(prev_x, prev_y, robot.x, robot.y, toi))
+            robot.x = prev_x + (robot.x - prev_x) * t
+            robot.y = prev_y + (robot.y - prev_y) * t
+            robot.nav_status = "FAILED"
+            robot.path = []
+            robot.path_index = 0
+
+    def _panel_rect(self) -> pygame.Rect:
+        panel_width = 250
+        panel_height = 100
+        return pygame.Rect(self.width - panel_width - 20, 20, panel_width, panel_height)
+
+    def invalidate_static_layer(self):
+        """
+        Force the cached static layer to be rebuilt on the next draw.
+        """
+        self._static_layer = None
+
+    def _static_layer_key(self) -> tuple:
+        # everything baked into the static layer; any change triggers a rebuild
+        mouse = pygame.mouse.get_pos()
+        return (
+            self.screen.get_size(),
+            self.viewport.offset,
+            self.env.version,
+            tuple((obj["label"], tuple(obj["rect"])) for obj in self.objects),
+            self.record_button.collidepoint(mouse),
+            self.map_button.collidepoint(mouse),
+        )
+
+    def _render_static_layer(self) -> pygame.Surface:
+        """
+        Composite the visible map tiles, title, objects, buttons, the info
+        panel background and the memory list into one Surface.
+        """
+        surface = pygame.Surface(self.screen.get_size()).convert()
+        # background, grid, walls and obstacles of the visible world area
+        surface.fill(self.colors["background"])
+        self.map_tiles.draw(surface, self.viewport)
 
         # draw title
         title_text = "LLM on Wheels - Exploration Mode"
-        title_rect = self.title_font.get_rect(title_text)
+        title_rect = self.text_cache.get_rect(self.title_font, title_text)
         title_pos = (self.width // 2 - title_rect.width // 2, 20)
-        self.title_font.render_to(
-            self.screen, title_pos, title_text, self.colors["text"]
+        self.text_cache.render_to(
+            surface, title_pos, self.title_font, title_text, self.colors["text"]
         )
 
-        # draw environment
-        self.env.draw(self.screen, self.colors["obstacle"])
-        # draw objects (detectable entities)
+        # draw objects (detectable entities) in view
+        view = self.viewport.rect
         for obj in self.objects:
-            pygame.draw.rect(self.screen, (255, 200, 0), obj["rect"])
+            if not view.colliderect(obj["rect"].inflate(0, 40)):
+                continue
+            rect = obj["rect"].move(-view.x, -view.y)
+            pygame.draw.rect(surface, (255, 200, 0), rect)
             # label above object
             label = obj["label"]
-            pos = (obj["rect"].x, obj["rect"].y - 5)
-            self.font.render_to(self.screen, pos, label, self.colors["text"])
-
-        # draw planned path
-        if self.robot.path:
-            # connect waypoints
-            for i in range(len(self.robot.path) - 1):
-                start = (int(self.robot.path[i][0]), int(self.robot.path[i][1]))
-                end = (int(self.robot.path[i + 1][0]), int(self.robot.path[i + 1][1]))
-                pygame.draw.line(self.screen, (0, 255, 0), start, end, 2)
-            # mark waypoints
-            for wp in self.robot.path:
-                pygame.draw.circle(
-                    self.screen, (255, 255, 0), (int(wp[0]), int(wp[1])), 3
-                )
-
-        # draw robot
-        self.robot.draw(self.screen, self.colors)
+            pos = (rect.x, rect.y - 5)
+            self.text_cache.render_to(
+                surface, pos, self.font, label, self.colors["text"]
+            )
 
         # draw record button with rounded corners and hover effect
         is_hover = self.record_button.collidepoint(pygame.mouse.get_pos())
@@ -409,23 +1052,24 @@ class Simulation:
             pygame.draw.rect(
                 glow_surf, (100, 140, 255, 150), glow_surf.get_rect(), border_radius=10
             )
-            self.screen.blit(glow_surf, glow_rect.topleft)
+            surface.blit(glow_surf, glow_rect.topleft)
 
-        pygame.draw.rect(self.screen, btn_color, self.record_button, border_radius=8)
+        pygame.draw.rect(surface, btn_color, self.record_button, border_radius=8)
         pygame.draw.rect(
-            self.screen, (255, 255, 255), self.record_button, 2, border_radius=8
+            surface, (255, 255, 255), self.record_button, 2, border_radius=8
         )
 
         # Center text in button
         button_text = "Record Audio"
-        text_rect = self.button_font.get_rect(button_text)
+        text_rect = self.text_cache.get_rect(self.button_font, button_text)
         text_pos = (
             self.record_button.x + (self.record_button.width - text_rect.width) // 2,
             self.record_button.y + (self.record_button.height - text_rect.height) // 2,
         )
-        self.button_font.render_to(
-            self.screen,
+        self.text_cache.render_to(
+            surface,
             text_pos,
+            self.button_font,
             button_text,
             self.colors["button_text"],
         )
@@ -435,95 +1079,459 @@ class Simulation:
         btn_color_map = (
             self.colors["button_hover"] if is_hover_map else self.colors["button"]
         )
-        pygame.draw.rect(self.screen, btn_color_map, self.map_button, border_radius=8)
-        pygame.draw.rect(
-            self.screen, (255, 255, 255), self.map_button, 2, border_radius=8
-        )
+        pygame.draw.rect(surface, btn_color_map, self.map_button, border_radius=8)
+        pygame.draw.rect(surface, (255, 255, 255), self.map_button, 2, border_radius=8)
         # map button text
-        text_rect2 = self.button_font.get_rect("Map Area")
+        text_rect2 = self.text_cache.get_rect(self.button_font, "Map Area")
         text_pos2 = (
             self.map_button.x + (self.map_button.width - text_rect2.width) // 2,
             self.map_button.y + (self.map_button.height - text_rect2.height) // 2,
         )
-        self.button_font.render_to(
-            self.screen, text_pos2, "Map Area", self.colors["button_text"]
+        self.text_cache.render_to(
+            surface, text_pos2, self.button_font, "Map Area", self.colors["button_text"]
         )
 
         # draw info panel with semi-transparent background
-        panel_width = 250
-        panel_height = 100
-        panel_rect = pygame.Rect(
-            self.width - panel_width - 20, 20, panel_width, panel_height
-        )
+        panel_rect = self._panel_rect()
         panel_surf = pygame.Surface(
             (panel_rect.width, panel_rect.height), pygame.SRCALPHA
         )
         panel_surf.fill(self.colors["panel"])
-        self.screen.blit(panel_surf, panel_rect.topleft)
+        surface.blit(panel_surf, panel_rect.topleft)
 
         # Panel header
         panel_header = "Robot Status"
-        self.button_font.render_to(
-            self.screen,
+        self.text_cache.render_to(
+            surface,
             (panel_rect.x + 10, panel_rect.y + 10),
+            self.button_font,
             panel_header,
             self.colors["text"],
         )
 
+        # display mapped memory data below map button, as many as fit
+        y0 = self.map_button.bottom + 10
+        fit = max(0, (surface.get_height() - y0) // 20)
+        if fit:
+            for i, entry in enumerate(self.memory.query("object", limit=fit)):
+                txt = f"{entry['label']} @ ({entry['map_coordinates']['x']:.0f},{entry['map_coordinates']['y']:.0f})"
+                self.text_cache.render_to(
+                    surface, (20, y0 + i * 20), self.font, txt, self.colors["text"]
+                )
+        return surface
+
+    def _dynamic_rects(self) -> List[pygame.Rect]:
+        """
+        Screen areas touched by the robot(s), the planned path and the
+        status text this frame.
+        """
+        rects = []
+        # glow ring and the heading line (two radii long) plus line width
+        half = int(self.robot.radius) * 2 + 4
+        for _, (x, y, _) in self._frame_poses:
+            rects.append(pygame.Rect(int(x) - half, int(y) - half, 2 * half, 2 * half))
+        path = self._screen_path()
+        for a, b in zip(path, path[1:]):
+            rect = pygame.Rect(
+                int(min(a[0], b[0])),
+                int(min(a[1], b[1])),
+                int(abs(b[0] - a[0])) + 1,
+                int(abs(b[1] - a[1])) + 1,
+            )
+            rects.append(rect.inflate(8, 8))
+        if len(path) == 1:
+            rects.append(pygame.Rect(int(path[0][0]) - 4, int(path[0][1]) - 4, 8, 8))
+        # status lines below the panel header
+        panel_rect = self._panel_rect()
+        rects.append(
+            pygame.Rect(
+                panel_rect.x,
+                panel_rect.y + 30,
+                panel_rect.width,
+                panel_rect.height - 30,
+            )
+        )
+        if self.show_debug_overlay:
+            rects.append(self._debug_overlay_rect())
+        screen = self.screen.get_rect()
+        return [rect.clip(screen) for rect in rects if rect.colliderect(screen)]
+
+    def _screen_path(self) -> List[Tuple[float, float]]:
+        ox, oy = self.viewport.offset
+        return [(x - ox, y - oy) for x, y in self.robot.path]
+
+    def _visible_poses(self) -> List[Tuple[int, Tuple[float, float, float]]]:
+        """
+        (robot index, screen pose) of the interpolated robots in view.
+        """
+        ox, oy = self.viewport.offset
+        margin = self.robot.radius * 2 + 4
+        visible = []
+        for i, (x, y, theta) in enumerate(self._interpolated_poses()):
+            sx, sy = x - ox, y - oy
+            if (
+                -margin <= sx <= self.width + margin
+                and -margin <= sy <= self.height + margin
+            ):
+                visible.append((i, (sx, sy, theta)))
+        return visible
+
+    def _draw_dynamic(self):
+        # draw planned path
+        path = self._screen_path()
+        if path:
+            # connect waypoints
+            for i in range(len(path) - 1):
+                start = (int(path[i][0]), int(path[i][1]))
+                end = (int(path[i + 1][0]), int(path[i + 1][1]))
+                pygame.draw.line(self.screen, (0, 255, 0), start, end, 2)
+            # mark waypoints
+            for wp in path:
+                pygame.draw.circle(
+                    self.screen, (255, 255, 0), (int(wp[0]), int(wp[1])), 3
+                )
+
+        # draw robot(s) in view
+        if self.fleet is not None:
+            for i, pose in self._frame_poses:
+                # Robot.draw only reads pose and radius, so it accepts fleet views
+                Robot.draw(self.fleet.robot(i), self.screen, self.colors, pose)
+        else:
+            for _, pose in self._frame_poses:
+                self.robot.draw(self.screen, self.colors, pose)
+
         # Panel content with more space
+        panel_rect = self._panel_rect()
         pose_text = f"Position: {self.robot.x:.1f}, {self.robot.y:.1f}"
         angle_text = f"Heading: {self.robot.theta:.1f}°"
         status_text = f"Navigation: {self.robot.nav_status}"
 
-        self.font.render_to(
-            self.screen,
-            (panel_rect.x + 10, panel_rect.y + 35),
-            pose_text,
-            self.colors["text"],
+        # status lines re-render only when their formatted text changes
+        for slot, text, dy in (
+            ("pose", pose_text, 35),
+            ("heading", angle_text, 55),
+            ("nav_status", status_text, 75),
+        ):
+            self.text_cache.render_slot_to(
+                slot,
+                self.screen,
+                (panel_rect.x + 10, panel_rect.y + dy),
+                self.font,
+                text,
+                self.colors["text"],
+            )
+
+        if self.show_debug_overlay:
+            self._draw_debug_overlay()
+
+    def _debug_overlay_rect(self) -> pygame.Rect:
+        return pygame.Rect(10, self.height - 90, 300, 80)
+
+    def _draw_debug_overlay(self):
+        """
+        Frame rate and cache hit rates in the bottom-left corner (toggle: F3).
+        """
+        rect = self._debug_overlay_rect()
+        overlay = pygame.Surface(rect.size, pygame.SRCALPHA)
+        overlay.fill(self.colors["panel"])
+        self.screen.blit(overlay, rect.topleft)
+        text_stats = self.text_cache.stats()
+        plan_stats = self.plan_cache.stats()
+        lines = (
+            ("debug_fps", f"FPS: {self.clock.get_fps():.0f}"),
+            (
+                "debug_text",
+                f"Text cache: {text_stats['hit_rate']:.0%} hit "
+                f"({text_stats['size']}/{text_stats['maxsize']})",
+            ),
+            ("debug_slots", f"Status lines: {text_stats['slot_hit_rate']:.0%} reused"),
+            ("debug_plan", f"Plan cache: {plan_stats['hit_rate']:.0%} hit"),
         )
-        self.font.render_to(
-            self.screen,
-            (panel_rect.x + 10, panel_rect.y + 55),
-            angle_text,
-            self.colors["text"],
+        for i, (slot, text) in enumerate(lines):
+            self.text_cache.render_slot_to(
+                slot,
+                self.screen,
+                (rect.x + 8, rect.y + 6 + i * 18),
+                self.font,
+                text,
+                self.colors["text"],
+            )
+
+    def draw(self):
+        """
+        Render a frame from the cached static layer plus dirty rectangles.
+
+        The static layer is rebuilt only when its key changes (window size,
+        map version, objects, button hover) or after invalidate_static_layer();
+        otherwise only the areas covered by last frame's and this frame's
+        robot, path and status text are restored and pushed to the display.
+        """
+        if self.follow_robot:
+            self.viewport.follow(self.robot.x, self.robot.y)
+        self._frame_poses = self._visible_poses()
+        key = self._static_layer_key()
+        if self._static_layer is None or key != self._static_layer_key_value:
+            self._static_layer = self._render_static_layer()
+            self._static_layer_key_value = key
+            self.screen.blit(self._static_layer, (0, 0))
+            self._draw_dynamic()
+            self._dirty_rects = self._dynamic_rects()
+            pygame.display.flip()
+            return
+        rects = self._dynamic_rects()
+        dirty = self._dirty_rects + rects
+        # erase last frame's dynamic content, then draw this frame's on top
+        for rect in dirty:
+            self.screen.blit(self._static_layer, rect, rect)
+        self._draw_dynamic()
+        self._dirty_rects = rects
+        pygame.display.update(dirty)
+
+    def _poses(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self.fleet is not None:
+            return self.fleet.x.copy(), self.fleet.y.copy(), self.fleet.theta.copy()
+        return (
+            np.array([self.robot.x]),
+            np.array([self.robot.y]),
+            np.array([self.robot.theta]),
         )
-        self.font.render_to(
-            self.screen,
-            (panel_rect.x + 10, panel_rect.y + 75),
-            status_text,
-            self.colors["text"],
+
+    def _interpolated_poses(self) -> List[Tuple[float, float, float]]:
+        """
+        Robot poses blended between the previous and the current physics
+        state by the fraction of a step left in the accumulator.
+        """
+        alpha = min(self._accumulator / self.fixed_dt, 1.0)
+        px, py, pt = self._prev_poses
+        x, y, theta = self._poses()
+        if len(px) != len(x):
+            return list(zip(x.tolist(), y.tolist(), theta.tolist()))
+        # blend headings along the shorter arc
+        dtheta = (theta - pt + 540) % 360 - 180
+        return list(
+            zip(
+                (px + (x - px) * alpha).tolist(),
+                (py + (y - py) * alpha).tolist(),
+                ((pt + dtheta * alpha) % 360).tolist(),
+            )
         )
 
-        # display mapped memory data below map button
-        if self.memory_data.get("object_instances"):
-            y0 = self.map_button.bottom + 10
-            for i, entry in enumerate(self.memory_data["object_instances"].values()):
-                txt = f"{entry['label']} @ ({entry['map_coordinates']['x']:.0f},{entry['map_coordinates']['y']:.0f})"
-                self.font.render_to(
-                    self.screen, (20, y0 + i * 20), txt, self.colors["text"]
+    def _physics_step(self, dt: float):
+        if self.recorder is not None:
+            self._record_map_change()
+        self._prev_poses = self._poses()
+        self.update(dt)
+        if self.live_mapping:
+            self.scan()
+        self.sim_time += dt
+        self.steps += 1
+        if self.recorder is not None:
+            self._record_tick()
+
+    def start_recording(self, path: str) -> TrajectoryRecorder:
+        """
+        Log every physics step, nav goal, action and map change to the
+        recording directory `path` (see recorder.Recording / Replay).
+        """
+        self.stop_recording()
+        robots = [self.get_robot(i) for i in range(self.robot_count)]
+        meta = {
+            "width": self.width,
+            "height": self.height,
+            "planner": self.planner,
+            "smooth_paths": self.smooth_paths,
+            "fixed_dt": self.fixed_dt,
+            "map_path": self.map_path,
+            "map_cell_size": self.map_cell_size,
+            "fleet_size": self.fleet.size if self.fleet is not None else 0,
+            "robot_count": self.robot_count,
+            "speeds": [robot.speed for robot in robots],
+            "objects": [
+                {
+                    "entry_id": obj["entry_id"],
+                    "label": obj["label"],
+                    "confidence": obj["confidence"],
+                    "rect": list(obj["rect"]),
+                }
+                for obj in self.objects
+            ],
+        }
+        self.recorder = TrajectoryRecorder(path, meta)
+        self._recorded_map_version = None
+        self._record_map_change()
+        # paths already being followed when recording starts
+        for i, robot in enumerate(robots):
+            remaining = robot.path[robot.path_index :]
+            if remaining:
+                self._record_event(
+                    EVENT_GOAL,
+                    i,
+                    robot_state_codes(robot)[0],
+                    (remaining[-1][0], remaining[-1][1], robot.final_theta),
+                    remaining,
                 )
+        self._record_tick()
+        print(f"[Simulation] Recording trajectory to {path}")
+        return self.recorder
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def _record_event(
+        self, kind: int, robot_id=0, code=0, values=(0.0, 0.0, 0.0), points=None
+    ):
+        self.recorder.record_event(
+            self.steps, self.sim_time, kind, robot_id, code, values, points
+        )
 
-        pygame.display.flip()
+    def _record_map_change(self):
+        if self.env.version == self._recorded_map_version:
+            return
+        self._recorded_map_version = self.env.version
+        boxes = self.env.obstacle_boxes
+        self._record_event(EVENT_MAP, points=boxes.reshape(-1, 2).tolist())
+
+    def _record_tick(self):
+        if self.fleet is not None:
+            fleet = self.fleet
+            self.recorder.record_tick(
+                self.steps,
+                self.sim_time,
+                fleet.x,
+                fleet.y,
+                fleet.theta,
+                fleet.path_index,
+                fleet.nav_status,
+                fleet.action_status,
+                fleet.action,
+            )
+            return
+        robot = self.robot
+        nav, act_status, action = robot_state_codes(robot)
+        self.recorder.record_tick(
+            self.steps,
+            self.sim_time,
+            [robot.x],
+            [robot.y],
+            [robot.theta],
+            [robot.path_index],
+            [nav],
+            [act_status],
+            [action],
+        )
 
     def step(self) -> List[pygame.event.EventType]:
         """
-        Process one frame: poll events, update physics, draw, and return events.
+        Process one frame: poll events, advance physics, draw, and return events.
+
+        In headless mode the frame is exactly one physics step of `fixed_dt`,
+        taken immediately. Otherwise the elapsed frame time (capped at
+        `render_fps`) is consumed in as many `fixed_dt` physics steps as fit,
+        so robot motion does not depend on the frame rate. If physics needs
+        more than `max_substeps` steps the frame is not drawn, leaving the
+        time to catch up.
         """
-        dt = self.clock.tick(30) / 1000.0
+        if self._wall_start is None:
+            self._wall_start = time.perf_counter()
+        self._step_thread = threading.get_ident()
+        # commands queued by other threads since the last tick
+        self.commands.run_pending()
         events = self.handle_events()
         # trigger mapping if requested
         if self.map_pressed:
             self.map_area()
-        self.update(dt)
-        self.draw()
+        if self.headless:
+            self._physics_step(self.fixed_dt)
+            self._end_tick()
+            return events
+        frame_dt = self.clock.tick(self.render_fps) / 1000.0
+        # clamp stalls (window drags, breakpoints) so physics cannot spiral
+        self._accumulator = min(
+            self._accumulator + frame_dt, max(self.max_frame_time, self.fixed_dt)
+        )
+        substeps = 0
+        while self._accumulator >= self.fixed_dt and substeps < self.max_substeps:
+            self._physics_step(self.fixed_dt)
+            self._accumulator -= self.fixed_dt
+            substeps += 1
+        if self._accumulator >= self.fixed_dt:
+            # physics is behind: skip rendering this frame
+            self.dropped_frames += 1
+        else:
+            self.draw()
+            self.frames += 1
+        self._end_tick()
         return events
 
+    def _end_tick(self):
+        self.publish_snapshot()
+        self.commands.resolve()
+        self._update_nav_goals()
+
     def run(self):
         self.running = True
         while self.running:
             self.step()
 
+    def run_for(self, sim_seconds: float, until=None) -> float:
+        """
+        Step until `sim_seconds` of simulated time pass or `until()` is true.
+
+        Returns the simulated time actually advanced. Headless simulations run
+        as fast as the CPU allows.
+        """
+        start = self.sim_time
+        while self.sim_time - start < sim_seconds:
+            if until is not None and until():
+                break
+            self.step()
+        return self.sim_time - start
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Simulated time, wall time and their ratio (simulated seconds per
+        wall-clock second) since the first step.
+        """
+        wall = (
+            time.perf_counter() - self._wall_start
+            if self._wall_start is not None
+            else 0.0
+        )
+        return {
+            "headless": self.headless,
+            "steps": self.steps,
+            "sim_time": self.sim_time,
+            "wall_time": wall,
+            "realtime_factor": self.sim_time / wall if wall > 0 else 0.0,
+            "frames": self.frames,
+            "dropped_frames": self.dropped_frames,
+            "repairs": self.repairs,
+            "repair_expanded": self.repair_expanded,
+            "last_repair_expanded": self.last_repair_expanded,
+            "rays_cast": self.rays_cast,
+            "rays_per_second": (
+                self.rays_cast / self.mapping_time if self.mapping_time > 0 else 0.0
+            ),
+            "collision_candidates": self.collision_candidates,
+            "mean_collision_candidates": (
+                self.total_collision_candidates / self.steps if self.steps else 0.0
+            ),
+        }
+
     def shutdown(self):
+        self.commands.cancel_pending()
+        for handle in self._nav_handles.values():
+            handle.future.cancel()
+        self._nav_handles.clear()
+        if self._planner_pool is not None:
+            self._planner_pool.shutdown(wait=False, cancel_futures=True)
+        if self._batch_pool is not None:
+            self._batch_pool.shutdown(cancel_futures=True)
+            self._batch_pool = None
+        self.stop_recording()
+        self.memory.close()
         pygame.quit()
 
     def get_and_clear_record_flag(self) -> bool:
@@ -534,34 +1542,559 @@ class Simulation:
         self.record_pressed = False
         return flag
 
-    def send_nav_goal(self, x: float, y: float, theta: float):
+    def _segment_clear(
+        self, a: Tuple[float, float], b: Tuple[float, float], radius: float
+    ) -> bool:
+        """
+        True if a circle of `radius` moved from a to b touches no obstacle.
+        """
+        length = math.hypot(b[0] - a[0], b[1] - a[1])
+        candidates = self.env.index.query_rect(
+            min(a[0], b[0]) - radius,
+            min(a[1], b[1]) - radius,
+            max(a[0], b[0]) + radius,
+            max(a[1], b[1]) + radius,
+        )
+        # sample the segment densely enough that no obstacle can slip between
+        samples = max(1, int(math.ceil(length / (radius / 2))))
+        for k in range(samples + 1):
+            t = k / samples
+            px, py = a[0] + (b[0] - a[0]) * t, a[1] + (b[1] - a[1]) * t
+            if self.env.circle_collides(px, py, radius, candidates):
+                return False
+        return True
+
+    def send_nav_goal(
+        self, x: float, y: float, theta: float, robot_id: int = 0
+    ) -> NavHandle:
         """
         Plan obstacle-avoiding path and set robot path.
+
+        Returns a NavHandle resolved with the final nav status.
         """
+        robot = self.get_robot(robot_id)
+        handle = self._track_nav_goal(robot_id)
         # Debug: planning path
         print(
-            f"[Simulation] send_nav_goal: planning from ({self.robot.x:.1f}, {self.robot.y:.1f}) to ({x:.1f}, {y:.1f})"
+            f"[Simulation] send_nav_goal: planning from ({robot.x:.1f}, {robot.y:.1f}) to ({x:.1f}, {y:.1f})"
         )
         # compute path waypoints
-        path = plan_path(
-            (self.robot.x, self.robot.y),
+        # grid and costmap are cached by the environment until obstacles change
+        costmap = self.env.costmap(robot.radius)
+        result = plan_path(
+            (robot.x, robot.y),
             (x, y),
-            self.env.obstacles,
-            self.width,
-            self.height,
+            costmap,
+            self.planner,
+            smooth=self.smooth_paths,
+            cache=self.plan_cache,
         )
+        # supersedes a goal still being planned by request_nav_goal
+        self._nav_tickets.pop(robot_id, None)
+        self._install_path(robot_id, x, y, theta, result)
+        return handle
+
+    def _install_path(
+        self, robot_id: int, x: float, y: float, theta: float, result: PlanResult
+    ):
+        """
+        Set a planned path (or the failure) as the robot's navigation.
+        """
+        robot = self.get_robot(robot_id)
+        self.last_plan = result
+        goal = self._nav_goals[robot_id] = (x, y, theta)
+        self._replanners.pop(robot_id, None)
+        path = list(result.path)
+        if path and self.repair_paths:
+            # start the goal's incremental search on the planner thread, so
+            # the first repair after a map change is already incremental
+            searched = self._planner_executor().submit(
+                _goal_replanner,
+                self.env.costmap(robot.radius),
+                (robot.x, robot.y),
+                (x, y),
+            )
+            searched.add_done_callback(
+                lambda done: self.commands.submit(
+                    self._install_replanner, robot_id, goal, done
+                )
+            )
         if path:
-            # Replace last waypoint (cell center) with exact goal to avoid half-cell offset
-            path[-1] = (x, y)
+            self._pin_goal(path, x, y, robot)
             print(
-                f"[Simulation] Path found with {len(path)} waypoints (adjusted final waypoint to exact target)"
+                f"[Simulation] Path found with {len(path)} waypoints "
+                f"(smoothed from {result.raw_waypoints}, final waypoint at {path[-1]}), "
+                f"{self.planner} expanded {result.expanded} nodes"
+                f"{' (plan cache hit)' if result.cached else ''}"
             )
-            self.robot.path = path
-            self.robot.path_index = 0
+            robot.path = path
+            robot.path_index = 0
             if theta is not None:
-                self.robot.final_theta = theta
-            self.robot.nav_status = "IN_PROGRESS"
+                robot.final_theta = theta
+            robot.nav_status = "IN_PROGRESS"
         else:
-            print("[Simulation] No path found, navigation failed")
+            print(
+                f"[Simulation] No path found ({self.planner} expanded {result.expanded} nodes), navigation failed"
+            )
             # no path found
-            self.robot.nav_status = "FAILED"
+            robot.nav_status = "FAILED"
+        if self.recorder is not None:
+            self._record_event(
+                EVENT_GOAL,
+                robot_id,
+                robot_state_codes(robot)[0],
+                (x, y, robot.final_theta),
+                path,
+            )
+
+    def request_nav_goal(
+        self,
+        x: float,
+        y: float,
+        theta: float,
+        robot_id: int = 0,
+        handle: Optional[NavHandle] = None,
+    ) -> NavHandle:
+        """
+        Like send_nav_goal, but the path is planned on a worker thread so the
+        simulation keeps stepping; the robot holds still while planning and
+        the path is installed at the start of a later step.
+
+        Call on the simulation thread (other threads queue it with submit(),
+        passing a `handle` created up front to get it without waiting).
+        """
+        robot = self.get_robot(robot_id)
+        handle = self._track_nav_goal(robot_id, handle)
+        print(
+            f"[Simulation] request_nav_goal: planning from ({robot.x:.1f}, {robot.y:.1f}) to ({x:.1f}, {y:.1f})"
+        )
+        robot.set_nav_goal(x, y, theta)
+        robot.path = []
+        robot.path_index = 0
+        costmap = self.env.costmap(robot.radius)
+        ticket = object()
+        self._nav_tickets[robot_id] = ticket
+        planned = self._planner_executor().submit(
+            plan_path,
+            (robot.x, robot.y),
+            (x, y),
+            costmap,
+            self.planner,
+            self.smooth_paths,
+            self.plan_cache,
+        )
+
+        def on_planned(done: Future):
+            self.commands.submit(
+                self._install_planned,
+                robot_id,
+                x,
+                y,
+                theta,
+                done,
+                ticket,
+                costmap.version,
+            )
+
+        planned.add_done_callback(on_planned)
+        return handle
+
+    def _planner_executor(self) -> ThreadPoolExecutor:
+        # worker thread for plans and floods that must not stall stepping
+        if self._planner_pool is None:
+            self._planner_pool = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="planner"
+            )
+        return self._planner_pool
+
+    def _track_nav_goal(
+        self, robot_id: int, handle: Optional[NavHandle] = None
+    ) -> NavHandle:
+        # a new goal supersedes the robot's previous one
+        previous = self._nav_handles.get(robot_id)
+        if previous is not None and previous is not handle:
+            previous.future.cancel()
+        if handle is None:
+            handle = NavHandle(self, robot_id)
+        self._nav_handles[robot_id] = handle
+        return handle
+
+    def cancel_nav_goal(self, robot_id: int = 0, handle: Optional[NavHandle] = None):
+        """
+        Stop the robot's navigation (only if `handle` is still its goal).
+        """
+        current = self._nav_handles.get(robot_id)
+        if handle is not None and current is not handle:
+            return
+        if current is not None:
+            current.future.cancel()
+            del self._nav_handles[robot_id]
+        self._nav_tickets.pop(robot_id, None)
+        self._nav_goals.pop(robot_id, None)
+        self._replanners.pop(robot_id, None)
+        robot = self.get_robot(robot_id)
+        robot.path = []
+        robot.path_index = 0
+        robot.nav_status = "IDLE"
+        print(f"[Simulation] Navigation of robot {robot_id} cancelled")
+        if self.recorder is not None:
+            self._record_event(
+                EVENT_REPAIR,
+                robot_id,
+                robot_state_codes(robot)[0],
+                (robot.x, robot.y, robot.theta),
+            )
+
+    def _update_nav_goals(self):
+        """
+        Resolve the handles of goals that finished this tick and report
+        progress on the others.
+        """
+        for robot_id, handle in list(self._nav_handles.items()):
+            state = self.snapshot.robots[robot_id]
+            if state.nav_status in ("SUCCEEDED", "FAILED"):
+                del self._nav_handles[robot_id]
+                handle.resolve(state.nav_status)
+            elif handle.wants_progress and state.nav_status == "IN_PROGRESS":
+                robot = self.get_robot(robot_id)
+                remaining, (px, py) = 0.0, (state.x, state.y)
+                for wx, wy in robot.path[robot.path_index :]:
+                    remaining += math.hypot(wx - px, wy - py)
+                    px, py = wx, wy
+                handle._report(
+                    NavProgress(
+                        robot_id,
+                        state.x,
+                        state.y,
+                        state.theta,
+                        state.nav_status,
+                        remaining,
+                    )
+                )
+
+    def _install_planned(
+        self,
+        robot_id: int,
+        x: float,
+        y: float,
+        theta: float,
+        planned: Future,
+        ticket: object,
+        version: int,
+    ) -> str:
+        if self._nav_tickets.get(robot_id) is not ticket:
+            raise CancelledError()
+        del self._nav_tickets[robot_id]
+        robot = self.get_robot(robot_id)
+        try:
+            result = planned.result()
+        except Exception:
+            robot.nav_status = "FAILED"
+            raise
+        self._install_path(robot_id, x, y, theta, result)
+        if robot.path and version != self.env.version:
+            # the map changed while planning; the change was checked before
+            # this path existed, so check the new path against it now
+            world = pygame.Rect(0, 0, self.env.width, self.env.height)
+            if self.repair_paths and self._path_blocked(robot, world):
+                self._repair_path(robot_id, self.env.costmap(robot.radius))
+        return robot.nav_status
+
+    def _install_replanner(self, robot_id: int, goal: tuple, searched: Future):
+        # only for the goal it was made for, and unless a repair already
+        # had to make one
+        if self._nav_goals.get(robot_id) is not goal or robot_id in self._replanners:
+            return
+        if searched.exception() is None and searched.result() is not None:
+            self._replanners[robot_id] = searched.result()
+
+    def submit(self, fn, *args) -> Future:
+        """
+        Run fn(*args) on the simulation thread at the start of the next step.
+
+        Safe to call from any thread. Returns a Future of the result, resolved
+        after the snapshot that reflects the call has been published.
+        """
+        return self.commands.submit(fn, *args)
+
+    def on_simulation_thread(self) -> bool:
+        """
+        True on the thread that steps the simulation.
+        """
+        return self._step_thread == threading.get_ident()
+
+    def publish_snapshot(self):
+        """
+        Publish the current robot states as a new immutable SimSnapshot.
+
+        Done after every step; call it after changing robots directly on the
+        simulation thread to make the change visible before the next step.
+        """
+        if self.fleet is not None:
+            f = self.fleet
+            robots = tuple(
+                RobotSnapshot(
+                    x,
+                    y,
+                    theta,
+                    NAV_STATUSES[nav],
+                    ACTION_STATUSES[act_status],
+                    ACTIONS[action],
+                )
+                for x, y, theta, nav, act_status, action in zip(
+                    f.x.tolist(),
+                    f.y.tolist(),
+                    f.theta.tolist(),
+                    f.nav_status.tolist(),
+                    f.action_status.tolist(),
+                    f.action.tolist(),
+                )
+            )
+        else:
+            r = self.robot
+            robots = (
+                RobotSnapshot(
+                    r.x, r.y, r.theta, r.nav_status, r.action_status, r.current_action
+                ),
+            )
+        version = self.snapshot.version + 1 if self.snapshot is not None else 0
+        # a single reference assignment; readers never see a partial update
+        self.snapshot = SimSnapshot(version, self.steps, self.sim_time, robots)
+
+    def _pin_goal(self, path: List[Tuple[float, float]], x: float, y: float, robot):
+        """
+        Pin the exact goal (x, y) onto a planned path, in place.
+        """
+        # Replace last waypoint (cell center) with exact goal to avoid half-cell
+        # offset, unless the robot would touch an obstacle standing there.
+        # After smoothing the last leg can be long, so the shifted leg is
+        # checked too; if it is not clear the exact goal is appended instead.
+        if self._segment_clear((x, y), (x, y), robot.radius):
+            prev = path[-2] if len(path) > 1 else (robot.x, robot.y)
+            if self._segment_clear(prev, (x, y), robot.radius):
+                path[-1] = (x, y)
+            elif self._segment_clear(path[-1], (x, y), robot.radius):
+                path.append((x, y))
+
+    def add_region(
+        self, name: str, left: float, top: float, right: float, bottom: float
+    ):
+        """
+        Store a named region (e.g. "kitchen") in memory for within-region
+        queries; redefining a name replaces its bounds.
+        """
+        self.memory.upsert(
+            {
+                "entry_id": f"region:{normalize_label(name)}",
+                "entry_type": "region",
+                "label": name,
+                "bounds": {"left": left, "top": top, "right": right, "bottom": bottom},
+                "map_coordinates": {
+                    "x": (left + right) / 2,
+                    "y": (top + bottom) / 2,
+                    "theta": 0.0,
+                },
+                "timestamp": "",
+            }
+        )
+
+    def add_dynamic_obstacle(self, x: int, y: int, width: int, height: int) -> int:
+        """
+        Add an obstacle that can later be moved or removed; returns its id.
+        """
+        rect = pygame.Rect(x, y, width, height)
+        obstacle_id = self._next_obstacle_id
+        self._next_obstacle_id += 1
+        self.dynamic_obstacles[obstacle_id] = rect
+        self.env.add_obstacle(rect)
+        return obstacle_id
+
+    def move_dynamic_obstacle(self, obstacle_id: int, x: int, y: int):
+        """
+        Move dynamic obstacle `obstacle_id` so its top-left corner is at (x, y).
+        """
+        self.env.move_obstacle(self.dynamic_obstacles[obstacle_id], x, y)
+
+    def remove_dynamic_obstacle(self, obstacle_id: int):
+        self.env.remove_obstacle(self.dynamic_obstacles.pop(obstacle_id))
+
+    def _path_blocked(self, robot, changed: pygame.Rect) -> bool:
+        remaining = [(robot.x, robot.y)] + robot.path[robot.path_index :]
+        xs = [p[0] for p in remaining]
+        ys = [p[1] for p in remaining]
+        r = robot.radius
+        bounds = pygame.Rect(
+            min(xs) - r,
+            min(ys) - r,
+            max(xs) - min(xs) + 2 * r,
+            max(ys) - min(ys) + 2 * r,
+        )
+        if not bounds.colliderect(changed):
+            return False
+        return not all(
+            self._segment_clear(a, b, r) for a, b in zip(remaining, remaining[1:])
+        )
+
+    def _blocked_area(self, radius: float) -> Optional[pygame.Rect]:
+        """
+        World-space bounds of the cells that became lethal for `radius` since
+        the last call, or None if none did.
+        """
+        costmap = self.env.costmap(radius)
+        previous = self._repair_costmaps.get(radius)
+        self._repair_costmaps[radius] = costmap
+        if previous is None:
+            # nothing to diff against yet; check every path
+            return pygame.Rect(0, 0, self.env.width, self.env.height)
+        rows, cols = np.nonzero(costmap.lethal & ~previous.lethal)
+        if not len(rows):
+            return None
+        cs = costmap.grid.cell_size
+        return pygame.Rect(
+            cols.min() * cs,
+            rows.min() * cs,
+            (cols.max() - cols.min() + 1) * cs,
+            (rows.max() - rows.min() + 1) * cs,
+        )
+
+    def _repair_blocked_paths(self):
+        """
+        Repair the paths of navigating robots that the last map change blocked.
+        """
+        self._repair_version = self.env.version
+        areas: Dict[float, Optional[pygame.Rect]] = {}
+        for robot_id in range(self.robot_count):
+            robot = self.get_robot(robot_id)
+            if robot.radius not in areas:
+                areas[robot.radius] = self._blocked_area(robot.radius)
+            changed = areas[robot.radius]
+            if (
+                changed is None
+                or robot.nav_status != "IN_PROGRESS"
+                or robot_id not in self._nav_goals
+                or not robot.path
+            ):
+                continue
+            if self._path_blocked(robot, changed):
+                self._repair_path(robot_id, self.env.costmap(robot.radius))
+
+    def _repair_path(self, robot_id: int, costmap: Costmap):
+        robot = self.get_robot(robot_id)
+        x, y, _ = self._nav_goals[robot_id]
+        grid = costmap.grid
+        start = grid.to_cell((robot.x, robot.y))
+        goal = costmap.nearest_free(grid.to_cell((x, y)))
+        path: List[Tuple[float, float]] = []
+        replanner = self._replanners.get(robot_id)
+        if goal is not None:
+            if replanner is None or replanner.goal != goal:
+                replanner = DStarLite(costmap, start, goal)
+                self._replanners[robot_id] = replanner
+            else:
+                replanner.update(costmap, start)
+            result = replanner.plan()
+            if result.found:
+                cells = result.cells
+                if self.smooth_paths:
+                    cells = smooth_path(costmap, cells)
+                path = [grid.to_point(c) for c in cells]
+                self._pin_goal(path, x, y, robot)
+        expanded = replanner.expanded if replanner is not None else 0
+        self.repairs += 1
+        self.repair_expanded += expanded
+        self.last_repair_expanded = expanded
+        robot.path = path
+        robot.path_index = 0
+        if path:
+            robot.nav_status = "IN_PROGRESS"
+            print(
+                f"[Simulation] Repaired path of robot {robot_id} after map change: "
+                f"{len(path)} waypoints, D* Lite re-expanded {expanded} nodes"
+            )
+        else:
+            robot.nav_status = "FAILED"
+            self._replanners.pop(robot_id, None)
+            print(
+                f"[Simulation] Path of robot {robot_id} blocked and no repair found "
+                f"(D* Lite expanded {expanded} nodes), navigation failed"
+            )
+        if self.recorder is not None:
+            self._record_event(
+                EVENT_REPAIR,
+                robot_id,
+                robot_state_codes(robot)[0],
+                (x, y, robot.final_theta),
+                path,
+            )
+
+    def plan_paths_batch(
+        self,
+        pairs: List[Tuple[Tuple[float, float], Tuple[float, float]]],
+        planner: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        robot_id: int = 0,
+    ) -> Iterator[Tuple[int, PlanResult]]:
+        """
+        Plan many (start, goal) pairs on a process pool.
+
+        Yields (index into `pairs`, PlanResult) as plans complete. Plans are
+        made for the footprint of robot `robot_id`; pairs already in the plan
+        cache are served first without a worker, and new results are cached.
+        The worker processes are started on the first batch (`max_workers`
+        of them) and reused until shutdown().
+        """
+        planner = planner or self.planner
+        engine = get_planner(planner)
+        costmap = self.env.costmap(self.get_robot(robot_id).radius)
+        grid = costmap.grid
+        pending = []
+        for i, (start, goal) in enumerate(pairs):
+            goal_cell = costmap.nearest_free(grid.to_cell(goal))
+            hit = None
+            if goal_cell is not None:
+                hit = self.plan_cache.get(
+                    costmap,
+                    grid.to_cell(start),
+                    goal_cell,
+                    engine.name,
+                    self.smooth_paths,
+                )
+            if hit is not None:
+                yield i, hit
+            else:
+                pending.append(i)
+        if not pending:
+            return
+        if self._batch_pool is None:
+            self._batch_pool = planner_pool(max_workers)
+        batch = plan_paths_batch(
+            costmap,
+            [pairs[i] for i in pending],
+            engine.name,
+            smooth=self.smooth_paths,
+            pool=self._batch_pool,
+        )
+        for j, result in batch:
+            if result.found:
+                self.plan_cache.put(
+                    costmap,
+                    result.raw_cells[0],
+                    result.raw_cells[-1],
+                    engine.name,
+                    self.smooth_paths,
+                    result,
+                )
+            yield pending[j], result
+
+    def start_action(self, action: str, params: Dict[str, Any], robot_id: int = 0):
+        """
+        Start an animated direct action ('rotate' or 'move_forward') on a robot.
+        """
+        self.get_robot(robot_id).start_action(action, params)
+        if self.recorder is not None:
+            self._record_event(
+                EVENT_ACTION,
+                robot_id,
+                robot_state_codes(self.get_robot(robot_id))[2],
+                (params.get("angle") or 0.0, params.get("duration") or 0.0, 0.0),
+            )
@@ -0,0 +1,79 @@
+# filepath: src/Simulator/spatial.py
+"""
+Uniform-grid spatial hash for rectangular obstacles.
+
+Each rect is registered in every bucket it overlaps, so a query only has to
+look at the handful of buckets covering the query area instead of scanning
+every obstacle.
+"""
+
+import math
+from typing import Dict, Iterable, List, Tuple
+
+import pygame
+
+Bucket = Tuple[int, int]
+
+
+class SpatialHash:
+    def __init__(self, bucket_size: int = 64):
+        self.bucket_size = bucket_size
+        self._buckets: Dict[Bucket, List[pygame.Rect]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _bucket_range(self, left: float, top: float, right: float, bottom: float):
+        s = self.bucket_size
+        return (
+            range(math.floor(left / s), math.floor(right / s) + 1),
+            range(math.floor(top / s), math.floor(bottom / s) + 1),
+        )
+
+    def insert(self, rect: pygame.Rect):
+        xs, ys = self._bucket_range(rect.left, rect.top, rect.right, rect.bottom)
+        for bx in xs:
+            for by in ys:
+                self._buckets.setdefault((bx, by), []).append(rect)
+        self._count += 1
+
+    def remove(self, rect: pygame.Rect):
+        # rects are unhashable and compare by value, so match on identity
+        xs, ys = self._bucket_range(rect.left, rect.top, rect.right, rect.bottom)
+        for bx in xs:
+            for by in ys:
+                bucket = self._buckets.get((bx, by))
+                if not bucket:
+                    continue
+                bucket[:] = [r for r in bucket if r is not rect]
+                if not bucket:
+                    del self._buckets[(bx, by)]
+        self._count -= 1
+
+    def rebuild(self, rects: Iterable[pygame.Rect]):
+        self._buckets.clear()
+        self._count = 0
+        for rect in rects:
+            self.insert(rect)
+
+    def query_rect(
+        self, left: float, top: float, right: float, bottom: float
+    ) -> List[pygame.Rect]:
+        """
+        Return the rects registered in buckets overlapping the given box
+        (a superset of the rects that actually intersect it).
+        """
+        xs, ys = self._bucket_range(left, top, right, bottom)
+        seen = set()
+        found = []
+        for bx in xs:
+            for by in ys:
+                for rect in self._buckets.get((bx, by), ()):
+                    if id(rect) not in seen:
+                        seen.add(id(rect))
+                        found.append(rect)
+        return found
+
+    def query_circle(self, x: float, y: float, radius: float) -> List[pygame.Rect]:
+        return self.query_rect(x - radius, y - radius, x + radius, y + radius)
@@ -0,0 +1,115 @@
+# filepath: src/Simulator/text_cache.py
+"""
+LRU cache of rendered text surfaces for the simulator UI.
+
+pygame.freetype re-rasterizes a string on every render_to call. TextCache
+keeps the rendered Surface per (font, text, colour) and blits it instead.
+Lines whose text changes over time (e.g. the robot pose) use named slots,
+which hold only the latest rendering so they do not flush the LRU.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+import pygame
+import pygame.freetype
+
+Color = Tuple[int, ...]
+
+
+class TextCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, Tuple[pygame.Surface, pygame.Rect]]" = (
+            OrderedDict()
+        )
+        self._slots: Dict[str, Tuple[tuple, pygame.Surface, pygame.Rect]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.slot_hits = 0
+        self.slot_renders = 0
+
+    def render(
+        self, font: pygame.freetype.Font, text: str, color: Color
+    ) -> Tuple[pygame.Surface, pygame.Rect]:
+        """
+        Return (surface, rect) as font.render would, from the cache if possible.
+        """
+        key = (font, text, tuple(color))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = font.render(text, color)
+        self._entries[key] = entry
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def get_rect(self, font: pygame.freetype.Font, text: str) -> pygame.Rect:
+        """
+        Size of the rendered text, like font.get_rect (measured once).
+        """
+        # the bounding box does not depend on the colour
+        return self.render(font, text, (255, 255, 255))[1]
+
+    def render_to(
+        self,
+        surface: pygame.Surface,
+        pos: Tuple[int, int],
+        font: pygame.freetype.Font,
+        text: str,
+        color: Color,
+    ) -> pygame.Rect:
+        """
+        Drop-in for font.render_to(surface, pos, text, color).
+        """
+        text_surf, rect = self.render(font, text, color)
+        return surface.blit(text_surf, pos)
+
+    def render_slot_to(
+        self,
+        slot: str,
+        surface: pygame.Surface,
+        pos: Tuple[int, int],
+        font: pygame.freetype.Font,
+        text: str,
+        color: Color,
+    ) -> pygame.Rect:
+        """
+        Like render_to for a line that changes over time: the slot keeps only
+        its latest rendering, re-rendered when the formatted text changes.
+        """
+        key = (font, text, tuple(color))
+        entry = self._slots.get(slot)
+        if entry is not None and entry[0] == key:
+            self.slot_hits += 1
+        else:
+            self.slot_renders += 1
+            entry = (key, *font.render(text, color))
+            self._slots[slot] = entry
+        return surface.blit(entry[1], pos)
+
+    def clear(self):
+        self._entries.clear()
+        self._slots.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        slot_lookups = self.slot_hits + self.slot_renders
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "slots": len(self._slots),
+            "slot_hits": self.slot_hits,
+            "slot_renders": self.slot_renders,
+            "slot_hit_rate": self.slot_hits / slot_lookups if slot_lookups else 0.0,
+        }
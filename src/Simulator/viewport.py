@@ -0,0 +1,144 @@
+# filepath: src/Simulator/viewport.py
+"""
+Camera over a world larger than the window, and tiled map rendering.
+
+The map (background, grid lines, loaded walls and obstacle rects) is drawn
+into fixed-size world tiles on demand and cached until the map changes, so
+a frame only composites the few tiles intersecting the viewport.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import numpy as np
+import pygame
+
+
+class Viewport:
+    """
+    Window-sized rectangle of the world shown on screen (integer offsets).
+    """
+
+    def __init__(self, width: int, height: int, world_width: int, world_height: int):
+        self.width = width
+        self.height = height
+        self.world_width = world_width
+        self.world_height = world_height
+        self.x = 0
+        self.y = 0
+
+    @property
+    def offset(self) -> Tuple[int, int]:
+        return self.x, self.y
+
+    @property
+    def rect(self) -> pygame.Rect:
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+    def move_to(self, x: float, y: float):
+        self.x = int(max(0, min(x, self.world_width - self.width)))
+        self.y = int(max(0, min(y, self.world_height - self.height)))
+
+    def pan(self, dx: float, dy: float):
+        self.move_to(self.x + dx, self.y + dy)
+
+    def center_on(self, x: float, y: float):
+        self.move_to(x - self.width / 2, y - self.height / 2)
+
+    def follow(self, x: float, y: float, margin: float = 0.2):
+        """
+        Recenter on (x, y) once it leaves the inner box (margin as a fraction
+        of the window), so the view does not scroll every frame.
+        """
+        mx, my = self.width * margin, self.height * margin
+        if not (
+            self.x + mx <= x <= self.x + self.width - mx
+            and self.y + my <= y <= self.y + self.height - my
+        ):
+            self.center_on(x, y)
+
+    def to_screen(self, x: float, y: float) -> Tuple[float, float]:
+        return x - self.x, y - self.y
+
+    def to_world(self, x: float, y: float) -> Tuple[float, float]:
+        return x + self.x, y + self.y
+
+
+class MapTiles:
+    """
+    LRU cache of rendered map tiles for an Environment.
+    """
+
+    def __init__(
+        self, env, colors: Dict[str, tuple], tile_size: int = 256, maxsize: int = 64
+    ):
+        self.env = env
+        self.colors = colors
+        self.tile_size = tile_size
+        self.maxsize = maxsize
+        self._tiles: "OrderedDict[Tuple[int, int], pygame.Surface]" = OrderedDict()
+        self._version = env.version
+        self.rendered = 0
+
+    def draw(self, surface: pygame.Surface, viewport: Viewport):
+        """
+        Blit the tiles intersecting the viewport onto `surface`.
+        """
+        if self._version != self.env.version:
+            self._tiles.clear()
+            self._version = self.env.version
+        ts = self.tile_size
+        view = viewport.rect
+        for ty in range(view.top // ts, (view.bottom - 1) // ts + 1):
+            for tx in range(view.left // ts, (view.right - 1) // ts + 1):
+                tile = self._tile(tx, ty)
+                surface.blit(tile, (tx * ts - view.x, ty * ts - view.y))
+
+    def _tile(self, tx: int, ty: int) -> pygame.Surface:
+        tile = self._tiles.get((tx, ty))
+        if tile is not None:
+            self._tiles.move_to_end((tx, ty))
+            return tile
+        tile = self._render(tx, ty)
+        self._tiles[(tx, ty)] = tile
+        if len(self._tiles) > self.maxsize:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def _render(self, tx: int, ty: int) -> pygame.Surface:
+        self.rendered += 1
+        ts = self.tile_size
+        x0, y0 = tx * ts, ty * ts
+        tile = pygame.Surface((ts, ts)).convert()
+        tile.fill(self.colors["background"])
+        # grid lines every 50 world px, as on the original full-screen canvas
+        grid_size = 50
+        for x in range(-(-x0 // grid_size) * grid_size, x0 + ts, grid_size):
+            pygame.draw.line(tile, self.colors["grid"], (x - x0, 0), (x - x0, ts))
+        for y in range(-(-y0 // grid_size) * grid_size, y0 + ts, grid_size):
+            pygame.draw.line(tile, self.colors["grid"], (0, y - y0), (ts, y - y0))
+        # walls from a loaded occupancy map
+        static = self.env.static_grid
+        if static is not None:
+            cs = static.cell_size
+            c0, r0 = x0 // cs, y0 // cs
+            c1 = min(static.cols, -(-(x0 + ts) // cs))
+            r1 = min(static.rows, -(-(y0 + ts) // cs))
+            if c1 > c0 and r1 > r0:
+                block = np.asarray(static.cells[r0:r1, c0:c1])
+                if block.any():
+                    rgb = np.empty(block.shape[::-1] + (3,), dtype=np.uint8)
+                    rgb[:] = self.colors["background"]
+                    rgb[block.T] = self.colors["wall"]
+                    walls = pygame.surfarray.make_surface(rgb)
+                    walls = pygame.transform.scale(
+                        walls, (walls.get_width() * cs, walls.get_height() * cs)
+                    )
+                    walls.set_colorkey(self.colors["background"])
+                    tile.blit(walls, (c0 * cs - x0, r0 * cs - y0))
+        # obstacle rects overlapping this tile
+        for obs in self.env.index.query_rect(x0, y0, x0 + ts, y0 + ts):
+            shifted = obs.move(-x0, -y0)
+            pygame.draw.rect(tile, self.colors["obstacle"], shifted)
+            pygame.draw.rect(tile, (255, 255, 255), shifted, 1)  # White border
+        return tile
@@ -0,0 +1,91 @@
+# filepath: src/benchmark_simulation.py
+"""
+Headless navigation benchmark: runs many random navigation episodes per
+planner without a display and reports planner work and simulation speed.
+
+Usage:
+    uv run -m src.benchmark_simulation --episodes 200 --planners astar jps theta
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import time
+
+from src.Simulator.simulation_core import Simulation
+
+
+def run_episodes(
+    planner: str,
+    episodes: int,
+    seed: int,
+    max_sim_seconds: float,
+    map_path: str = None,
+):
+    sim = Simulation(
+        width=1280, height=768, planner=planner, headless=True, map_path=map_path
+    )
+    rng = random.Random(seed)
+    outcomes = {}
+    expanded = 0
+    plan_time = 0.0
+    for _ in range(episodes):
+        x, y = rng.uniform(0, sim.env.width), rng.uniform(0, sim.env.height)
+        # Silence per-goal planning logs
+        with contextlib.redirect_stdout(io.StringIO()):
+            sim.send_nav_goal(x, y, 0.0)
+        if sim.last_plan is not None:
+            expanded += sim.last_plan.expanded
+            plan_time += sim.last_plan.elapsed
+        sim.run_for(
+            max_sim_seconds, until=lambda: sim.robot.nav_status != "IN_PROGRESS"
+        )
+        status = sim.robot.nav_status
+        if status == "IN_PROGRESS":
+            status = "TIMEOUT"
+        outcomes[status] = outcomes.get(status, 0) + 1
+    stats = sim.get_stats()
+    sim.shutdown()
+    return {
+        "outcomes": outcomes,
+        "mean_expanded": expanded / episodes,
+        "mean_plan_ms": plan_time * 1000 / episodes,
+        "plan_cache": sim.plan_cache.stats(),
+        **stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--planners", nargs="+", default=["astar", "jps", "theta"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--max-sim-seconds",
+        type=float,
+        default=120.0,
+        help="Simulated time budget per episode before it counts as TIMEOUT",
+    )
+    parser.add_argument(
+        "--map", default=None, help="PNG occupancy image or .npy grid to load"
+    )
+    args = parser.parse_args()
+
+    for planner in args.planners:
+        t0 = time.perf_counter()
+        result = run_episodes(
+            planner, args.episodes, args.seed, args.max_sim_seconds, args.map
+        )
+        print(
+            f"[Benchmark] {planner}: {result['outcomes']} | "
+            f"expanded/plan {result['mean_expanded']:.0f} | "
+            f"plan {result['mean_plan_ms']:.2f} ms | "
+            f"{result['sim_time']:.0f} sim-s in {result['wall_time']:.2f} wall-s "
+            f"({result['realtime_factor']:.0f}x realtime) | "
+            f"total {time.perf_counter() - t0:.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 Main orchestrator for running the exploration simulation alongside the GraphAgent.
 """
 
+import os
 import pygame
 import threading
 from src.Simulator.simulation_api import (
@@ -16,7 +17,16 @@ from src.GraphAgent.core.graph import WorkFlow
 
 def main():
     # Initialize simulation and agent
-    initialize_simulation()
+    # SIM_RECORD_PATH: directory to record the run to for later replay
+    # SIM_MAP_PATH: PNG occupancy image or .npy grid to load the world from
+    # SIM_LIVE_MAPPING: scan with the range sensor every step ("1"/"true")
+    # SIM_MEMORY_PATH: SQLite file to persist mapped memory to across runs
+    initialize_simulation(
+        record_path=os.getenv("SIM_RECORD_PATH") or None,
+        map_path=os.getenv("SIM_MAP_PATH") or None,
+        live_mapping=os.getenv("SIM_LIVE_MAPPING", "").lower() in ("1", "true"),
+        memory_path=os.getenv("SIM_MEMORY_PATH") or None,
+    )
     wf = WorkFlow()
     print(wf.display_graph())
 
@@ -0,0 +1,62 @@
+# filepath: src/replay_simulation.py
+"""
+Replay a recorded simulation run (see Simulation.start_recording).
+
+Usage:
+    uv run -m src.replay_simulation runs/2024-05-01 --speed 4 --seek 120
+    uv run -m src.replay_simulation runs/2024-05-01 --failures
+"""
+
+import argparse
+
+from src.Simulator.recorder import Recording, Replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="Recording directory")
+    parser.add_argument("--speed", type=float, default=1.0, help="Playback speed")
+    parser.add_argument(
+        "--seek", type=float, default=None, help="Start playback at this sim time"
+    )
+    parser.add_argument(
+        "--until", type=float, default=None, help="Stop playback at this sim time"
+    )
+    parser.add_argument(
+        "--failures",
+        action="store_true",
+        help="List the times robots switched to FAILED and exit",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Replay headless and report divergence from the recorded states",
+    )
+    args = parser.parse_args()
+
+    recording = Recording(args.path)
+    print(
+        f"[Replay] {recording.tick_count} ticks, {len(recording.events)} events, "
+        f"{recording.robot_count} robot(s), "
+        f"t={recording.start_time:.2f}..{recording.end_time:.2f} s"
+    )
+    if args.failures:
+        for t, robot_id in recording.status_changes("FAILED"):
+            print(f"[Replay] t={t:.2f} s robot {robot_id} FAILED")
+        return
+
+    replay = Replay(recording, headless=args.verify)
+    if args.seek is not None:
+        replay.seek(args.seek)
+    if args.verify:
+        worst = 0.0
+        while replay.step():
+            worst = max(worst, replay.divergence())
+        print(f"[Replay] max divergence from recording: {worst:.6f} px")
+        return
+    replay.play(speed=args.speed, until=args.until)
+    replay.sim.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# filepath: tests/conftest.py
+"""
+Shared fixtures: headless simulations and a helper that steps one until a
+condition holds.
+"""
+
+import os
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pytest
+
+from src.Simulator.simulation_core import Simulation
+
+
+@pytest.fixture
+def make_sim():
+    sims = []
+
+    def make(**kwargs) -> Simulation:
+        sim = Simulation(**kwargs)
+        sims.append(sim)
+        return sim
+
+    yield make
+    for sim in sims:
+        sim.shutdown()
+
+
+@pytest.fixture
+def sim(make_sim) -> Simulation:
+    return make_sim(headless=True)
+
+
+def step_until(sim: Simulation, done, timeout: float = 20.0):
+    """
+    Step the simulation until done() is true (fails after `timeout` s).
+    """
+    deadline = time.monotonic() + timeout
+    while not done():
+        assert time.monotonic() < deadline, "timed out"
+        sim.step()
@@ -0,0 +1,50 @@
+# filepath: tests/test_batch_planning.py
+"""
+Process-pool batch planning.
+"""
+
+import random
+import warnings
+
+import pygame
+
+from src.Simulator.planners import plan_path
+
+
+def test_batch_matches_plan_path_and_is_cached(make_sim):
+    sim = make_sim(headless=True)
+    rng = random.Random(4)
+    sim.env.obstacles = [
+        pygame.Rect(rng.randint(0, 700), rng.randint(0, 500), 60, 60) for _ in range(8)
+    ]
+    pairs = [
+        (
+            (rng.uniform(0, 800), rng.uniform(0, 600)),
+            (rng.uniform(0, 800), rng.uniform(0, 600)),
+        )
+        for _ in range(6)
+    ]
+    costmap = sim.env.costmap(sim.robot.radius)
+    with warnings.catch_warnings():
+        # forking the threaded simulation process would warn
+        warnings.simplefilter("error", DeprecationWarning)
+        results = dict(sim.plan_paths_batch(pairs, max_workers=2))
+    assert sorted(results) == list(range(len(pairs)))
+    for i, (start, goal) in enumerate(pairs):
+        expected = plan_path(start, goal, costmap, sim.planner, sim.smooth_paths)
+        assert results[i].cells == expected.cells
+        assert results[i].cost == expected.cost
+    pool = sim._batch_pool
+    assert pool is not None
+
+    again = dict(sim.plan_paths_batch(pairs))
+    found = [i for i, result in results.items() if result.found]
+    assert found and all(again[i].cached for i in found)
+    assert [again[i].cells for i in found] == [results[i].cells for i in found]
+
+    # a new map version plans on the same long-lived pool
+    sim.env.add_obstacle(pygame.Rect(380, 280, 40, 40))
+    assert not any(r.cached for _, r in sim.plan_paths_batch(pairs[:2]))
+    assert sim._batch_pool is pool
+    sim.shutdown()
+    assert sim._batch_pool is None
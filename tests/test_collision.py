@@ -0,0 +1,65 @@
+# filepath: tests/test_collision.py
+"""
+Swept-circle time of impact against boxes.
+"""
+
+import math
+
+import numpy as np
+
+from src.Simulator.collision import contact_fraction, swept_circle_toi
+
+BOX = np.array([[100.0, 100.0, 140.0, 140.0]])
+
+
+def test_toi_at_first_contact():
+    # moving right along y=120, the circle touches the left face at x=90
+    toi = swept_circle_toi(0, 120, 200, 120, 10.0, BOX)[0]
+    assert math.isclose(toi, 90 / 200)
+    # the corner circle, not the slab, stops a diagonal graze
+    toi = swept_circle_toi(0, 0, 200, 200, 10.0, BOX)[0]
+    assert math.isclose(toi * 200 * math.sqrt(2), 100 * math.sqrt(2) - 10)
+
+
+def test_thin_obstacle_is_not_tunnelled():
+    wall = np.array([[100.0, 0.0, 101.0, 300.0]])
+    toi = swept_circle_toi(0, 150, 1000, 150, 5.0, wall)[0]
+    assert math.isclose(toi, 95 / 1000)
+    frac = contact_fraction(0, 150, 1000, 150, toi)
+    assert frac * 1000 + 5 < 100
+
+
+def test_misses_and_touching_are_not_hits():
+    assert math.isinf(swept_circle_toi(0, 0, 200, 0, 10.0, BOX)[0])
+    # sliding along the face at exactly the radius only touches it
+    assert math.isinf(swept_circle_toi(0, 90, 200, 90, 10.0, BOX)[0])
+    assert math.isinf(swept_circle_toi(0, 120, 0, 120, 10.0, BOX)[0])
+
+
+def test_starting_overlap_passing_through_hits_at_once():
+    # starts overlapping the left edge and would exit on the right
+    toi = swept_circle_toi(95, 120, 200, 120, 10.0, BOX)[0]
+    assert toi == 0.0
+    # centre inside the box, heading deeper in
+    assert swept_circle_toi(105, 120, 300, 120, 10.0, BOX)[0] == 0.0
+
+
+def test_starting_overlap_backing_out_is_free():
+    assert math.isinf(swept_circle_toi(95, 120, 50, 120, 10.0, BOX)[0])
+    # partly out after the step is still allowed
+    assert math.isinf(swept_circle_toi(95, 120, 93, 120, 10.0, BOX)[0])
+    # centre inside, leaving through the nearest face
+    assert math.isinf(swept_circle_toi(105, 120, 80, 120, 10.0, BOX)[0])
+
+
+def test_batched_and_masked():
+    boxes = np.array([[100.0, 100.0, 140.0, 140.0], [300.0, 100.0, 340.0, 140.0]])
+    x0 = np.array([0.0, 95.0, 0.0])
+    y0 = np.array([120.0, 120.0, 0.0])
+    x1 = np.array([400.0, 200.0, 0.0])
+    y1 = np.array([120.0, 120.0, 0.0])
+    toi = swept_circle_toi(x0, y0, x1, y1, 10.0, boxes)
+    assert np.isclose(toi[0], 90 / 400) and toi[1] == 0.0 and np.isinf(toi[2])
+    mask = np.array([[False, True], [False, True], [True, True]])
+    toi = swept_circle_toi(x0, y0, x1, y1, 10.0, boxes, mask)
+    assert np.isclose(toi[0], 290 / 400) and np.isinf(toi[1])
@@ -0,0 +1,20 @@
+# filepath: tests/test_environment.py
+"""
+Environment obstacles: rasterization, spatial index and collision.
+"""
+
+import pygame
+
+from src.Simulator.simulation_core import Environment
+
+
+def test_remove_obstacle_by_identity():
+    env = Environment([], 800, 600)
+    a, b = pygame.Rect(100, 100, 40, 40), pygame.Rect(100, 100, 40, 40)
+    env.add_obstacle(a)
+    env.add_obstacle(b)
+    env.index  # build the index, so removal updates it incrementally
+    env.remove_obstacle(b)
+    assert len(env.obstacles) == 1 and env.obstacles[0] is a
+    near = env.obstacles_near(120, 120, 5)
+    assert len(near) == 1 and near[0] is a
@@ -0,0 +1,85 @@
+# filepath: tests/test_fleet.py
+"""
+Vectorized fleet stepping: kinematics and robot-robot separation.
+"""
+
+import numpy as np
+import pytest
+
+from src.Simulator.fleet import Fleet, _near_pairs
+
+NO_BOXES = np.zeros((0, 4))
+DT = 1 / 30
+
+
+def min_gap(fleet: Fleet) -> float:
+    # smallest centre distance between two different robots
+    d = np.hypot(
+        fleet.x[:, None] - fleet.x[None, :], fleet.y[:, None] - fleet.y[None, :]
+    )
+    d[np.diag_indices(fleet.size)] = np.inf
+    return float(d.min())
+
+
+def run(fleet: Fleet, steps: int) -> float:
+    gap = np.inf
+    for _ in range(steps):
+        fleet.update(DT, NO_BOXES)
+        gap = min(gap, min_gap(fleet))
+    return gap
+
+
+def test_crossing_robots_never_overlap():
+    # both reach the crossing at (300, 300) at the same moment
+    fleet = Fleet(np.array([[100.0, 300.0], [300.0, 100.0]]))
+    fleet.set_path(0, [(500.0, 300.0)])
+    fleet.set_path(1, [(300.0, 500.0)])
+    fleet.robot(0).nav_status = fleet.robot(1).nav_status = "IN_PROGRESS"
+    assert run(fleet, 400) >= 2 * fleet.radius
+    # robot 1 waited for robot 0, then carried on
+    assert fleet.robot(0).nav_status == fleet.robot(1).nav_status == "SUCCEEDED"
+    assert (fleet.x[1], fleet.y[1]) == (300.0, 500.0)
+
+
+def test_robot_waits_behind_a_stopped_robot():
+    fleet = Fleet(np.array([[100.0, 300.0], [200.0, 300.0]]))
+    fleet.set_path(0, [(400.0, 300.0)])
+    fleet.robot(0).nav_status = "IN_PROGRESS"
+    assert run(fleet, 100) >= 2 * fleet.radius
+    assert fleet.x[0] == pytest.approx(180.0, abs=2.0)
+    assert fleet.yielded == 1
+    # the blocked robot is still on its way, not failed
+    assert fleet.robot(0).nav_status == "IN_PROGRESS"
+    assert fleet.path_len[0] == 1
+    # ...until it has waited max_wait, so its caller can replan
+    run(fleet, int(fleet.max_wait / DT))
+    assert fleet.robot(0).nav_status == "FAILED"
+    assert fleet.path_len[0] == 0 and fleet.yielded == 0
+
+
+def test_overlapping_robots_may_separate():
+    fleet = Fleet(np.array([[100.0, 300.0], [105.0, 300.0]]))
+    fleet.set_path(1, [(200.0, 300.0)])
+    fleet.robot(1).nav_status = "IN_PROGRESS"
+    fleet.update(DT, NO_BOXES)
+    assert fleet.x[1] > 105.0 and fleet.yielded == 0
+
+
+def test_busy_fleet_keeps_robots_apart():
+    rng = np.random.default_rng(0)
+    # a 10 x 10 lattice, 40 px apart, each robot heading somewhere random
+    xs, ys = np.meshgrid(np.arange(10) * 40.0 + 100, np.arange(10) * 40.0 + 100)
+    fleet = Fleet(np.column_stack([xs.ravel(), ys.ravel()]))
+    for i in range(fleet.size):
+        fleet.set_path(i, [tuple(rng.uniform(100, 460, 2))])
+        fleet.robot(i).nav_status = "IN_PROGRESS"
+    assert run(fleet, 300) >= 2 * fleet.radius - 1e-9
+
+
+def test_near_pairs_match_brute_force():
+    rng = np.random.default_rng(1)
+    x, y = rng.uniform(-300, 300, 400), rng.uniform(0, 200, 400)
+    a, b = _near_pairs(x, y, 25.0)
+    d = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+    expected = {(i, j) for i, j in zip(*np.nonzero(d < 25.0)) if i != j}
+    assert len(a) == len(expected) and set(zip(a, b)) == expected
@@ -0,0 +1,120 @@
+# filepath: tests/test_label_index.py
+"""
+Fuzzy label matching for memory queries.
+"""
+
+import threading
+
+import pytest
+
+from src.Simulator.label_index import SYNONYM_WEIGHT, LabelIndex, singular
+from src.Simulator.memory_store import MemoryStore
+
+LABELS = ["cup", "book", "Water Bottle", "sofa", "remote control", "box"]
+
+
+@pytest.fixture
+def index() -> LabelIndex:
+    index = LabelIndex()
+    assert index.add(LABELS) == len(LABELS)
+    return index
+
+
+def best(index: LabelIndex, query: str):
+    found = index.search(query, k=1)
+    return found[0][0] if found else None
+
+
+@pytest.mark.parametrize(
+    "query, label",
+    [
+        ("mug", "cup"),
+        ("mugs", "cup"),
+        ("books", "book"),
+        ("Book", "book"),
+        ("water_bottles", "water bottle"),
+        ("couch", "sofa"),
+        ("boxes", "box"),
+        ("remote", "remote control"),
+    ],
+)
+def test_search_matches_variants(index, query, label):
+    assert best(index, query) == label
+
+
+def test_exact_match_scores_one_and_synonyms_less(index):
+    assert index.search("book", k=1) == [("book", pytest.approx(1.0))]
+    label, score = index.search("mug", k=1)[0]
+    assert label == "cup" and score == pytest.approx(SYNONYM_WEIGHT)
+
+
+def test_unrelated_queries_match_nothing(index):
+    assert index.search("elephant") == []
+    assert index.search("") == []
+
+
+def test_singular():
+    assert [singular(w) for w in ("boxes", "berries", "glass", "cups")] == [
+        "box",
+        "berry",
+        "glass",
+        "cup",
+    ]
+
+
+def test_sync_adds_new_labels_once():
+    store = MemoryStore()
+    index = LabelIndex()
+    store.upsert({"entry_id": "cup_1", "entry_type": "object", "label": "cup"})
+    assert index.sync(store) == 1
+    assert index.sync(store) == 0
+    store.upsert({"entry_id": "cup_2", "entry_type": "object", "label": "Cup"})
+    store.upsert({"entry_id": "book_1", "entry_type": "object", "label": "book"})
+    assert index.sync(store) == 1
+    assert len(index) == 2
+
+
+class SlowStore:
+    """
+    Store stand-in whose labels() can be held up mid-sync.
+    """
+
+    def __init__(self):
+        self.version = 1
+        self._labels = ["cup"]
+        self.reading = threading.Event()
+        self.proceed = threading.Event()
+
+    def labels(self):
+        labels = list(self._labels)
+        if not self.reading.is_set():
+            self.reading.set()
+            self.proceed.wait(5)
+        return labels
+
+
+def test_concurrent_syncs_do_not_lose_a_version():
+    store = SlowStore()
+    index = LabelIndex()
+    first = threading.Thread(target=index.sync, args=(store,))
+    first.start()
+    assert store.reading.wait(5)
+    # the store moves on while the first sync is still reading labels
+    store.version, store._labels = 2, ["cup", "book"]
+    second = threading.Thread(target=index.sync, args=(store,))
+    second.start()
+    second.join(timeout=0.2)
+    store.proceed.set()
+    first.join(5)
+    second.join(5)
+    # syncs run one at a time, so the older one cannot finish last and
+    # roll the synced version back
+    assert index._version == 2
+    assert best(index, "book") == "book"
+
+
+def test_search_memory_finds_synonyms(sim):
+    sim.map_area()
+    results = sim.search_memory("mugs", "object")
+    assert results and all(r["matched_label"] == "cup" for r in results)
+    assert {r["label"] for r in sim.search_memory("books", "object")} == {"book"}
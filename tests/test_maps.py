@@ -0,0 +1,124 @@
+# filepath: tests/test_maps.py
+"""
+Loading occupancy maps, and the camera and tile culling for large worlds.
+"""
+
+import numpy as np
+import pygame
+import pytest
+
+from src.Simulator.map_loader import load_occupancy_grid
+from src.Simulator.occupancy import OccupancyGrid
+from src.Simulator.simulation_core import Environment
+from src.Simulator.viewport import MapTiles, Viewport
+
+COLORS = {
+    "background": (30, 30, 30),
+    "grid": (50, 50, 50),
+    "wall": (90, 90, 110),
+    "obstacle": (200, 60, 80),
+}
+
+
+def floor_plan() -> np.ndarray:
+    # 30 rows x 40 cols, walled in, with one inner wall
+    cells = np.zeros((30, 40), dtype=bool)
+    cells[0, :] = cells[-1, :] = cells[:, 0] = cells[:, -1] = True
+    cells[5:25, 20] = True
+    return cells
+
+
+def test_png_map_follows_the_darkness_threshold(tmp_path):
+    cells = floor_plan()
+    rgb = np.where(cells[..., None], 0, 255).astype(np.uint8).repeat(3, axis=2)
+    # mid-gray (darkness 0.5) is below the default 0.65 threshold
+    rgb[10, 10] = 128
+    path = str(tmp_path / "plan.png")
+    pygame.image.save(pygame.surfarray.make_surface(rgb.transpose(1, 0, 2)), path)
+    grid = load_occupancy_grid(path, cell_size=10)
+    assert (grid.rows, grid.cols, grid.cell_size) == (30, 40, 10)
+    assert np.array_equal(grid.cells, cells)
+    assert load_occupancy_grid(path, occupied_thresh=0.4).cells[10, 10]
+
+    env = Environment.from_map(path, cell_size=10)
+    assert (env.width, env.height) == (400, 300)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        floor_plan(),
+        np.where(floor_plan(), 0.9, 0.1),  # occupancy probabilities
+        floor_plan().astype(np.uint8) * 100,
+    ],
+    ids=["bool", "float", "uint8"],
+)
+def test_npy_maps(tmp_path, data):
+    path = str(tmp_path / "plan.npy")
+    np.save(path, data)
+    grid = load_occupancy_grid(path, cell_size=20)
+    assert np.array_equal(grid.cells, floor_plan())
+    if data.dtype == np.bool_:
+        # used straight from the memory map
+        assert isinstance(grid.cells, np.memmap)
+
+
+def test_npy_map_must_be_2d(tmp_path):
+    path = str(tmp_path / "plan.npy")
+    np.save(path, np.zeros((2, 3, 4), dtype=bool))
+    with pytest.raises(ValueError):
+        load_occupancy_grid(path)
+
+
+def test_viewport_clamps_follows_and_converts():
+    view = Viewport(800, 600, 2000, 1500)
+    view.center_on(100, 100)
+    assert view.offset == (0, 0)
+    view.center_on(1950, 1450)
+    assert view.offset == (1200, 900)
+    view.move_to(500, 400)
+    assert view.to_world(*view.to_screen(812.5, 433.0)) == (812.5, 433.0)
+    # inside the inner box: no scrolling
+    view.follow(900, 700)
+    assert view.offset == (500, 400)
+    view.follow(1290, 700)
+    assert view.offset == (890, 400)
+    view.pan(-10_000, 0)
+    assert view.offset == (0, 400)
+
+
+@pytest.fixture
+def display():
+    pygame.display.init()
+    yield pygame.display.set_mode((800, 600))
+    pygame.display.quit()
+
+
+def test_map_tiles_render_only_what_is_in_view(display):
+    static = np.zeros((100, 100), dtype=bool)
+    static[10, 10] = True  # wall cell at world (200..220, 200..220)
+    env = Environment(
+        [pygame.Rect(300, 40, 30, 30)], static_grid=OccupancyGrid(static, 20)
+    )
+    tiles = MapTiles(env, COLORS, tile_size=256)
+    view = Viewport(800, 600, env.width, env.height)
+    screen = pygame.Surface((800, 600))
+    tiles.draw(screen, view)
+    # 4 x 3 tiles cover an 800x600 view
+    assert tiles.rendered == 12
+    assert screen.get_at((210, 210))[:3] == COLORS["wall"]
+    assert screen.get_at((315, 55))[:3] == COLORS["obstacle"]
+    tiles.draw(screen, view)
+    assert tiles.rendered == 12
+
+    # scrolling one tile right only renders the newly visible column
+    view.pan(256, 0)
+    tiles.draw(screen, view)
+    assert tiles.rendered == 15
+    assert screen.get_at((315 - 256, 55))[:3] == COLORS["obstacle"]
+
+    # a map change drops the cache
+    env.add_obstacle(pygame.Rect(600, 300, 20, 20))
+    tiles.draw(screen, view)
+    assert tiles.rendered == 27
+    assert screen.get_at((610 - 256, 310))[:3] == COLORS["obstacle"]
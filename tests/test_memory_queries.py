@@ -0,0 +1,121 @@
+# filepath: tests/test_memory_queries.py
+"""
+Pose-aware memory queries: nearest-k, radius and named regions.
+"""
+
+import math
+import random
+
+import pytest
+
+from src.Simulator.memory_store import MemoryStore, SqliteMemoryStore
+
+
+def _entries(seed: int, n: int = 300) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "entry_id": f"obj{i}",
+            "entry_type": "object",
+            "label": rng.choice(["cup", "book", "box"]),
+            "map_coordinates": {"x": rng.uniform(0, 2000), "y": rng.uniform(0, 1500)},
+        }
+        for i in range(n)
+    ]
+
+
+def _distance(entry, x, y) -> float:
+    coords = entry["map_coordinates"]
+    return math.hypot(coords["x"] - x, coords["y"] - y)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        store = MemoryStore(cell_size=100.0)
+    else:
+        store = SqliteMemoryStore(str(tmp_path / "memory.db"), cell_size=100.0)
+    entries = _entries(1)
+    store.upsert_many(entries)
+    store.entries = entries
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("label", [None, "cup"])
+def test_nearest_and_within_radius_match_a_linear_scan(store, label):
+    rng = random.Random(2)
+    for _ in range(20):
+        x, y = rng.uniform(-200, 2200), rng.uniform(-200, 1700)
+        candidates = [e for e in store.entries if label is None or e["label"] == label]
+        ranked = sorted(candidates, key=lambda e: _distance(e, x, y))
+        found = store.nearest(x, y, 5, "object", label)
+        assert [e["entry_id"] for _, e in found] == [e["entry_id"] for e in ranked[:5]]
+        assert [d for d, _ in found] == pytest.approx(
+            [_distance(e, x, y) for e in ranked[:5]]
+        )
+        radius = rng.uniform(10, 400)
+        inside = [e["entry_id"] for e in ranked if _distance(e, x, y) <= radius]
+        found = store.within_radius(x, y, radius, "object", label)
+        assert [e["entry_id"] for _, e in found] == inside
+
+
+def test_nearest_respects_max_distance(store):
+    found = store.nearest(1000, 750, 1000, max_distance=150)
+    assert found and all(d <= 150 for d, _ in found)
+    assert len(found) == sum(_distance(e, 1000, 750) <= 150 for e in store.entries)
+
+
+def test_within_region(store):
+    assert store.within_region("kitchen") is None
+    store.upsert(
+        {
+            "entry_id": "region:kitchen",
+            "entry_type": "region",
+            "label": "Kitchen",
+            "bounds": {"left": 200, "top": 100, "right": 700, "bottom": 400},
+            "map_coordinates": {"x": 450, "y": 250},
+        }
+    )
+    found = store.within_region("kitchen", "object")
+    inside = {
+        e["entry_id"]
+        for e in store.entries
+        if 200 <= e["map_coordinates"]["x"] <= 700
+        and 100 <= e["map_coordinates"]["y"] <= 400
+    }
+    assert inside and {e["entry_id"] for e in found} == inside
+    # the region itself is not reported
+    assert all(e["entry_type"] != "region" for e in store.within_region("kitchen"))
+
+
+def test_add_region_redefines_bounds(sim):
+    sim.memory.upsert_many(
+        {
+            "entry_id": f"obj{i}",
+            "entry_type": "object",
+            "label": "cup",
+            "map_coordinates": {"x": x, "y": 50.0},
+        }
+        for i, x in enumerate((50.0, 250.0))
+    )
+    sim.add_region("Living Room", 0, 0, 100, 100)
+    assert [e["entry_id"] for e in sim.memory.within_region("living room")] == ["obj0"]
+    sim.add_region("living_room", 200, 0, 300, 100)
+    assert len(sim.memory.query("region")) == 1
+    assert [e["entry_id"] for e in sim.memory.within_region("Living Room")] == ["obj1"]
+
+
+def test_describe_area_is_not_navigated_to():
+    pytest.importorskip("langgraph")
+    from src.GraphAgent.core.graph import route_after_memory_query
+
+    one = [{"entry_id": "obj1", "label": "cup"}]
+    state = {
+        "current_intent": "DESCRIBE_AREA",
+        "memory_query_results": one,
+        "requires_clarification": False,
+    }
+    assert route_after_memory_query(state) == "llm_response_node"
+    state["current_intent"] = "FIND_OBJECT"
+    assert route_after_memory_query(state) == "prep_nav_target_memory"
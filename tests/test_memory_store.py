@@ -0,0 +1,262 @@
+# filepath: tests/test_memory_store.py
+"""
+Memory stores: persistence, snapshot isolation and snapshot lifetime.
+"""
+
+import random
+import sqlite3
+import threading
+
+import pytest
+
+from src.Simulator.memory_store import (
+    DELETE,
+    EMPTY_MAP,
+    MemoryStore,
+    PersistentMap,
+    SqliteMemoryStore,
+    normalize_label,
+)
+
+
+def _entry(entry_id, label, x, y, entry_type="object"):
+    return {
+        "entry_id": entry_id,
+        "entry_type": entry_type,
+        "label": label,
+        "map_coordinates": {"x": x, "y": y},
+    }
+
+
+def _checkpoint_blocked(path) -> bool:
+    # a full checkpoint is busy while a reader still pins an older version
+    conn = sqlite3.connect(path, timeout=0.1)
+    try:
+        return conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_sqlite_store_persists(tmp_path):
+    path = str(tmp_path / "memory.db")
+    store = SqliteMemoryStore(path)
+    store.upsert_many(
+        [_entry("cup_1", "Cup", 10, 20), _entry("book_1", "book", 300, 40)]
+    )
+    store.upsert(_entry("cup_1", "cup", 15, 25))
+    store.remove("book_1")
+    version = store.version
+    store.close()
+
+    store = SqliteMemoryStore(path)
+    try:
+        assert store.version == version
+        assert len(store) == 1
+        assert store.get("cup_1")["map_coordinates"] == {"x": 15, "y": 25}
+        assert [e["entry_id"] for e in store.query("object", "cup")] == ["cup_1"]
+        assert [e["entry_id"] for _, e in store.nearest(0, 0, 1)] == ["cup_1"]
+    finally:
+        store.close()
+
+
+def test_snapshots_are_isolated_from_later_writes(tmp_path):
+    for store in (MemoryStore(), SqliteMemoryStore(str(tmp_path / "memory.db"))):
+        store.upsert(_entry("cup_1", "cup", 10, 20))
+        with store.snapshot() as snapshot:
+            store.upsert(_entry("cup_1", "cup", 500, 500))
+            store.upsert(_entry("cup_2", "cup", 30, 30))
+            assert snapshot.version == store.version - 2
+            assert [e["entry_id"] for e in snapshot.query("object", "cup")] == ["cup_1"]
+            assert snapshot.get("cup_1")["map_coordinates"] == {"x": 10, "y": 20}
+            assert len(store.query("object", "cup")) == 2
+        store.close()
+
+
+def test_superseded_snapshot_ends_its_read_transaction(tmp_path):
+    path = str(tmp_path / "memory.db")
+    store = SqliteMemoryStore(path)
+    store.upsert(_entry("cup_1", "cup", 10, 20))
+    snapshot = store.snapshot()
+    # shared by readers until the next change
+    assert store.snapshot() is snapshot
+    snapshot.release()
+
+    store.upsert(_entry("cup_2", "cup", 30, 30))
+    assert _checkpoint_blocked(path)
+    snapshot.release()
+    # released by every reader and superseded: closed, the log checkpoints
+    assert snapshot.closed
+    assert not _checkpoint_blocked(path)
+    assert not snapshot.acquire()
+    with store.snapshot() as current:
+        assert current is not snapshot
+        assert len(current) == 2
+    store.close()
+
+
+def test_decode_cache_is_bounded(tmp_path):
+    store = SqliteMemoryStore(str(tmp_path / "memory.db"), cache_size=10)
+    store.upsert_many(_entry(f"cup_{i}", "cup", i, i) for i in range(50))
+    assert len(store._cache) == 10
+    assert len(store.query("object", "cup")) == 50
+    assert len(store._cache) == 10
+    store.close()
+
+
+def test_positions_skip_entries_without_coordinates(tmp_path):
+    for store in (MemoryStore(), SqliteMemoryStore(str(tmp_path / "memory.db"))):
+        store.upsert_many(
+            [
+                _entry("cup_1", "cup", 10, 20),
+                {"entry_id": "note_1", "entry_type": "note", "label": "note"},
+                _entry("kitchen", "kitchen", 50, 60, entry_type="region"),
+            ]
+        )
+        assert store.positions() == {"cup_1": (10, 20), "kitchen": (50, 60)}
+        assert store.positions("object") == {"cup_1": (10, 20)}
+        store.close()
+
+
+def test_snapshot_does_not_wait_for_the_writer_lock(tmp_path):
+    store = SqliteMemoryStore(str(tmp_path / "memory.db"))
+    store.upsert(_entry("cup_1", "cup", 10, 20))
+    taken = []
+    reader = threading.Thread(target=lambda: taken.append(store.snapshot()))
+    with store._lock:
+        # a writer is busy: the reader still gets the committed version
+        reader.start()
+        reader.join(timeout=5)
+        assert taken and taken[0].version == store.version
+    taken[0].release()
+    store.close()
+
+
+def test_snapshots_reuse_reader_connections(tmp_path):
+    path = str(tmp_path / "memory.db")
+    store = SqliteMemoryStore(path, readers=2)
+    for i in range(20):
+        store.upsert(_entry(f"cup_{i}", "cup", i, i))
+        with store.snapshot() as snapshot:
+            # a reused connection starts a fresh read transaction
+            assert snapshot.version == store.version
+            assert len(snapshot) == i + 1
+    store.upsert(_entry("book_1", "book", 0, 0))
+    # the last snapshot went back to the pool once superseded
+    assert not _checkpoint_blocked(path)
+    assert store._readers.opened == 1
+
+    # overlapping versions each hold a connection; the pool keeps two
+    held = []
+    for i in range(4):
+        held.append(store.snapshot())
+        store.upsert(_entry(f"box_{i}", "box", i, i))
+    assert store._readers.opened == 4
+    for snapshot in held:
+        snapshot.release()
+    assert len(store._readers._idle) == 2
+    store.close()
+    assert not store._readers._idle
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_indexed_queries_match_a_linear_scan(tmp_path, kind):
+    rng = random.Random(5)
+    if kind == "memory":
+        store = MemoryStore(cell_size=50.0)
+    else:
+        store = SqliteMemoryStore(str(tmp_path / "memory.db"), cell_size=50.0)
+    labels = ["Cup", "cup", "book", "Water_Bottle", "water bottle", "box"]
+    reference = {}  # entry_id -> entry, in insertion order
+    for step in range(30):
+        batch = []
+        for _ in range(10):
+            entry_id = f"e{rng.randrange(60)}"
+            # relabel, retype and move existing entries across grid cells
+            batch.append(
+                _entry(
+                    entry_id,
+                    rng.choice(labels),
+                    rng.uniform(-100, 600),
+                    rng.uniform(-100, 400),
+                    rng.choice(["object", "object", "furniture"]),
+                )
+            )
+        store.upsert_many(batch)
+        for entry in batch:
+            reference[entry["entry_id"]] = entry
+        if step % 3 == 2:
+            gone = rng.choice(sorted(reference))
+            assert store.remove(gone)
+            del reference[gone]
+
+        for entity_type in (None, "object", "furniture"):
+            for label in [None] + labels:
+                expected = [
+                    entry_id
+                    for entry_id, entry in reference.items()
+                    if entity_type in (None, entry["entry_type"])
+                    and (
+                        label is None
+                        or normalize_label(entry["label"]) == normalize_label(label)
+                    )
+                ]
+                found = [e["entry_id"] for e in store.query(entity_type, label)]
+                assert found == expected
+            left, top = rng.uniform(-100, 500), rng.uniform(-100, 300)
+            box = (left, top, left + rng.uniform(0, 200), top + rng.uniform(0, 200))
+            inside = {
+                entry_id
+                for entry_id, entry in reference.items()
+                if entity_type in (None, entry["entry_type"])
+                and box[0] <= entry["map_coordinates"]["x"] <= box[2]
+                and box[1] <= entry["map_coordinates"]["y"] <= box[3]
+            }
+            found = store.query_rect(*box, entity_type=entity_type)
+            assert len(found) == len(inside)
+            assert {e["entry_id"] for e in found} == inside
+        assert len(store) == len(reference)
+    store.close()
+
+
+def _bucket(key) -> int:
+    return hash(key) % PersistentMap.BUCKETS
+
+
+def test_persistent_map_copies_only_changed_buckets():
+    old = EMPTY_MAP.update((f"k{i}", i) for i in range(500))
+    changes = [("k1", -1), ("k2", DELETE), ("new", 7)]
+    new = old.update(changes)
+    # the old map is untouched
+    assert dict(old.items()) == {f"k{i}": i for i in range(500)}
+    assert len(old) == 500 and len(new) == 500
+    assert new.get("k1") == -1 and "k2" not in new and new.get("new") == 7
+    touched = {_bucket(key) for key, _ in changes}
+    for b in range(PersistentMap.BUCKETS):
+        assert (new._buckets[b] is old._buckets[b]) == (b not in touched)
+
+
+def test_snapshot_shares_untouched_structure_with_the_next_version():
+    store = MemoryStore(cell_size=100.0)
+    store.upsert_many(
+        _entry(f"obj{i}", ["cup", "book", "box"][i % 3], 10.0 * i, 5.0 * i)
+        for i in range(300)
+    )
+    before = store.snapshot()
+    cup = dict(before.get("obj0"), map_coordinates={"x": 2000.0, "y": 2000.0})
+    store.upsert(cup)
+    after = store.snapshot()
+    assert after.version == before.version + 1
+
+    # the old version still reads as it was
+    assert before.get("obj0")["map_coordinates"] == {"x": 0.0, "y": 0.0}
+    assert [e["entry_id"] for e in before.query_rect(1900, 1900, 2100, 2100)] == []
+    assert [e["entry_id"] for e in after.query_rect(1900, 1900, 2100, 2100)] == ["obj0"]
+    # only the bucket holding obj0 was copied; every other bucket, and the
+    # entry dicts in them, are the same objects in both versions
+    for b in range(PersistentMap.BUCKETS):
+        shared = after._entries._buckets[b] is before._entries._buckets[b]
+        assert shared == (b != _bucket("obj0"))
+    assert after.get("obj1") is before.get("obj1")
+    # indexes the change did not touch are shared as well
+    assert after._by_label.get("book") is before._by_label.get("book")
+    assert after._by_cell.get((5, 2)) is before._by_cell.get((5, 2))
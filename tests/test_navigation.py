@@ -0,0 +1,147 @@
+# filepath: tests/test_navigation.py
+"""
+Navigation goals: asynchronous planning, headings and completion handles.
+"""
+
+import math
+import threading
+from concurrent.futures import Future
+
+import pygame
+import pytest
+from conftest import step_until
+
+import src.Simulator.simulation_api as api
+import src.Simulator.simulation_core as core
+from src.Simulator.commands import NavHandle
+from src.Simulator.planners import travel_distances
+
+
+def test_goal_without_heading_keeps_heading(sim):
+    sim.robot.theta = sim.robot.final_theta = 30.0
+    handle = sim.request_nav_goal(500, 400, None)
+    step_until(sim, handle.done)
+    assert handle.result(0) == "SUCCEEDED"
+    assert sim.robot.theta == 30.0
+    # the render path interpolates headings and must not see None
+    sim._interpolated_poses()
+
+
+def test_fleet_goal_without_heading(make_sim):
+    sim = make_sim(headless=True, fleet_size=3)
+    robot = sim.get_robot(1)
+    before = robot.final_theta
+    robot.set_nav_goal(100, 100, None)
+    assert robot.final_theta == before
+
+
+def test_handle_resolves_with_final_status(sim):
+    handle = sim.send_nav_goal(500, 400, 0)
+    finished = []
+    handle.add_done_callback(finished.append)
+    step_until(sim, handle.done)
+    assert handle.result(0) == "SUCCEEDED"
+    assert finished == [handle]
+
+
+def test_new_goal_cancels_previous_handle(sim):
+    first = sim.send_nav_goal(500, 400, 0)
+    second = sim.send_nav_goal(300, 300, 0)
+    assert first.cancelled()
+    assert not second.done()
+
+
+def test_cancel_stops_robot(sim):
+    handle = sim.send_nav_goal(700, 500, 0)
+    sim.step()
+    assert handle.cancel()
+    sim.step()
+    assert handle.cancelled()
+    assert sim.robot.nav_status == "IDLE"
+    assert sim.robot.path == []
+
+
+def test_cancel_racing_arrival_does_not_raise(sim):
+    handle = sim.send_nav_goal(500, 400, 0)
+    # the agent cancels just as the simulation sees the robot arrive
+    handle.future.cancel()
+    sim.robot.nav_status = "SUCCEEDED"
+    sim.publish_snapshot()
+    sim._update_nav_goals()
+    assert handle.cancelled()
+    assert not handle.resolve("SUCCEEDED")
+
+
+def test_watch_ignores_failure_after_cancel():
+    handle = NavHandle(None, 0)
+    started: Future = Future()
+    handle.watch(started)
+    handle.future.cancel()
+    started.set_exception(IndexError("robot"))
+    assert handle.cancelled()
+
+
+def test_travel_distances_flood_off_simulation_thread(sim, monkeypatch):
+    sim.map_area()
+    expected = sim.memory_travel_distances(0)
+    threads = []
+
+    def recording(*args):
+        threads.append(threading.current_thread().name)
+        return travel_distances(*args)
+
+    monkeypatch.setattr(core, "travel_distances", recording)
+    monkeypatch.setattr(api, "_simulation", sim)
+    sim.step()  # the stepping thread is the simulation thread
+    result = {}
+    worker = threading.Thread(
+        target=lambda: result.update(api.get_memory_travel_distances_from_sim(0))
+    )
+    worker.start()
+    step_until(sim, lambda: not worker.is_alive())
+    assert result == expected
+    assert threads and all(name.startswith("planner") for name in threads)
+
+
+def _walled_off_cups(sim) -> dict:
+    # the robot starts at (400, 300); a wall sits between it and "near"
+    sim.env.obstacles = [
+        pygame.Rect(440, 150, 10, 300),
+        # "boxed" is sealed in on all sides
+        pygame.Rect(560, 380, 200, 10),
+        pygame.Rect(560, 580, 200, 10),
+        pygame.Rect(560, 380, 10, 210),
+        pygame.Rect(750, 380, 10, 210),
+    ]
+    positions = {"boxed": (660, 485), "near": (480, 300), "far": (400, 100)}
+    sim.memory.upsert_many(
+        {
+            "entry_id": entry_id,
+            "entry_type": "object",
+            "label": "cup",
+            "map_coordinates": {"x": x, "y": y},
+        }
+        for entry_id, (x, y) in positions.items()
+    )
+    return positions
+
+
+def test_travel_distances_follow_paths_around_walls(sim):
+    positions = _walled_off_cups(sim)
+    distances = sim.memory_travel_distances(0)
+    assert distances["boxed"] is None
+    assert distances["far"] < distances["near"]
+    # in a straight line "near" is the closer one
+    assert math.dist((400, 300), positions["near"]) < distances["far"]
+
+
+def test_rank_by_travel_distance_puts_walled_off_objects_last(sim, monkeypatch):
+    pytest.importorskip("sounddevice")
+    from src.GraphAgent.core.interfaces import rank_by_travel_distance
+
+    _walled_off_cups(sim)
+    monkeypatch.setattr(api, "_simulation", sim)
+    results = [sim.memory.get(entry_id) for entry_id in ("boxed", "near", "far")]
+    ranked = rank_by_travel_distance(results, 0)
+    assert [e["entry_id"] for e in ranked] == ["far", "near", "boxed"]
+    assert ranked[-1]["travel_distance"] is None
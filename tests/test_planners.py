@@ -0,0 +1,290 @@
+# filepath: tests/test_planners.py
+"""
+Path planners, the plan cache and incremental repair.
+"""
+
+import math
+import random
+
+import numpy as np
+import pygame
+import pytest
+from conftest import step_until
+
+from src.Simulator.occupancy import Costmap, OccupancyGrid
+from src.Simulator.planners import (
+    DStarLite,
+    PlanCache,
+    distance_field,
+    euclidean,
+    get_planner,
+    line_cost,
+    octile,
+    plan_path,
+)
+
+
+def random_rects(seed: int, n: int = 20) -> list:
+    rng = random.Random(seed)
+    return [
+        pygame.Rect(
+            rng.randint(0, 760),
+            rng.randint(0, 560),
+            rng.randint(5, 90),
+            rng.randint(5, 90),
+        )
+        for _ in range(n)
+    ]
+
+
+def costmap_of(rects, version: int = 0) -> Costmap:
+    return Costmap(OccupancyGrid.from_rects(rects, 800, 600, 20, version), 10)
+
+
+def free_cells(costmap: Costmap, seed: int):
+    rng = random.Random(seed)
+    free = [
+        (c, r)
+        for r in range(costmap.grid.rows)
+        for c in range(costmap.grid.cols)
+        if not costmap.lethal[r, c]
+    ]
+    return rng.sample(free, 2)
+
+
+def path_length(points) -> float:
+    return sum(math.dist(a, b) for a, b in zip(points, points[1:]))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_dstar_repairs_match_astar(seed):
+    rects = random_rects(seed)
+    costmap = costmap_of(rects)
+    start, goal = free_cells(costmap, seed)
+    astar = get_planner("astar")
+    dstar = DStarLite(costmap, start, goal)
+    assert dstar.plan().cost == pytest.approx(astar.plan(costmap, start, goal).cost)
+    rng = random.Random(seed + 100)
+    for version in range(1, 4):
+        rects = rects + [pygame.Rect(rng.randint(0, 760), rng.randint(0, 560), 60, 60)]
+        costmap = costmap_of(rects, version)
+        if costmap.lethal[start[1], start[0]]:
+            break
+        dstar.update(costmap, start)
+        expected = astar.plan(costmap, start, goal)
+        assert dstar.plan().cost == pytest.approx(expected.cost)
+
+
+def test_replanner_ready_before_first_map_change(sim):
+    sim.send_nav_goal(700, 500, 0)
+    step_until(sim, lambda: 0 in sim._replanners)
+    replanner = sim._replanners[0]
+    robot = sim.robot
+    # a wall across the rest of the path
+    sim.add_dynamic_obstacle(int(robot.x) + 60, int(robot.y) - 100, 30, 200)
+    sim.step()
+    assert sim.repairs == 1
+    assert sim._replanners[0] is replanner and replanner.repairs == 1
+    fresh = DStarLite(replanner.costmap, replanner.start, replanner.goal)
+    assert sim.last_repair_expanded < fresh.expanded
+
+
+def test_grid_matches_colliderect():
+    rects = random_rects(7, 40) + [
+        pygame.Rect(40, 40, 20, 20),  # exactly one cell
+        pygame.Rect(100, 100, 0, 30),  # zero-sized rects never collide
+        pygame.Rect(-30, -30, 50, 50),  # partly off the map
+        pygame.Rect(790, 590, 40, 40),
+        pygame.Rect(200, 200, -20, 20),  # negative size
+    ]
+    grid = OccupancyGrid.from_rects(rects, 800, 600, 20)
+    expected = [
+        [
+            pygame.Rect(c * 20, r * 20, 20, 20).collidelist(rects) != -1
+            for c in range(grid.cols)
+        ]
+        for r in range(grid.rows)
+    ]
+    assert grid.cells.tolist() == expected
+
+
+def test_costmap_inflation():
+    grid = OccupancyGrid.from_rects(random_rects(3), 800, 600, 20)
+    costmap = Costmap(grid, 15)
+    ys, xs = np.nonzero(grid.cells)
+    for r in range(grid.rows):
+        for c in range(grid.cols):
+            # centre-to-box distance to the nearest occupied cell
+            dx = np.maximum(np.abs(xs - c) - 0.5, 0.0)
+            dy = np.maximum(np.abs(ys - r) - 0.5, 0.0)
+            exact = 20 * float(np.hypot(dx, dy).min())
+            clearance = costmap.clearance[r, c]
+            if exact < costmap.clearance_range:
+                assert clearance == pytest.approx(exact)
+            else:
+                assert clearance == math.inf
+            assert costmap.lethal[r, c] == (grid.cells[r, c] or exact <= 15)
+            if exact >= costmap.inflation_radius:
+                assert costmap.cost[r, c] == 1.0
+    # the penalty grows towards obstacles
+    order = np.argsort(costmap.clearance, axis=None)
+    assert np.all(np.diff(costmap.cost.ravel()[order]) <= 1e-12)
+
+
+def grid_path_is_clear(costmap: Costmap, cells) -> bool:
+    # jump segments run straight or at 45 degrees over non-lethal cells
+    for (x0, y0), (x1, y1) in zip(cells, cells[1:]):
+        dx, dy = x1 - x0, y1 - y0
+        if dx and dy and abs(dx) != abs(dy):
+            return False
+        n = max(abs(dx), abs(dy))
+        sx, sy = (dx > 0) - (dx < 0), (dy > 0) - (dy < 0)
+        if any(costmap.is_lethal((x0 + k * sx, y0 + k * sy)) for k in range(n + 1)):
+            return False
+        # diagonal moves never cut an obstacle corner
+        if (
+            dx
+            and dy
+            and any(
+                costmap.is_lethal((x0 + (k + 1) * sx, y0 + k * sy))
+                or costmap.is_lethal((x0 + k * sx, y0 + (k + 1) * sy))
+                for k in range(n)
+            )
+        ):
+            return False
+    return True
+
+
+def any_angle_path_is_clear(costmap: Costmap, cells) -> bool:
+    # grid moves between neighbours, else segments with line of sight
+    return all(
+        grid_path_is_clear(costmap, [a, b])
+        if max(abs(b[0] - a[0]), abs(b[1] - a[1])) == 1
+        else line_cost(costmap, a, b) is not None
+        for a, b in zip(cells, cells[1:])
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_astar_is_optimal(seed):
+    costmap = costmap_of(random_rects(seed))
+    start, goal = free_cells(costmap, seed)
+    result = get_planner("astar").plan(costmap, start, goal)
+    field = distance_field(costmap, start)
+    assert result.cost * 20 == pytest.approx(field[goal[1], goal[0]])
+    assert result.cells[0] == start and result.cells[-1] == goal
+    assert not any(costmap.is_lethal(c) for c in result.cells)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_jps_and_theta_on_uniform_costs(seed):
+    # without inflation penalties JPS is optimal and Theta* no longer
+    grid = OccupancyGrid.from_rects(random_rects(seed), 800, 600, 20)
+    costmap = Costmap(grid, 10, cost_weight=0.0)
+    start, goal = free_cells(costmap, seed)
+    astar = get_planner("astar").plan(costmap, start, goal)
+    jps = get_planner("jps").plan(costmap, start, goal)
+    theta = get_planner("theta").plan(costmap, start, goal)
+    assert jps.cost == pytest.approx(astar.cost)
+    assert euclidean(start, goal) <= theta.cost + 1e-9 <= astar.cost + 1e-9
+    assert jps.cells[-1] == theta.cells[-1] == goal
+    assert grid_path_is_clear(costmap, jps.cells)
+    assert any_angle_path_is_clear(costmap, theta.cells)
+
+
+def test_theta_heuristic_is_admissible_for_any_angle_paths():
+    costmap = Costmap(OccupancyGrid.from_rects([], 800, 600, 20), 10, cost_weight=0.0)
+    start, goal = (2, 3), (30, 17)
+    theta = get_planner("theta").plan(costmap, start, goal)
+    # one straight segment, shorter than the 8-connected octile distance
+    assert theta.cells == [start, goal]
+    assert theta.cost == pytest.approx(euclidean(start, goal))
+    assert theta.cost < octile(start, goal)
+
+
+@pytest.mark.parametrize("planner", ["astar", "jps"])
+def test_smoothing_shortens_paths_and_keeps_them_clear(make_sim, planner):
+    sim = make_sim(headless=True)
+    sim.env.obstacles = random_rects(7, 12)
+    costmap = sim.env.costmap(sim.robot.radius)
+    rng = random.Random(7)
+    shortened = 0
+    for _ in range(10):
+        start, goal = free_cells(costmap, rng.random())
+        raw = plan_path(
+            costmap.grid.to_point(start),
+            costmap.grid.to_point(goal),
+            costmap,
+            planner,
+            False,
+        )
+        smoothed = plan_path(
+            costmap.grid.to_point(start), costmap.grid.to_point(goal), costmap, planner
+        )
+        assert raw.found == smoothed.found
+        if not smoothed.found:
+            continue
+        assert smoothed.raw_cells == raw.cells
+        assert smoothed.cells[0] == start and smoothed.cells[-1] == goal
+        assert smoothed.waypoints <= raw.waypoints
+        shortened += smoothed.waypoints < raw.waypoints
+        assert path_length(smoothed.path) <= path_length(raw.path) + 1e-9
+        for a, b in zip(smoothed.path, smoothed.path[1:]):
+            assert sim._segment_clear(a, b, sim.robot.radius)
+    assert shortened
+
+
+def test_unreachable_goal():
+    # a closed box around the goal
+    walls = [
+        pygame.Rect(400, 300, 200, 20),
+        pygame.Rect(400, 480, 200, 20),
+        pygame.Rect(400, 300, 20, 200),
+        pygame.Rect(580, 300, 20, 200),
+    ]
+    costmap = costmap_of(walls)
+    for name in ("astar", "jps", "theta"):
+        result = get_planner(name).plan(costmap, (2, 2), (25, 20))
+        assert not result.found and result.cost == math.inf
+
+
+def test_plan_cache_hits_and_reverse_hits():
+    costmap = costmap_of([pygame.Rect(300, 0, 40, 400)])
+    cache = PlanCache()
+    first = plan_path((30, 30), (700, 500), costmap, cache=cache)
+    assert first.found and not first.cached
+    again = plan_path((30, 30), (700, 500), costmap, cache=cache)
+    assert again.cached and again.expanded == 0 and again.cells == first.cells
+    back = plan_path((700, 500), (30, 30), costmap, cache=cache)
+    assert back.cached and back.cells == first.cells[::-1]
+    # served copies never alias the cached entry
+    again.cells.clear()
+    assert plan_path((30, 30), (700, 500), costmap, cache=cache).cells == first.cells
+    stats = cache.stats()
+    assert (stats["hits"], stats["reverse_hits"], stats["misses"]) == (2, 1, 1)
+
+
+def test_plan_cache_invalidated_by_map_version():
+    rects = [pygame.Rect(300, 0, 40, 400)]
+    cache = PlanCache()
+    plan_path((30, 30), (700, 500), costmap_of(rects, 0), cache=cache)
+    newer = costmap_of(rects + [pygame.Rect(500, 200, 40, 400)], 1)
+    result = plan_path((30, 30), (700, 500), newer, cache=cache)
+    assert not result.cached and cache.stats()["invalidations"] == 1
+    # a plan started on the outdated map is neither served nor stored
+    stale = costmap_of(rects, 0)
+    assert not plan_path((30, 30), (700, 500), stale, cache=cache).cached
+    assert cache.get(stale, (1, 1), (35, 25), "astar", True) is None
+    assert plan_path((30, 30), (700, 500), newer, cache=cache).cached
+
+
+def test_plan_cache_evicts_least_recently_used():
+    costmap = costmap_of([])
+    cache = PlanCache(maxsize=2)
+    goals = [(100, 100), (300, 300), (500, 500)]
+    for goal in goals[:2]:
+        plan_path((10, 10), goal, costmap, cache=cache)
+    plan_path((10, 10), goals[0], costmap, cache=cache)  # refresh the first
+    plan_path((10, 10), goals[2], costmap, cache=cache)
+    assert plan_path((10, 10), goals[0], costmap, cache=cache).cached
+    assert not plan_path((10, 10), goals[1], costmap, cache=cache).cached
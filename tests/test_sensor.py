@@ -0,0 +1,140 @@
+# filepath: tests/test_sensor.py
+"""
+Range sensor ray casting, field of view and area mapping.
+"""
+
+import math
+
+import numpy as np
+import pygame
+import pytest
+
+from src.Simulator.occupancy import OccupancyGrid
+from src.Simulator.sensor import ProbabilisticMap, RangeSensor, cast_rays
+
+
+def random_grid(seed: int, rows: int = 30, cols: int = 40) -> OccupancyGrid:
+    rng = np.random.default_rng(seed)
+    return OccupancyGrid(rng.random((rows, cols)) < 0.15, 20)
+
+
+def sampled_range(grid, x0, y0, angle, max_range, step=0.05):
+    # reference: march in tiny steps until a cell is occupied or left
+    t = 0.0
+    while t < max_range:
+        col = math.floor((x0 + math.cos(angle) * t) / grid.cell_size)
+        row = math.floor((y0 + math.sin(angle) * t) / grid.cell_size)
+        if not (0 <= col < grid.cols and 0 <= row < grid.rows):
+            return t, False
+        if grid.cells[row, col]:
+            return t, True
+        t += step
+    return max_range, False
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_cast_rays_matches_sampling(seed):
+    grid = random_grid(seed)
+    grid.cells[15, 20] = False
+    x0, y0 = 20 * 20 + 7.3, 15 * 20 + 11.1
+    angles = np.linspace(0, 2 * math.pi, 37)
+    rays = cast_rays(grid, x0, y0, angles, 300.0)
+    for angle, dist, hit in zip(angles, rays.ranges, rays.hit):
+        ref, ref_hit = sampled_range(grid, x0, y0, angle, 300.0)
+        assert dist == pytest.approx(ref, abs=0.1)
+        assert hit == ref_hit
+
+
+def test_probabilistic_map_hit_cells_are_not_free():
+    pmap = ProbabilisticMap(2, 2, 20)
+    for _ in range(3):
+        pmap.update(np.array([0, 1, 1]), np.array([1]))
+    assert pmap.free()[0, 0]
+    assert pmap.occupied()[0, 1]
+    assert not pmap.known[1].any()
+
+
+def test_narrow_fov_looks_along_heading():
+    sensor = RangeSensor(num_rays=5, max_range=200.0, fov=60.0)
+    # theta 90 faces up the screen (y decreases)
+    seen = sensor.in_view(400, 300, 90, np.array([400, 400]), np.array([200, 400]))
+    assert seen.tolist() == [True, False]
+    grid = OccupancyGrid(np.zeros((30, 40), dtype=bool), 20)
+    rays = sensor.scan(grid, 400, 300, 90)
+    rows = rays.free_cells // grid.cols
+    assert (rows <= 300 // 20).all()
+    assert rows.min() < 300 // 20
+
+
+def test_map_area_finds_occluded_objects(make_sim):
+    sim = make_sim(width=1280, height=768, headless=True)
+    cup = next(obj for obj in sim.objects if obj["label"] == "cup")
+    # from the start pose an obstacle hides the cup
+    pose = (sim.robot.x, sim.robot.y, sim.robot.theta)
+    sim._sync_object_index()
+    assert cup not in sim._objects_in_view(sim.env.grid, *pose)
+    sim.map_area()
+    assert sorted(e["label"] for e in sim.memory.query("object")) == ["book", "cup"]
+
+
+def test_scan_updates_moved_objects(sim):
+    sim.map_area()
+    version = sim.memory.version
+    sim.map_area()
+    assert sim.memory.version == version
+    book = next(obj for obj in sim.objects if obj["label"] == "book")
+    sim.move_object(book["entry_id"], book["rect"].x + 20, book["rect"].y)
+    sim.map_area()
+    coords = sim.memory.get(book["entry_id"])["map_coordinates"]
+    assert (coords["x"], coords["y"]) == book["rect"].center
+
+
+def test_scan_work_does_not_grow_with_far_objects(make_sim, monkeypatch):
+    def candidates_per_scan(extra: int) -> list:
+        sim = make_sim(width=4000, height=768, headless=True)
+        # objects beyond the sensor's reach of every viewpoint
+        far = [
+            {
+                "entry_id": f"far{i}",
+                "rect": pygame.Rect(3000 + i % 900, 20 + i % 700, 5, 5),
+                "label": "box",
+                "confidence": 0.5,
+            }
+            for i in range(extra)
+        ]
+        sim.objects = sim.objects + far
+        sim.scan()
+        # count every pass over the objects list
+        passes = []
+
+        class Objects(list):
+            def __iter__(self):
+                passes.append(1)
+                return super().__iter__()
+
+        sim._objects = Objects(sim.objects)
+        rebuilds, checked = [], []
+        rebuild = sim._object_index.rebuild
+        monkeypatch.setattr(
+            sim._object_index,
+            "rebuild",
+            lambda rects: rebuilds.append(1) or rebuild(rects),
+        )
+        in_view = sim.sensor.in_view
+        monkeypatch.setattr(
+            sim.sensor,
+            "in_view",
+            lambda x, y, theta, xs, ys, grid: (
+                checked.append(len(xs)) or in_view(x, y, theta, xs, ys, grid)
+            ),
+        )
+        sim.scan(survey=True)
+        sim.scan(survey=True)
+        # unchanged objects are not walked or reindexed, whatever their count
+        assert passes == [] and rebuilds == []
+        sim.mark_objects_dirty()
+        sim.scan(survey=True)
+        assert len(rebuilds) == 1
+        return checked
+
+    assert candidates_per_scan(0) == candidates_per_scan(5000)
@@ -0,0 +1,88 @@
+# filepath: tests/test_spatial.py
+"""
+Spatial hash over obstacle rects: candidates from insert, remove and rebuild.
+"""
+
+import random
+
+import pygame
+
+from src.Simulator.spatial import SpatialHash
+
+
+def overlaps(rect: pygame.Rect, left, top, right, bottom) -> bool:
+    return (
+        rect.left < right
+        and rect.right > left
+        and rect.top < bottom
+        and rect.bottom > top
+    )
+
+
+def hits(index: SpatialHash, box) -> set:
+    # the exact matches among the query's candidates
+    return {id(r) for r in index.query_rect(*box) if overlaps(r, *box)}
+
+
+def random_box(rng: random.Random):
+    left, top = rng.uniform(-100, 900), rng.uniform(-100, 700)
+    return left, top, left + rng.uniform(1, 200), top + rng.uniform(1, 200)
+
+
+def test_query_rect_finds_exactly_the_overlapping_rects():
+    rng = random.Random(0)
+    rects = [
+        pygame.Rect(rng.randint(-50, 800), rng.randint(-50, 600), *size)
+        for size in ((rng.randint(1, 150), rng.randint(1, 150)) for _ in range(200))
+    ]
+    index = SpatialHash(bucket_size=64)
+    for rect in rects:
+        index.insert(rect)
+    assert len(index) == len(rects)
+    # remove every third rect, including ones spanning several buckets
+    removed = rects[::3]
+    for rect in removed:
+        index.remove(rect)
+    kept = [r for r in rects if all(r is not d for d in removed)]
+    assert len(index) == len(kept)
+    for _ in range(200):
+        box = random_box(rng)
+        candidates = index.query_rect(*box)
+        assert len({id(r) for r in candidates}) == len(candidates)
+        assert not {id(r) for r in candidates} & {id(r) for r in removed}
+        assert hits(index, box) == {id(r) for r in kept if overlaps(r, *box)}
+
+    rebuilt = SpatialHash(bucket_size=64)
+    rebuilt.rebuild(kept)
+    for _ in range(50):
+        box = random_box(rng)
+        assert hits(rebuilt, box) == hits(index, box)
+
+
+def test_remove_matches_identity_not_value():
+    index = SpatialHash()
+    a, b = pygame.Rect(10, 10, 20, 20), pygame.Rect(10, 10, 20, 20)
+    index.insert(a)
+    index.insert(b)
+    index.remove(a)
+    assert index.query_rect(0, 0, 50, 50) == [b]
+    index.remove(b)
+    assert index.query_rect(0, 0, 50, 50) == [] and not index._buckets
+
+
+def test_candidates_stay_bounded_as_unrelated_obstacles_are_added():
+    index = SpatialHash(bucket_size=64)
+    near = [pygame.Rect(100 + 30 * i, 100, 20, 20) for i in range(4)]
+    for rect in near:
+        index.insert(rect)
+    box = (90, 90, 230, 130)
+    before = len(index.query_rect(*box))
+    rng = random.Random(1)
+    for _ in range(2000):
+        # far from the query area
+        index.insert(
+            pygame.Rect(rng.randint(400, 5000), rng.randint(400, 5000), 30, 30)
+        )
+    assert len(index) == 2004
+    assert len(index.query_rect(*box)) == before
+    assert hits(index, box) == {id(r) for r in near}
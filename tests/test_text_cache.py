@@ -0,0 +1,76 @@
+# filepath: tests/test_text_cache.py
+"""
+Rendered-text LRU cache and per-line slots.
+"""
+
+import pygame
+import pygame.freetype
+import pytest
+
+from src.Simulator.text_cache import TextCache
+
+
+class CountingFont:
+    """
+    Wraps a freetype font and counts how often text is rasterized.
+    """
+
+    def __init__(self, size: int = 14):
+        self.font = pygame.freetype.Font(None, size)
+        self.renders = []
+
+    def render(self, text, color):
+        self.renders.append(text)
+        return self.font.render(text, color)
+
+
+@pytest.fixture
+def font():
+    pygame.freetype.init()
+    return CountingFont()
+
+
+def test_repeated_text_is_rendered_once(font):
+    cache = TextCache()
+    surface = pygame.Surface((200, 50))
+    first = cache.render(font, "Map Area", (255, 255, 255))
+    for _ in range(5):
+        assert cache.render(font, "Map Area", (255, 255, 255)) is first
+    cache.render_to(surface, (0, 0), font, "Map Area", (255, 255, 255))
+    assert font.renders == ["Map Area"]
+    # a different colour is a different surface
+    cache.render(font, "Map Area", (255, 0, 0))
+    assert font.renders == ["Map Area", "Map Area"]
+    assert cache.get_rect(font, "Map Area") == first[1]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (7, 2)
+
+
+def test_least_recently_used_text_is_evicted(font):
+    cache = TextCache(maxsize=3)
+    for text in ("a", "b", "c"):
+        cache.render(font, text, (0, 0, 0))
+    cache.render(font, "a", (0, 0, 0))  # "b" is now the oldest
+    cache.render(font, "d", (0, 0, 0))
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 3
+    font.renders.clear()
+    cache.render(font, "a", (0, 0, 0))
+    cache.render(font, "c", (0, 0, 0))
+    assert font.renders == []
+    cache.render(font, "b", (0, 0, 0))
+    assert font.renders == ["b"]
+
+
+def test_slot_rerenders_only_when_its_text_changes(font):
+    cache = TextCache(maxsize=2)
+    surface = pygame.Surface((200, 50))
+    for text in ("x=1", "x=1", "x=2", "x=2", "x=3"):
+        cache.render_slot_to("pose", surface, (0, 0), font, text, (255, 255, 255))
+    assert font.renders == ["x=1", "x=2", "x=3"]
+    stats = cache.stats()
+    assert (stats["slot_renders"], stats["slot_hits"], stats["slots"]) == (3, 2, 1)
+    # changing slot text never touches the LRU
+    assert stats["size"] == 0 and stats["evictions"] == 0
+    cache.clear()
+    cache.render_slot_to("pose", surface, (0, 0), font, "x=3", (255, 255, 255))
+    assert font.renders[-1] == "x=3" and len(font.renders) == 4
@@ -0,0 +1,66 @@
+# filepath: tests/test_timestep.py
+"""
+Fixed-step physics: motion per simulated second does not depend on the frame
+rate.
+"""
+
+import pytest
+
+
+class FakeClock:
+    """
+    Stands in for pygame's frame clock, reporting a fixed frame time.
+    """
+
+    def __init__(self, frame_dt: float):
+        self.frame_dt = frame_dt
+
+    def tick(self, framerate: int = 0) -> float:
+        return self.frame_dt * 1000.0
+
+
+# binary fractions, so the accumulator is exact
+@pytest.mark.parametrize("frame_dt", [1 / 128, 3 / 64, 1 / 32, 1 / 8, 3 / 16])
+def test_physics_steps_per_second_ignore_render_dt(make_sim, monkeypatch, frame_dt):
+    sim = make_sim(headless=False, fixed_dt=1 / 32)
+    sim.clock = FakeClock(frame_dt)
+    steps = []
+    physics_step = sim._physics_step
+
+    def counting(dt):
+        steps.append(dt)
+        physics_step(dt)
+
+    monkeypatch.setattr(sim, "_physics_step", counting)
+    frames = 0
+    while frames * frame_dt < 4.0 - 1e-9:
+        sim.step()
+        frames += 1
+    # whatever is left in the accumulator is less than one step
+    assert len(steps) == int(frames * frame_dt * 32 + 1e-6)
+    assert set(steps) == {1 / 32}
+    assert sim.sim_time == pytest.approx(len(steps) / 32)
+    assert sim.frames + sim.dropped_frames == frames
+
+
+def test_stalls_are_clamped(make_sim):
+    sim = make_sim(headless=False, fixed_dt=1 / 32, max_frame_time=0.25)
+    sim.clock = FakeClock(5.0)
+    sim.step()
+    # a 5 s stall advances at most max_frame_time, over several frames
+    assert sim.sim_time == pytest.approx(0.25)
+    assert sim.dropped_frames == 0
+
+
+@pytest.mark.parametrize("fleet_size", [0, 3])
+def test_move_forward_keeps_its_own_speed(make_sim, fleet_size):
+    sim = make_sim(headless=True, fleet_size=fleet_size)
+    robot = sim.get_robot(0)
+    robot.theta = 0.0
+    x, y = robot.x, robot.y
+    sim.start_action("move_forward", {"duration": 3.0}, robot_id=0)
+    sim.run_for(4.0)
+    # move_forward is a slow creep, unlike path following at robot.speed
+    assert robot.x - x == pytest.approx(6.0, abs=0.1)
+    assert robot.y == pytest.approx(y)
+    assert robot.speed > 2.0